@@ -0,0 +1,65 @@
+"""
+异步接口基准
+
+使用带延迟的 MemoryBackend，比较依次调用同步接口与用 asyncio.gather 同时发起多个异步调用
+（最多 ASYNC_CONCURRENCY 个同时执行）的总耗时，并测量同步包装本身（交给共用线程池执行）的开销。
+同步接口会输出结果摘要，异步接口不输出任何信息。
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import env_utils
+from env_record import EnvVar
+from env_utils import MemoryBackend, get_all_env_list, set_env_to_system, set_env_to_system_async
+
+
+def make_batches(operations):
+    return [[EnvVar(f"VAR_{i:05d}", f"C:\\Tool{i}\\bin", "String", "User")] for i in range(operations)]
+
+
+async def gather_writes(batches):
+    return await asyncio.gather(*(set_env_to_system_async(batch) for batch in batches))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="env_utils 异步接口基准")
+    parser.add_argument("--operations", type=int, default=16, help="写入操作数量")
+    parser.add_argument("--latency", type=float, default=0.1, help="每次后端调用的模拟延迟（秒）")
+    parser.add_argument("--repeat", type=int, default=1000, help="测量同步包装开销的读取次数")
+    args = parser.parse_args()
+
+    batches = make_batches(args.operations)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        env_utils.set_backend(MemoryBackend(latency=args.latency))
+        start = time.perf_counter()
+        for batch in batches:
+            set_env_to_system(batch)
+        sequential = time.perf_counter() - start
+
+        env_utils.set_backend(MemoryBackend(latency=args.latency))
+        start = time.perf_counter()
+        asyncio.run(gather_writes(batches))
+        concurrent = time.perf_counter() - start
+
+    print(f"{args.operations} writes, backend latency {args.latency * 1000:.0f} ms, "
+          f"concurrency limit {env_utils.ASYNC_CONCURRENCY}")
+    print(f"  sync, one after another: {sequential * 1000:8.1f} ms")
+    print(f"  async, gathered:         {concurrent * 1000:8.1f} ms")
+
+    env_utils.set_backend(MemoryBackend(make_batches(1)[0]))
+    get_all_env_list()
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        get_all_env_list()
+    elapsed = time.perf_counter() - start
+    print(f"sync wrapper overhead (cached read): {elapsed / args.repeat * 1e6:.0f} us per call")
+
+
+if __name__ == "__main__":
+    main()
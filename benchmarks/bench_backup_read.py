@@ -0,0 +1,102 @@
+"""
+备份读取基准
+
+在 100k 条目的 YAML/JSON 备份上对比旧的整体加载（yaml.safe_load / json.load 后构建列表）
+与新的流式读取器（iter_env_from_yaml / iter_env_from_json）的耗时和峰值内存，
+并测量边读取边送入 DiffEngine 的总耗时。iter_env_from_json 对不超过 JSON_STREAM_THRESHOLD 的文件
+使用 json.load，"json, streaming" 一行是更大的文件使用的流式读取器。
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import yaml_utils
+from diff_engine import DiffEngine
+from env_record import EnvVar, SCOPE_MACHINE, SCOPE_USER
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:06d}", f"C:\\Program Files\\Tool{i}\\bin;%SystemRoot%\\system32",
+                   "ExpandString" if i % 3 else "String", "Machine" if i % 2 else "User") for i in range(count)]
+
+
+def old_yaml(filename):
+    """原来的 get_env_from_yaml"""
+    with open(filename, "r", encoding="utf-8") as f:
+        yaml_data = yaml.safe_load(f)
+    env_list = []
+    for scope, envs in yaml_data.items():
+        scope = SCOPE_MACHINE if scope.lower() == "machine" else SCOPE_USER
+        for env in envs:
+            env_list.append(EnvVar(env["name"], env["value"], env["kind"], scope))
+    return env_list
+
+
+def old_json(filename):
+    """原来 import_backup 的 JSON 分支"""
+    with open(filename, "r", encoding="utf-8") as f:
+        backup_data = json.load(f)
+    return [EnvVar(var["name"], var["value"], var["kind"], var["scope"])
+            for var in backup_data.get("variables", [])]
+
+
+def diff_while_reading(reader, system_rows):
+    engine = DiffEngine()
+    engine.reset(system_rows, [])
+    return list(engine.feed_current(reader()))
+
+
+def measure(load):
+    """耗时和峰值内存分两次测量；流式读取器只逐条消费，不保留结果"""
+    start = time.perf_counter()
+    count = sum(1 for _ in load())
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in load():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="备份读取耗时和峰值内存基准")
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.count)
+    print(f"entries: {args.count}, libyaml loader: {yaml_utils.Loader.__name__}")
+    with tempfile.TemporaryDirectory() as directory:
+        yaml_file = os.path.join(directory, "backup.yaml")
+        json_file = os.path.join(directory, "backup.json")
+        yaml_utils.save_env_to_yaml(rows, yaml_file)
+        yaml_utils.save_env_to_json(rows, json_file)
+
+        for label, load in (
+            ("yaml, safe_load (before)", lambda: old_yaml(yaml_file)),
+            ("yaml, streaming (after)", lambda: yaml_utils.iter_env_from_yaml(yaml_file)),
+            ("json, json.load (before)", lambda: old_json(json_file)),
+            ("json, iter_env_from_json", lambda: yaml_utils.iter_env_from_json(json_file)),
+            ("json, streaming", lambda: yaml_utils.stream_env_from_json(json_file)),
+        ):
+            count, elapsed, peak = measure(load)
+            assert count == args.count
+            print(f"  {label:<26} {elapsed * 1000:9.1f} ms   peak {peak / 1024 / 1024:7.2f} MB")
+
+        system_rows = rows[: args.count // 2]
+        start = time.perf_counter()
+        diff_while_reading(lambda: yaml_utils.iter_env_from_yaml(yaml_file), system_rows)
+        print(f"  yaml streaming + DiffEngine.feed_current   {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+备份写入基准
+
+对比旧的"先在内存中构建完整字典再 yaml.dump / json.dump"与新的流式原子写入
+（save_env_to_yaml / save_env_to_json）写大快照时的耗时和峰值内存。
+开始测量前先确认流式写入的输出与一次性 dump 逐字节相同（JSON 的时间戳除外）。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import yaml_utils
+from env_record import EnvVar
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:06d}", f"C:\\Program Files\\Tool{i}\\bin;%SystemRoot%\\system32",
+                   "ExpandString" if i % 3 else "String", "Machine" if i % 2 else "User") for i in range(count)]
+
+
+def old_yaml(env_list, filename):
+    """原来的 save_env_to_yaml"""
+    machine_envs = []
+    user_envs = []
+    for name, value, kind, scope in env_list:
+        env_data = {"name": name, "value": value, "kind": kind}
+        (machine_envs if scope == "Machine" else user_envs).append(env_data)
+    with open(filename, "w", encoding="utf-8") as f:
+        yaml.dump({"machine": machine_envs, "user": user_envs}, f,
+                  default_flow_style=False, allow_unicode=True, sort_keys=False)
+
+
+def old_json(env_list, filename):
+    """原来 backup_env_vars 的 JSON 分支"""
+    backup_data = {"timestamp": datetime.now().isoformat(), "count": len(env_list), "variables": []}
+    for name, value, kind, scope in env_list:
+        backup_data["variables"].append({"name": name, "value": value, "kind": kind, "scope": scope})
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(backup_data, f, ensure_ascii=False, indent=2)
+
+
+# 需要引号、转义或折行的值，以及只有一个作用域的情况
+TRICKY_ROWS = [
+    EnvVar("PATH", "C:\\Windows;" * 20, "ExpandString", "Machine"),
+    EnvVar("QUOTED", "say \"hi\" and 'bye'", "String", "Machine"),
+    EnvVar("MULTILINE", "line 1\nline 2\ttab", "String", "Machine"),
+    EnvVar("UNICODE", "路径 é \U0001F600", "String", "Machine"),
+    EnvVar("YAML_LIKE", "yes", "String", "Machine"),
+    EnvVar("NUMBER_LIKE", "0123", "String", "Machine"),
+    EnvVar("EMPTY", "", "String", "Machine"),
+    EnvVar("SPACES", "  leading and trailing  ", "String", "Machine"),
+    EnvVar("COLON", "key: value # comment", "String", "Machine"),
+]
+
+
+def read_normalized(filename):
+    with open(filename, "rb") as f:
+        return re.sub(rb'"timestamp": "[^"]*"', b'"timestamp": ""', f.read())
+
+
+def whole_yaml(env_list, filename):
+    """与 save_env_to_yaml 使用同一个 Dumper 一次性 yaml.dump 整个文档"""
+    with open(filename, "w", encoding="utf-8") as f:
+        yaml.dump({
+            "machine": [{"name": name, "value": value, "kind": kind} for name, value, kind, scope in env_list if scope == "Machine"],
+            "user": [{"name": name, "value": value, "kind": kind} for name, value, kind, scope in env_list if scope != "Machine"],
+        }, f, Dumper=yaml_utils.Dumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
+
+
+def check_same_output(rows, directory):
+    """分块流式写入必须与一次性 dump 逐字节相同，且读回的数据与原来的写法一致
+
+    libyaml 会把 BMP 以外的字符写成 \\U 转义，纯 Python Dumper 则原样输出，
+    所以与原来的 yaml.dump（纯 Python Dumper）只比较读回的数据。
+    """
+    expected = os.path.join(directory, "expected")
+    actual = os.path.join(directory, "actual")
+    for data in (rows, TRICKY_ROWS, []):
+        whole_yaml(data, expected)
+        yaml_utils.save_env_to_yaml(data, actual)
+        assert read_normalized(expected) == read_normalized(actual), f"YAML 输出与一次性 yaml.dump 不同 ({len(data)} 个变量)"
+        old_yaml(data, expected)
+        with open(expected, encoding="utf-8") as f1, open(actual, encoding="utf-8") as f2:
+            assert yaml.safe_load(f1) == yaml.safe_load(f2), f"YAML 读回的数据与原来的写法不同 ({len(data)} 个变量)"
+        old_json(data, expected)
+        yaml_utils.save_env_to_json(data, actual)
+        assert read_normalized(expected) == read_normalized(actual), f"JSON 输出与原来的写法不同 ({len(data)} 个变量)"
+
+
+def measure(func, rows, filename):
+    """耗时和峰值内存分两次测量，避免 tracemalloc 的开销计入耗时"""
+    start = time.perf_counter()
+    func(rows, filename)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(rows, filename)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="备份写入耗时和峰值内存基准")
+    parser.add_argument("--count", type=int, default=50000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.count)
+    print(f"variables: {args.count}, libyaml dumper: {yaml_utils.Dumper.__name__}")
+    with tempfile.TemporaryDirectory() as directory:
+        check_same_output(rows[:2 * yaml_utils.WRITE_CHUNK + 500] + TRICKY_ROWS, directory)
+        print("  output check: YAML byte-identical to yaml.dump, JSON byte-identical to json.dump")
+        for label, func, ext in (
+            ("yaml, in-memory (before)", old_yaml, "yaml"),
+            ("yaml, streaming (after)", yaml_utils.save_env_to_yaml, "yaml"),
+            ("json, in-memory (before)", old_json, "json"),
+            ("json, streaming (after)", yaml_utils.save_env_to_json, "json"),
+        ):
+            filename = os.path.join(directory, f"backup.{ext}")
+            elapsed, peak = measure(func, rows, filename)
+            size = os.path.getsize(filename)
+            print(f"  {label:<26} {elapsed * 1000:9.1f} ms   peak {peak / 1024 / 1024:7.2f} MB   "
+                  f"file {size / 1024 / 1024:6.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+二进制快照查找基准
+
+在同一份数据上比较：完整加载 YAML 备份（get_env_from_yaml）后查找一个变量，
+与打开 .envs 二进制快照（mmap）后二分查找一个变量的延迟；同时比较文件大小，
+并验证 YAML -> 二进制 -> YAML 往返转换后数据完全一致。
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from binary_snapshot import BinarySnapshot, binary_to_yaml, yaml_to_binary
+from env_record import EnvVar
+from yaml_utils import get_env_from_yaml, save_env_to_yaml
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:06d}", f"C:\\Program Files\\Tool{i}\\bin;%SystemRoot%\\system32",
+                   "ExpandString" if i % 3 else "String", "Machine" if i % 2 else "User") for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="二进制快照查找延迟基准")
+    parser.add_argument("--count", type=int, default=100000, help="变量数量")
+    parser.add_argument("--lookups", type=int, default=10000, help="随机查找次数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = make_rows(args.count)
+    with tempfile.TemporaryDirectory() as directory:
+        yaml_file = os.path.join(directory, "backup.yaml")
+        binary_file = os.path.join(directory, "backup.envs")
+        round_trip_file = os.path.join(directory, "round_trip.yaml")
+        save_env_to_yaml(rows, yaml_file)
+        yaml_to_binary(yaml_file, binary_file)
+        binary_to_yaml(binary_file, round_trip_file)
+        key = lambda env: (env.scope, env.name)
+        assert sorted(map(tuple, get_env_from_yaml(round_trip_file)), key=lambda t: (t[3], t[0])) == \
+            sorted(map(tuple, rows), key=lambda t: (t[3], t[0]))
+
+        target = rows[rng.randrange(args.count)]
+        start = time.perf_counter()
+        found = [env for env in get_env_from_yaml(yaml_file) if key(env) == key(target)]
+        yaml_time = time.perf_counter() - start
+        assert found == [target] and found[0].value == target.value
+
+        start = time.perf_counter()
+        with BinarySnapshot(binary_file) as snapshot:
+            found = snapshot.get(target.name.lower(), target.scope)
+        open_time = time.perf_counter() - start
+        assert found.value == target.value
+
+        samples = [rows[rng.randrange(args.count)] for _ in range(args.lookups)]
+        with BinarySnapshot(binary_file) as snapshot:
+            start = time.perf_counter()
+            for env in samples:
+                view = snapshot.value_view(env.name, env.scope)
+                assert len(view) == len(env.value.encode("utf-8"))
+                view.release()
+            lookup_time = (time.perf_counter() - start) / args.lookups
+            assert snapshot.get("MISSING", "User") is None
+
+        print(f"variables: {args.count}")
+        print(f"  file size:  yaml {os.path.getsize(yaml_file) / 1024 / 1024:7.2f} MB, "
+              f"envs {os.path.getsize(binary_file) / 1024 / 1024:7.2f} MB")
+        print(f"  full YAML load + scan:       {yaml_time * 1000:10.1f} ms")
+        print(f"  open .envs + one lookup:     {open_time * 1000:10.3f} ms")
+        print(f"  lookup (already open):       {lookup_time * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
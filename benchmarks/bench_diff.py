@@ -0,0 +1,48 @@
+"""
+差异引擎基准
+
+对比每次编辑都全量重算差异 (DiffEngine.reset) 与只重新分类被修改变量
+(DiffEngine.update_current) 的单次编辑耗时。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from diff_engine import DiffEngine
+
+
+def make_env_list(count):
+    """生成指定数量的合成环境变量"""
+    return [[f"VAR_{i:06d}", f"value{i}", "String", "Machine" if i % 2 else "User"] for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量差异引擎基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--edits", type=int, default=100)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        system_data = make_env_list(size)
+        current_data = [env.copy() for env in system_data]
+        engine = DiffEngine()
+
+        start = time.perf_counter()
+        engine.reset(system_data, current_data)
+        full = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(args.edits):
+            name, value, kind, scope = current_data[i * 7 % size]
+            engine.update_current([name, value + "x", kind, scope])
+        incremental = (time.perf_counter() - start) / args.edits
+
+        print(f"{size:>7} vars: full recompute {full * 1000:8.2f} ms/edit, "
+              f"incremental {incremental * 1e6:6.2f} us/edit ({engine.summary()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+增量历史日志基准
+
+连续记录多个状态（每次只修改少量变量），比较日志大小与每次写完整 YAML 备份的大小，
+并测量 value_at / state_at 的查询延迟与从头重放整个日志的耗时；结果与记录时的数据逐一核对。
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar
+from history_log import HistoryLog, apply_changes
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:05d}", f"C:\\Program Files\\Tool{i}\\bin", "String",
+                   "Machine" if i % 2 else "User") for i in range(count)]
+
+
+def full_replay(path, ts):
+    """不使用检查点索引，从头重放到 ts"""
+    state = {}
+    with open(path, "rb") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["ts"] > ts:
+                break
+            if "checkpoint" in record:
+                state = {(name, scope): (value, kind) for name, scope, kind, value in record["checkpoint"]}
+            else:
+                apply_changes(state, record["changes"])
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量历史日志基准")
+    parser.add_argument("--count", type=int, default=2000, help="变量数量")
+    parser.add_argument("--states", type=int, default=500, help="记录的状态数量")
+    parser.add_argument("--changes", type=int, default=3, help="相邻状态之间修改的变量数")
+    parser.add_argument("--interval", type=int, default=50, help="检查点间隔")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = make_rows(args.count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.jsonl")
+        log = HistoryLog(path, checkpoint_interval=args.interval)
+
+        recorded = []
+        start = time.perf_counter()
+        for n in range(args.states):
+            if n:
+                for index in rng.sample(range(len(rows)), args.changes):
+                    rows[index] = rows[index].replace(value=f"C:\\v{n}\\{index}")
+                if n % 50 == 0:
+                    rows.append(EnvVar(f"NEW_{n}", "x", "String", "User"))
+                if n % 70 == 0:
+                    rows.pop(rng.randrange(len(rows)))
+            log.record(rows, when=1_700_000_000 + n * 3600)
+            recorded.append(list(rows))
+        record_time = (time.perf_counter() - start) / args.states
+
+        # 重新打开日志（从索引和最后一个检查点恢复）并核对每个时间点
+        log = HistoryLog(path, checkpoint_interval=args.interval)
+        for n in range(0, args.states, 37):
+            expected = {(env.name, env.scope): env.value for env in recorded[n]}
+            state = {(env.name, env.scope): env.value for env in log.state_at(1_700_000_000 + n * 3600 + 1)}
+            assert state == expected, f"state mismatch at {n}"
+
+        target = recorded[args.states // 2][0]
+        when = 1_700_000_000 + (args.states // 2) * 3600 + 1
+        assert log.value_at(target.name, target.scope, when) == target.value
+
+        repeat = 20
+        start = time.perf_counter()
+        for _ in range(repeat):
+            log.value_at(target.name, target.scope, when)
+        indexed = (time.perf_counter() - start) / repeat
+        start = time.perf_counter()
+        for _ in range(repeat):
+            full_replay(path, when)
+        replay = (time.perf_counter() - start) / repeat
+
+        full_size = sum(len(json.dumps([env.to_list() for env in state])) for state in recorded)
+        print(f"variables: {args.count}, states: {args.states}, changes/state: {args.changes}, "
+              f"checkpoint interval: {args.interval}")
+        print(f"  record:                {record_time * 1000:8.2f} ms/state")
+        print(f"  log size:              {os.path.getsize(path) / 1024 / 1024:8.2f} MB "
+              f"(full dumps {full_size / 1024 / 1024:.2f} MB)")
+        print(f"  value_at (checkpoint): {indexed * 1000:8.2f} ms")
+        print(f"  replay from start:     {replay * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
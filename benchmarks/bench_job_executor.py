@@ -0,0 +1,120 @@
+"""
+后台任务执行器基准
+
+模拟用户在读取尚未完成时连续点击"读取当前环境变量"、同时提交写入和导入：
+比较原来每次点击启动一个线程的方式与 JobExecutor（去重、串行写入、取消）的后端读取次数、
+同时进行的写入数量和总耗时。界面线程用一个简单的 after 循环代替。
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar
+from env_utils import MemoryBackend
+from job_executor import JobExecutor
+
+
+class FakeRoot:
+    """只实现 after 的界面线程替身，run() 在当前线程中执行定时回调"""
+
+    def __init__(self):
+        self.timers = []
+
+    def after(self, ms, callback):
+        self.timers.append((time.perf_counter() + ms / 1000, callback))
+
+    def run(self, until):
+        while not until():
+            self.timers.sort(key=lambda timer: timer[0])
+            due, callback = self.timers.pop(0)
+            time.sleep(max(0.0, due - time.perf_counter()))
+            callback()
+
+
+class ConcurrencyProbe:
+    """包装后端，记录同时进行的写入数量"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def apply(self, upserts, removals):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return self.backend.apply(upserts, removals)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:05d}", f"C:\\Tool{i}\\bin", "String", "User") for i in range(count)]
+
+
+def run_threads(backend, probe, clicks, writes):
+    threads = [threading.Thread(target=backend.read_all) for _ in range(clicks)]
+    threads += [threading.Thread(target=probe.apply, args=([EnvVar(f"W{i}", "x", "String", "User")], []))
+                for i in range(writes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_executor(backend, probe, clicks, writes):
+    executor = JobExecutor()
+    root = FakeRoot()
+    executor.start_polling(root, interval_ms=5)
+    pending = [0]
+
+    def finished(*_):
+        pending[0] -= 1
+
+    for _ in range(clicks):
+        pending[0] += 1
+        executor.submit(lambda token: backend.read_all(), on_done=finished, key="read_system_env")
+    for i in range(writes):
+        pending[0] += 1
+        rows = [EnvVar(f"W{i}", "x", "String", "User")]
+        executor.submit(lambda token, rows=rows: probe.apply(rows, []), on_done=finished, serial=True)
+    # 取消一个导入：和真正的导入一样分块检查取消标记，只会收到 on_finally
+    def slow_import(token):
+        for _ in range(100):
+            token.check()
+            time.sleep(0.01)
+
+    pending[0] += 1
+    job = executor.submit(slow_import, on_finally=finished)
+    job.cancel()
+    root.run(lambda: pending[0] == 0)
+    executor.shutdown(wait=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="后台任务执行器基准")
+    parser.add_argument("--count", type=int, default=2000, help="变量数量")
+    parser.add_argument("--clicks", type=int, default=10, help="读取尚未完成时的重复读取次数")
+    parser.add_argument("--writes", type=int, default=4, help="同时提交的写入数")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次后端调用模拟的延迟（秒）")
+    args = parser.parse_args()
+
+    for label, run in (("thread per action (before)", run_threads), ("JobExecutor (after)", run_executor)):
+        backend = MemoryBackend(make_rows(args.count), latency=args.latency)
+        probe = ConcurrencyProbe(backend)
+        start = time.perf_counter()
+        run(backend, probe, args.clicks, args.writes)
+        elapsed = time.perf_counter() - start
+        reads = backend.launch_count - args.writes
+        print(f"  {label:<28} reads {reads:3d}, peak concurrent writes {probe.peak}, {elapsed * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+EnvVar 内存基准
+
+模拟从后端解析得到的数据（每行的 scope/kind 都是新分配的字符串），
+用 tracemalloc 对比旧的 [name, value, kind, scope] 列表与 EnvVar 记录的每变量字节数，
+并测量 .copy() 式复制的分配开销。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar
+
+
+def parsed_rows(count):
+    """与 PowerShell 后端一样从 JSON 解析，name/value/kind/scope 都是独立的字符串对象"""
+    rows = [[f"VAR_{i:06d}", f"C:\\Tools\\bin{i}", "ExpandString" if i % 5 == 0 else "String",
+             "Machine" if i % 2 else "User"] for i in range(count)]
+    return json.loads(json.dumps(rows))
+
+
+def measure(build, count):
+    """统计解析并构建全部记录后仍然占用的内存（包括字符串），中间结果会被释放"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build(parsed_rows(count))
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return data, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EnvVar 每变量内存占用基准")
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    lists, list_bytes = measure(
+        lambda rows: [[name, value, kind, scope] for name, value, kind, scope in rows], args.count)
+    records, record_bytes = measure(
+        lambda rows: [EnvVar(name, value, kind, scope) for name, value, kind, scope in rows], args.count)
+
+    # 旧实现依赖的 kind/scope 字符串随行数增长；EnvVar 只引用驻留的常量
+    distinct_lists = len({id(env[2]) for env in lists} | {id(env[3]) for env in lists})
+    distinct_records = len({id(env.kind) for env in records} | {id(env.scope) for env in records})
+
+    start = time.perf_counter()
+    copied_lists = [env.copy() for env in lists]
+    list_copy = time.perf_counter() - start
+    start = time.perf_counter()
+    copied_records = [env.copy() for env in records]
+    record_copy = time.perf_counter() - start
+
+    print(f"variables:                   {args.count}")
+    print(f"list rows (before):          {list_bytes / args.count:.1f} bytes/var")
+    print(f"EnvVar records (after):      {record_bytes / args.count:.1f} bytes/var")
+    print(f"kind/scope string objects:   list {distinct_lists}, EnvVar {distinct_records}")
+    print(f"copy() of all rows:          list {list_copy * 1000:.2f} ms, EnvVar {record_copy * 1000:.2f} ms")
+    del copied_lists, copied_records
+
+
+if __name__ == "__main__":
+    main()
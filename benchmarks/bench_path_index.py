@@ -0,0 +1,73 @@
+"""
+路径段倒排索引基准
+
+构造大量带长 PATH 式值的变量，对比对完整值做子串扫描与 PathIndex.lookup
+查找"哪些变量包含这个目录"的耗时。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar
+from search_index import PathIndex, split_segments
+
+
+def make_rows(count, segments):
+    rows = []
+    for i in range(count):
+        value = ";".join(f"C:\\Tools\\pkg{(i * 7 + j) % (count * 2)}\\bin" for j in range(segments))
+        rows.append(EnvVar(f"PATH_{i:05d}", value + ";C:\\Python311\\Scripts\\", "ExpandString",
+                           "Machine" if i % 2 else "User"))
+    return rows
+
+
+def substring_scan(rows, path):
+    """旧方式：对每个完整值做不区分大小写的子串匹配"""
+    needle = path.lower()
+    return {env.key for env in rows if needle in env.value.lower()}
+
+
+def segment_scan(rows, path):
+    """逐个拆分值再比较，结果与 PathIndex 一致"""
+    target = split_segments(path)
+    return {env.key for env in rows if target & split_segments(env.value)}
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PathIndex 查找基准")
+    parser.add_argument("--count", type=int, default=5000, help="变量数量")
+    parser.add_argument("--segments", type=int, default=50, help="每个值中的路径段数量")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.count, args.segments)
+    start = time.perf_counter()
+    index = PathIndex(rows)
+    build = time.perf_counter() - start
+
+    # 带结尾斜杠、大小写不同的写法也应当命中
+    path = "c:\\python311\\SCRIPTS"
+    scanned, scan_time = timed(lambda: substring_scan(rows, path), args.repeat)
+    by_segment, segment_time = timed(lambda: segment_scan(rows, path), args.repeat)
+    found, lookup_time = timed(lambda: index.lookup(path), args.repeat * 100)
+    assert found == by_segment == scanned, "PathIndex results differ from scans"
+
+    print(f"variables: {args.count}, segments per value: {args.segments + 1}, "
+          f"distinct segments: {len(index)}, index build {build * 1000:.1f} ms")
+    print(f"  substring scan (before)  {scan_time * 1000:9.3f} ms")
+    print(f"  segment scan             {segment_time * 1000:9.3f} ms")
+    print(f"  PathIndex.lookup (after) {lookup_time * 1000:9.3f} ms  ({len(found)} matches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+环境变量读取性能基准
+
+默认使用 MemoryBackend 在任意平台上测量 get_all_env_list 的单次读取耗时；
+在 Windows 上可以加 --backend powershell 测量真实注册表读取。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import env_utils
+from env_utils import MemoryBackend, PowerShellBackend, get_all_env_list
+
+
+def make_env_list(count):
+    """生成指定数量的合成环境变量"""
+    env_list = []
+    for i in range(count):
+        scope = "Machine" if i % 2 else "User"
+        kind = "ExpandString" if i % 5 == 0 else "String"
+        env_list.append([f"VAR_{i:06d}", f"C:\\Tools\\bin{i};%SystemRoot%\\system32", kind, scope])
+    return env_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description="get_all_env_list 读取耗时基准")
+    parser.add_argument("--backend", choices=["memory", "powershell"], default="memory")
+    parser.add_argument("--count", type=int, default=200, help="合成变量数量（仅 memory）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每次后端调用的模拟延迟，秒（仅 memory）")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.backend == "memory":
+        backend = MemoryBackend(make_env_list(args.count), latency=args.latency)
+    else:
+        backend = PowerShellBackend()
+    env_utils.set_backend(backend)
+
+    timings = []
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        env_list = get_all_env_list(fresh=True)
+        timings.append(env_utils.get_last_read_time())
+    total = time.perf_counter() - start
+
+    timings.sort()
+    print(f"backend:       {args.backend}")
+    print(f"variables:     {len(env_list)}")
+    print(f"reads:         {args.repeat}")
+    print(f"backend calls: {backend.launch_count}")
+    print(f"mean per read: {total / args.repeat * 1000:.3f} ms")
+    print(f"min / median:  {timings[0] * 1000:.3f} / {timings[len(timings) // 2] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
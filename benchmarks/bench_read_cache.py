@@ -0,0 +1,78 @@
+"""
+读取缓存基准
+
+使用带延迟的 MemoryBackend 比较 get_all_env_list 在以下场景中的后端调用次数和耗时：
+    1. 多个线程同时读取（单飞合并，只调用一次后端）
+    2. 缓存时间内的重复读取
+    3. 写入后读取（缓存自动失效，读到新值）
+--ttl 0 时关闭缓存，作为对照。
+"""
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import env_utils
+from env_record import EnvVar
+from env_utils import MemoryBackend, get_all_env_list, get_cache_stats, set_env_to_system
+
+
+def make_env_list(count):
+    return [EnvVar(f"VAR_{i:05d}", f"C:\\Tool{i}\\bin", "String", "Machine" if i % 2 else "User")
+            for i in range(count)]
+
+
+def concurrent_reads(threads):
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        get_all_env_list()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="get_all_env_list 读取缓存基准")
+    parser.add_argument("--count", type=int, default=2000, help="变量数量")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次后端调用的模拟延迟（秒）")
+    parser.add_argument("--threads", type=int, default=8, help="同时读取的线程数")
+    parser.add_argument("--repeat", type=int, default=20, help="缓存时间内的重复读取次数")
+    parser.add_argument("--ttl", type=float, default=env_utils.CACHE_TTL, help="缓存时间（秒），0 表示不缓存")
+    args = parser.parse_args()
+
+    backend = MemoryBackend(make_env_list(args.count), latency=args.latency)
+    env_utils.set_backend(backend)
+    env_utils.set_cache_ttl(args.ttl)
+
+    elapsed = concurrent_reads(args.threads)
+    print(f"{args.threads} concurrent reads: {elapsed * 1000:8.1f} ms, backend calls {backend.launch_count}")
+
+    env_utils.invalidate_env_cache()
+    calls = backend.launch_count
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        get_all_env_list()
+    elapsed = time.perf_counter() - start
+    print(f"{args.repeat} sequential reads:  {elapsed * 1000:8.1f} ms, backend calls {backend.launch_count - calls}")
+
+    get_all_env_list()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        set_env_to_system([EnvVar("VAR_00000", "changed", "String", "User")])
+    value = next(env.value for env in get_all_env_list() if env.name == "VAR_00000")
+    print(f"read after write sees new value: {value == 'changed'}")
+    print(f"cache stats: {get_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+作用域并发读取基准
+
+默认使用按作用域设置延迟的 MemoryBackend，比较依次读取和并发读取用户/系统两个作用域的总耗时，
+并报告每个作用域的耗时；--unreadable Machine 模拟系统作用域读取失败（read_env_scopes 仍返回用户作用域的数据）。
+在 Windows 上可以加 --backend winreg 测量真实注册表读取。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import env_utils
+from env_record import EnvVar
+from env_utils import MemoryBackend, read_env_scopes
+
+
+def make_env_list(count):
+    return [EnvVar(f"VAR_{i:05d}", f"C:\\Tool{i}\\bin", "String", "Machine" if i % 2 else "User")
+            for i in range(count)]
+
+
+def measure(backend, parallel, repeat):
+    backend.parallel_reads = parallel
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = read_env_scopes(fresh=True)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    scopes = ", ".join(f"{scope} {elapsed * 1000:.1f} ms" for scope, elapsed in result.times.items())
+    label = "parallel" if parallel else "sequential"
+    print(f"{label:10}  median {timings[len(timings) // 2] * 1000:8.1f} ms  ({scopes})  {len(result.env_list)} variables")
+    if result.errors:
+        print(f"{'':10}  failed scopes: {result.errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用户/系统作用域并发读取基准")
+    parser.add_argument("--backend", choices=["memory", "winreg"], default="memory")
+    parser.add_argument("--count", type=int, default=2000, help="合成变量数量（仅 memory）")
+    parser.add_argument("--user-latency", type=float, default=0.15, help="读取用户作用域的模拟延迟，秒（仅 memory）")
+    parser.add_argument("--machine-latency", type=float, default=0.25, help="读取系统作用域的模拟延迟，秒（仅 memory）")
+    parser.add_argument("--unreadable", choices=["User", "Machine"], help="模拟读取失败的作用域（仅 memory）")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.backend == "memory":
+        backend = MemoryBackend(make_env_list(args.count),
+                                scope_latency={"User": args.user_latency, "Machine": args.machine_latency},
+                                unreadable_scopes=[args.unreadable] if args.unreadable else [])
+    else:
+        backend = env_utils.WinRegBackend()
+    env_utils.set_backend(backend)
+
+    measure(backend, False, args.repeat)
+    measure(backend, True, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
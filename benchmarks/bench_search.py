@@ -0,0 +1,91 @@
+"""
+搜索按键延迟基准
+
+模拟在搜索框中逐字输入，对比旧 filter_tree 每次按键重新小写所有字段的线性扫描，
+与 SearchIndex（预计算小写文本、在上一次结果中缩小范围）每次按键的耗时，
+并报告分块执行时单块阻塞事件循环的最长时间。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar
+from search_index import SearchIndex, SEARCH_CHUNK
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:06d}", f"C:\\Program Files\\Tool{i}\\bin;C:\\Windows\\System32",
+                   "String", "Machine" if i % 2 else "User") for i in range(count)]
+
+
+def linear_filter(rows, search_text):
+    """旧的 filter_tree 逻辑"""
+    search_text = search_text.lower()
+    if not search_text:
+        return list(rows)
+    result = []
+    for env in rows:
+        name, value, kind, scope = env
+        if (search_text in name.lower() or
+                search_text in value.lower() or
+                search_text in scope.lower()):
+            result.append(env)
+    return result
+
+
+def type_query(query, search):
+    """逐字输入 query，返回每次按键的耗时列表和最后的结果"""
+    latencies = []
+    result = None
+    for i in range(1, len(query) + 1):
+        start = time.perf_counter()
+        result = search(query[:i])
+        latencies.append(time.perf_counter() - start)
+    return latencies, result
+
+
+def max_chunk(index, query):
+    """分块执行时每一块的最长耗时"""
+    longest = 0.0
+    steps = index.search_steps(query, SEARCH_CHUNK)
+    while True:
+        start = time.perf_counter()
+        result = next(steps)
+        longest = max(longest, time.perf_counter() - start)
+        if result is not None:
+            return longest
+
+
+def report(label, latencies):
+    print(f"  {label:<24} first {latencies[0] * 1000:7.2f} ms, mean {sum(latencies) / len(latencies) * 1000:7.2f} ms, "
+          f"max {max(latencies) * 1000:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索按键延迟基准")
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--query", default="tool4321")
+    args = parser.parse_args()
+
+    rows = make_rows(args.count)
+    start = time.perf_counter()
+    index = SearchIndex(rows)
+    build = time.perf_counter() - start
+
+    print(f"rows: {args.count}, query typed: {args.query!r}, index build {build * 1000:.1f} ms")
+    linear, expected = type_query(args.query, lambda text: linear_filter(rows, text))
+    indexed, result = type_query(args.query, index.search)
+    assert result == expected, "SearchIndex results differ from linear filter"
+    report("linear (before)", linear)
+    report("SearchIndex (after)", indexed)
+
+    index.invalidate()
+    print(f"  longest blocking chunk   {max_chunk(index, 'windows') * 1000:7.2f} ms "
+          f"({SEARCH_CHUNK} rows per chunk, full scan)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+快照存储基准
+
+模拟一台机器上反复备份：每次只修改少量变量后创建快照，统计每个快照新写入的值数量、
+耗时和磁盘占用，并与每次写一份完整 YAML 备份比较；最后验证恢复结果与原数据完全一致。
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar
+from snapshot_store import SnapshotStore
+from yaml_utils import save_env_to_yaml
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:06d}", f"C:\\Program Files\\Tool{i}\\bin;%SystemRoot%\\system32",
+                   "ExpandString" if i % 3 else "String", "Machine" if i % 2 else "User") for i in range(count)]
+
+
+def disk_usage(path):
+    total = 0
+    for directory, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="快照存储去重基准")
+    parser.add_argument("--count", type=int, default=10000, help="变量数量")
+    parser.add_argument("--snapshots", type=int, default=20, help="快照次数")
+    parser.add_argument("--changes", type=int, default=5, help="每次快照之间修改的变量数")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    rows = make_rows(args.count)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SnapshotStore(os.path.join(directory, "snapshots"))
+        backups = os.path.join(directory, "backups")
+        os.makedirs(backups)
+
+        history = []
+        snapshot_time = yaml_time = 0.0
+        written_counts = []
+        for n in range(args.snapshots):
+            if n:
+                for index in rng.sample(range(args.count), args.changes):
+                    rows[index] = rows[index].replace(value=f"{rows[index].value};C:\\new{n}")
+
+            start = time.perf_counter()
+            info, written = store.create(rows, label=f"#{n}")
+            snapshot_time += time.perf_counter() - start
+            written_counts.append(written)
+            history.append((info.id, list(rows)))
+
+            start = time.perf_counter()
+            save_env_to_yaml(rows, os.path.join(backups, f"env_backup_{n}.yaml"))
+            yaml_time += time.perf_counter() - start
+
+        # 恢复任意快照都必须与当时的数据完全一致
+        for snapshot_id, expected in history:
+            restored = store.load(snapshot_id)
+            assert [tuple(env) for env in restored] == [tuple(env) for env in expected]
+
+        print(f"variables: {args.count}, snapshots: {args.snapshots}, changes between snapshots: {args.changes}")
+        print(f"  objects written: first {written_counts[0]}, later max {max(written_counts[1:], default=0)}")
+        print(f"  snapshot store:  {snapshot_time / args.snapshots * 1000:8.1f} ms/snapshot, "
+              f"disk {disk_usage(store.root) / 1024 / 1024:7.2f} MB")
+        print(f"  full YAML files: {yaml_time / args.snapshots * 1000:8.1f} ms/backup,   "
+              f"disk {disk_usage(backups) / 1024 / 1024:7.2f} MB")
+
+        start = time.perf_counter()
+        deleted = store.apply_retention(keep_last=5)
+        print(f"  retention keep_last=5: deleted {len(deleted)} snapshots in {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"disk {disk_usage(store.root) / 1024 / 1024:.2f} MB")
+        for snapshot_id, expected in history[-5:]:
+            assert [tuple(env) for env in store.load(snapshot_id)] == [tuple(env) for env in expected]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+启动时间基准
+
+1. 用 python -X importtime 导入 env_gui（GUI 启动路径）和 cli（命令行工具），解析输出，
+   报告总导入时间、耗时最多的模块，并检查 yaml / tqdm / platform / 图标等应延迟加载的模块没有被导入。
+2. 在子进程中创建主窗口（注册表后端换成带延迟的 MemoryBackend），测量从启动进程到窗口显示
+   （time-to-first-window）和到第一批数据显示（time-to-first-data）的时间；没有图形界面时跳过这一项。
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# 启动时不应导入的模块
+LAZY_MODULES = ("yaml", "tqdm", "platform", "app_icon")
+
+# 子进程：创建窗口，打印窗口显示和数据加载完成的时间戳
+WINDOW_SCRIPT = r"""
+import os, sys, tempfile, time
+sys.path.insert(0, sys.argv[1])
+import tkinter as tk
+from env_gui import EnvironmentVariableGUI
+from env_record import EnvVar
+from env_utils import MemoryBackend, set_backend
+from history_log import HistoryLog
+
+rows = [EnvVar(f"VAR_{i:05d}", f"C:\\Tool{i}\\bin", "String", "Machine" if i % 2 else "User")
+        for i in range(int(sys.argv[2]))]
+set_backend(MemoryBackend(rows, latency=float(sys.argv[3])))
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print("NO_DISPLAY", e)
+    sys.exit(0)
+app = EnvironmentVariableGUI(root)
+app.history_log = HistoryLog(os.path.join(tempfile.mkdtemp(), "history.jsonl"))
+
+def on_map(event):
+    if event.widget is root and not hasattr(on_map, "done"):
+        on_map.done = True
+        print("WINDOW", time.time(), flush=True)
+root.bind("<Map>", on_map, add="+")
+
+def poll():
+    if len(app.env_data):
+        root.update_idletasks()
+        print("DATA", time.time(), flush=True)
+        root.destroy()
+    else:
+        root.after(5, poll)
+root.after(5, poll)
+root.mainloop()
+"""
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，返回 [(模块, 自身微秒, 累计微秒, 嵌套层级)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), level))
+    return modules
+
+
+def profile_import(module, top):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    modules = parse_importtime(result.stderr)
+    names = {name for name, _, _, _ in modules}
+    total = sum(self_us for _, self_us, _, _ in modules)
+    own = next(cumulative for name, _, cumulative, _ in modules if name == module)
+
+    print(f"import {module}: {own / 1000:.1f} ms ({total / 1000:.1f} ms including interpreter startup modules)")
+    direct = sorted((entry for entry in modules if entry[3] <= 1), key=lambda entry: -entry[2])
+    for name, _, cumulative, _ in direct[:top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+    loaded = [name for name in LAZY_MODULES if name in names]
+    print(f"  lazy modules imported at startup: {', '.join(loaded) if loaded else 'none'}")
+    return own
+
+
+def time_to_window(count, latency):
+    start = time.time()
+    result = subprocess.run([sys.executable, "-c", WINDOW_SCRIPT, SRC_DIR, str(count), str(latency)],
+                            capture_output=True, text=True, timeout=120)
+    events = {}
+    for line in result.stdout.splitlines():
+        parts = line.split(" ", 1)
+        events[parts[0]] = parts[1] if len(parts) > 1 else ""
+    if "NO_DISPLAY" in events:
+        print(f"time-to-first-window: skipped (no display: {events['NO_DISPLAY']})")
+        return
+    if "WINDOW" not in events or "DATA" not in events:
+        print(f"time-to-first-window: failed\n{result.stderr}")
+        return
+    print(f"registry read latency {latency * 1000:.0f} ms, {count} variables")
+    print(f"  time-to-first-window: {(float(events['WINDOW']) - start) * 1000:8.1f} ms")
+    print(f"  time-to-first-data:   {(float(events['DATA']) - start) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动时间与导入耗时基准")
+    parser.add_argument("--top", type=int, default=10, help="列出耗时最多的直接导入模块数")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="env_gui 导入时间预算（毫秒）")
+    parser.add_argument("--count", type=int, default=2000, help="窗口测试中的变量数量")
+    parser.add_argument("--latency", type=float, default=0.5, help="模拟的注册表读取延迟（秒）")
+    args = parser.parse_args()
+
+    gui = profile_import("env_gui", args.top)
+    status = "within" if gui <= args.budget_ms * 1000 else "OVER"
+    print(f"  {status} budget of {args.budget_ms:.0f} ms\n")
+    profile_import("cli", args.top)
+    print()
+    time_to_window(args.count, args.latency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+EnvStore 微基准
+
+在 10k 和 100k 个合成变量上对比原来的线性扫描查找/更新与 EnvStore 的 (name, scope) 索引。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_store import EnvStore
+
+
+def make_env_list(count):
+    """生成指定数量的合成环境变量"""
+    return [[f"VAR_{i:06d}", f"value{i}", "String", "Machine" if i % 2 else "User"] for i in range(count)]
+
+
+def linear_upsert(env_list, new_env):
+    """原 save_changes 中的查找并更新方式"""
+    for i, env in enumerate(env_list):
+        if env[0] == new_env[0] and env[3] == new_env[3]:
+            env_list[i] = new_env
+            return
+    env_list.append(new_env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EnvStore 查找与更新基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        env_list = make_env_list(size)
+        targets = [env_list[(i * 7919) % size] for i in range(args.ops)]
+
+        start = time.perf_counter()
+        store = EnvStore(env_list)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for name, value, kind, scope in targets:
+            linear_upsert(env_list, [name, value + "x", kind, scope])
+        linear = (time.perf_counter() - start) / args.ops
+
+        start = time.perf_counter()
+        for name, value, kind, scope in targets:
+            store.get((name, scope))
+            store.upsert([name, value + "x", kind, scope])
+        indexed = (time.perf_counter() - start) / args.ops
+
+        print(f"{size:>7} vars: build {build * 1000:7.2f} ms, linear scan {linear * 1e6:9.1f} us/op, "
+              f"EnvStore {indexed * 1e6:6.2f} us/op")
+
+
+if __name__ == "__main__":
+    main()
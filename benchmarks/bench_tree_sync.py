@@ -0,0 +1,264 @@
+"""
+Treeview 差量同步基准
+
+统计旧的"全部删除后重建"方式和 TreeReconciler 在初次加载、单个变量编辑、
+搜索条件收窄和放宽时对 Tk 的调用次数和耗时。
+
+默认使用一个只计数的假 Treeview；在有显示器（或 Xvfb）的环境下可以加 --tk 使用真实的 ttk.Treeview。
+测量之前先运行 check_reconciler：每一步显示的内容必须正确，并且只做预期的 Tk 调用
+（例如编辑一行只调用一次 item，没有变化时不调用任何修改方法），否则以 AssertionError 退出。
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar
+from tree_sync import TreeReconciler
+
+# 不修改 Treeview 的调用，不计入调用次数
+READ_ONLY_CALLS = ("exists", "get_children")
+
+
+class FakeTree:
+    """模拟 ttk.Treeview 的父子关系和 detach 语义，记录每个方法的调用次数"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.nodes = {}  # {iid: {"parent": ..., "text": ..., "values": ..., "tags": ...}}
+        self.kids = {"": []}
+        self.next_id = 0
+
+    def insert(self, parent, index, text="", values=(), tags=(), open=False):
+        self.calls["insert"] += 1
+        self.next_id += 1
+        iid = f"I{self.next_id:06X}"
+        self.nodes[iid] = {"parent": parent, "text": text, "values": values, "tags": tags}
+        self.kids[iid] = []
+        siblings = self.kids[parent]
+        siblings.insert(len(siblings) if index == "end" else index, iid)
+        return iid
+
+    def item(self, iid, **changes):
+        self.calls["item"] += 1
+        self.nodes[iid].update(changes)
+
+    def _unlink(self, iid):
+        parent = self.nodes[iid]["parent"]
+        if parent is not None and iid in self.kids[parent]:
+            self.kids[parent].remove(iid)
+
+    def move(self, iid, parent, index):
+        self.calls["move"] += 1
+        self._unlink(iid)
+        self.nodes[iid]["parent"] = parent
+        self.kids[parent].insert(index, iid)
+
+    def detach(self, *iids):
+        self.calls["detach"] += 1
+        for iid in iids:
+            self._unlink(iid)
+            self.nodes[iid]["parent"] = None
+
+    def delete(self, *iids):
+        self.calls["delete"] += 1
+        for iid in iids:
+            if iid not in self.nodes:
+                continue
+            self._unlink(iid)
+            for child in list(self.kids[iid]):
+                self.nodes[child]["parent"] = iid
+                self.delete(child)
+            del self.nodes[iid]
+            del self.kids[iid]
+
+    def set_children(self, parent, *iids):
+        """与 Tk 相同：原有但不在新列表中的子项被 detach"""
+        self.calls["set_children"] += 1
+        for child in self.kids[parent]:
+            self.nodes[child]["parent"] = None
+        for iid in iids:
+            self._unlink(iid)
+            self.nodes[iid]["parent"] = parent
+        self.kids[parent] = list(iids)
+
+    def get_children(self, iid=""):
+        self.calls["get_children"] += 1
+        return tuple(self.kids[iid])
+
+    def exists(self, iid):
+        self.calls["exists"] += 1
+        return iid in self.nodes
+
+    def shown(self):
+        """按显示顺序返回 [(分组文本, [变量名...])]"""
+        return [(self.nodes[g]["text"], [self.nodes[c]["text"] for c in self.kids[g]]) for g in self.kids[""]]
+
+    def row(self, iid):
+        """一行的 (values, tags)"""
+        return tuple(self.nodes[iid]["values"]), tuple(self.nodes[iid]["tags"])
+
+
+class CountingTree:
+    """包装真实的 ttk.Treeview 并统计调用次数"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        method = getattr(self.tree, name)
+
+        def wrapper(*args, **kwargs):
+            self.calls[name] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    def shown(self):
+        return [(self.tree.item(g, "text"), [self.tree.item(c, "text") for c in self.tree.get_children(g)])
+                for g in self.tree.get_children()]
+
+    def row(self, iid):
+        return tuple(self.tree.item(iid, "values")), tuple(self.tree.item(iid, "tags"))
+
+
+def rebuild(tree, rows, status):
+    """旧的 populate_tree：清空后按分组重新插入"""
+    for item in tree.get_children():
+        tree.delete(item)
+    user_vars = [env for env in rows if env.scope.lower() == "user"]
+    machine_vars = [env for env in rows if env.scope.lower() != "user"]
+    for text, scope, group_rows in (("用户变量", "User", user_vars), ("系统变量", "Machine", machine_vars)):
+        if group_rows:
+            root = tree.insert("", "end", text=text, values=("", "", scope))
+            for env in group_rows:
+                tree.insert(root, "end", text=env.name, values=(env.value, env.kind, env.scope),
+                            tags=(status.get(env.key, "same"),))
+    for item in tree.get_children():
+        tree.item(item, open=True)
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:06d}", f"C:\\Tools\\bin{i}", "String", "Machine" if i % 2 else "User")
+            for i in range(count)]
+
+
+def expected_view(rows):
+    """rows 按分组显示时应有的 [(分组文本, [变量名...])]，没有内容的分组不显示"""
+    groups = [("用户变量", [env.name for env in rows if env.scope == "User"]),
+              ("系统变量", [env.name for env in rows if env.scope == "Machine"])]
+    return [(text, names) for text, names in groups if names]
+
+
+def mutating_calls(tree):
+    return {name: count for name, count in tree.calls.items() if name not in READ_ONLY_CALLS and count}
+
+
+def check_reconciler(tree, rows):
+    """TreeReconciler 的每一步都只做必要的 Tk 调用，并且显示的内容与数据一致"""
+    status = {env.key: "same" for env in rows}
+    keep = set(status)
+    reconciler = TreeReconciler(tree)
+
+    def step(data, data_status, keep_keys=keep):
+        tree.calls.clear()
+        reconciler.sync(data, data_status, keep_keys=keep_keys)
+        calls = mutating_calls(tree)
+        assert tree.shown() == expected_view(data), "显示的行与数据不一致"
+        return calls
+
+    calls = step(rows, status)
+    assert calls == {"insert": len(rows) + 2}, f"initial load: {calls}"
+
+    edited = rows[len(rows) // 2].replace(value="C:\\Edited")
+    rows = [edited if env.key == edited.key else env for env in rows]
+    status = {**status, edited.key: "modified"}
+    calls = step(rows, status)
+    assert calls == {"item": 1}, f"single edit: {calls}"
+    assert tree.row(reconciler.items[edited.key]) == ((edited.value, edited.kind, edited.scope), ("modified",))
+
+    calls = step(rows, status)
+    assert calls == {}, f"no-op resync: {calls}"
+
+    # 搜索过滤只按分组批量 detach 和挂回，不删除也不重新插入
+    narrow = [env for env in rows if "VAR_0001" in env.name]
+    for data in (narrow, rows):
+        calls = step(data, status)
+        assert set(calls) <= {"detach", "set_children"} and sum(calls.values()) <= 2, f"filter: {calls}"
+
+    # 新增一行（排在分组末尾）只插入一次；真正删除的行（不在 keep_keys 中）只删除一次
+    added = EnvVar("ZZZ_NEW", "x", "String", "User")
+    calls = step(rows + [added], {**status, added.key: "added"}, keep | {added.key})
+    assert calls == {"insert": 1}, f"row added: {calls}"
+    calls = step(rows[1:], status, keep - {rows[0].key})
+    assert calls == {"delete": 1}, f"row removed: {calls}"
+    assert rows[0].key not in reconciler.items and added.key not in reconciler.items
+
+    # 单行刷新（refresh_tree_row）只写回变化的字段
+    tree.calls.clear()
+    assert reconciler.update_row(edited.replace(value="C:\\Again"), "modified")
+    assert mutating_calls(tree) == {"item": 1}
+    assert not reconciler.update_row(rows[0], "same"), "已删除的行不应能更新"
+
+
+def run(label, tree, action):
+    tree.calls.clear()
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    total = sum(count for name, count in tree.calls.items() if name not in READ_ONLY_CALLS)
+    detail = ", ".join(f"{name}={count}" for name, count in sorted(tree.calls.items()))
+    print(f"  {label:<22} {elapsed * 1000:9.2f} ms  {total:7d} mutating calls  ({detail})")
+
+
+def make_tree(use_tk):
+    if not use_tk:
+        return FakeTree()
+    import tkinter as tk
+    from tkinter import ttk
+    root = tk.Tk()
+    root.withdraw()
+    return CountingTree(ttk.Treeview(root, columns=("value", "kind", "scope"), show="tree headings"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treeview 差量同步的 Tk 调用次数基准")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--tk", action="store_true", help="使用真实的 ttk.Treeview（需要显示器或 Xvfb）")
+    args = parser.parse_args()
+
+    rows = make_rows(args.count)
+    status = {env.key: "same" for env in rows}
+    edited = rows[args.count // 2].replace(value="C:\\Edited")
+    edited_rows = [edited if env.key == edited.key else env for env in rows]
+    edited_status = {**status, edited.key: "modified"}
+    narrow = [env for env in edited_rows if "VAR_0001" in env.name]
+    keep = {env.key for env in rows}
+
+    check_reconciler(make_tree(args.tk), make_rows(min(args.count, 1000)))
+    print("reconciler checks passed")
+
+    print(f"variables: {args.count}")
+    for label, make_sync in (("rebuild (before)", None), ("TreeReconciler (after)", TreeReconciler)):
+        tree = make_tree(args.tk)
+        print(label)
+        if make_sync is None:
+            sync = lambda data, st: rebuild(tree, data, st)
+        else:
+            reconciler = make_sync(tree)
+            sync = lambda data, st: reconciler.sync(data, st, keep_keys=keep)
+        run("initial load", tree, lambda: sync(rows, status))
+        run("single edit", tree, lambda: sync(edited_rows, edited_status))
+        run("filter narrowing", tree, lambda: sync(narrow, edited_status))
+        run("filter widening", tree, lambda: sync(edited_rows, edited_status))
+        run("no-op resync", tree, lambda: sync(edited_rows, edited_status))
+
+        # 两种方式最终显示的内容必须一致
+        assert tree.shown() == expected_view(edited_rows), "tree contents differ from expected"
+
+
+if __name__ == "__main__":
+    main()
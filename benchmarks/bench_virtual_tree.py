@@ -0,0 +1,117 @@
+"""
+虚拟列表模式基准
+
+对比完整模式（每个变量一个 Treeview 项）和 VirtualTree（只渲染可见窗口）在不同行数下的
+渲染耗时、控件中的项数和滚动一次的耗时，验证虚拟模式的开销不随行数增长。
+
+默认使用 bench_tree_sync 中只计数的假 Treeview；有显示器（或 Xvfb）时可以加 --tk。
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from bench_tree_sync import FakeTree, make_rows
+from tree_sync import TreeReconciler
+from virtual_tree import VirtualTree
+
+
+class FakeViewTree(FakeTree):
+    """补充 VirtualTree 需要的几个 Treeview 方法，可见区域固定为 height 像素"""
+
+    def __init__(self, height=600):
+        super().__init__()
+        self.height = height
+
+    def bind(self, sequence, func, add=None):
+        pass
+
+    def configure(self, **options):
+        pass
+
+    def winfo_height(self):
+        return self.height
+
+    def yview_moveto(self, fraction):
+        pass
+
+
+class FakeScrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+class WheelEvent:
+    num = 5
+    delta = -120
+
+
+def make_view(use_tk):
+    if not use_tk:
+        return FakeViewTree(), FakeScrollbar()
+    import tkinter as tk
+    from tkinter import ttk
+    root = tk.Tk()
+    root.geometry("800x600")
+    tree = ttk.Treeview(root, columns=("value", "kind", "scope"), show="tree headings")
+    scrollbar = ttk.Scrollbar(root, orient=tk.VERTICAL, command=tree.yview)
+    tree.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    return tree, scrollbar
+
+
+def item_count(tree):
+    if isinstance(tree, FakeTree):
+        return len(tree.nodes)
+    return sum(len(tree.get_children(group)) + 1 for group in tree.get_children())
+
+
+def measure(count, virtual, use_tk):
+    rows = make_rows(count)
+    status = {env.key: "same" for env in rows}
+    tree, scrollbar = make_view(use_tk)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    reconciler = TreeReconciler(tree)
+    if virtual:
+        view = VirtualTree(tree, reconciler, scrollbar, row_height=20)
+        view.set_rows(rows, status)
+    else:
+        reconciler.sync(rows, status)
+    render = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    scroll = None
+    if virtual:
+        start = time.perf_counter()
+        for _ in range(100):
+            view.on_mousewheel(WheelEvent())
+        scroll = (time.perf_counter() - start) / 100
+    return render, item_count(tree), memory, scroll
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VirtualTree 渲染基准")
+    parser.add_argument("--counts", default="10000,50000,200000")
+    parser.add_argument("--tk", action="store_true", help="使用真实的 ttk.Treeview（需要显示器或 Xvfb）")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'mode':<8} {'render':>10} {'items':>8} {'view memory':>12} {'scroll step':>12}")
+    for count in [int(c) for c in args.counts.split(",")]:
+        for virtual in (False, True):
+            render, items, memory, scroll = measure(count, virtual, args.tk)
+            scroll_text = f"{scroll * 1000:9.3f} ms" if scroll is not None else f"{'-':>12}"
+            print(f"{count:>8} {'virtual' if virtual else 'full':<8} {render * 1000:7.1f} ms {items:>8} "
+                  f"{memory / 1024:9.0f} KB {scroll_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+变化监视基准
+
+用 MemoryBackend 模拟注册表：外部修改少量变量后触发事件源，测量从修改到 on_changes 回调
+收到增量变化的延迟，并与原来写入后固定等待 1000 ms 再完整重新读取的方式比较；
+同时验证报告的变化与实际修改一致。事件源可选 fake（模拟注册表通知）或 polling。
+测量之前先用 FakeSource 运行 check_watcher，检查变化报告、通知合并、部分或全部作用域读取失败
+以及 stop() 的行为，不符合时以 AssertionError 退出。
+"""
+import argparse
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from env_record import EnvVar, SCOPE_MACHINE, SCOPE_USER
+from env_utils import EnvReadError, MemoryBackend
+from env_watcher import EnvWatcher, FakeSource, PollingSource
+
+
+def make_rows(count):
+    return [EnvVar(f"VAR_{i:05d}", f"C:\\Tool{i}\\bin", "String", "Machine" if i % 2 else "User")
+            for i in range(count)]
+
+
+class RecordingSource(FakeSource):
+    """记录 release() 是否被调用的 FakeSource"""
+
+    def __init__(self):
+        super().__init__()
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+def check_watcher(rows):
+    """用 FakeSource 驱动 EnvWatcher，检查报告的变化和读取失败时的处理"""
+    backend = MemoryBackend(rows)
+    source = RecordingSource()
+    received = queue.Queue()
+    watcher = EnvWatcher(source, backend.read_all, lambda changes, env_list: received.put((changes, env_list)),
+                         debounce=0.02)
+    watcher.reset(backend.read_all())
+    watcher.start()
+
+    def notify(*scopes):
+        source.notify(*scopes)
+        try:
+            return received.get(timeout=5)
+        except queue.Empty:
+            raise AssertionError("no change reported") from None
+
+    def reported(changes):
+        return {key: env and env.value for key, env in changes}
+
+    user = [env for env in rows if env.scope == SCOPE_USER]
+    machine = [env for env in rows if env.scope == SCOPE_MACHINE]
+
+    # 修改、新增和删除都按 (name, scope) 报告，删除的变量为 None
+    edited = user[0].replace(value="C:\\Edited")
+    added = EnvVar("NEW_VAR", "x", "String", SCOPE_MACHINE)
+    backend.apply([edited, added], [machine[0]])
+    changes, env_list = notify(SCOPE_USER, SCOPE_MACHINE)
+    assert reported(changes) == {edited.key: edited.value, added.key: "x", machine[0].key: None}, changes
+    assert len(env_list) == len(rows)
+
+    # 连续的通知合并为一次读取
+    reads = backend.launch_count
+    backend.apply([user[1].replace(value="C:\\Burst")], [])
+    for _ in range(5):
+        source.notify(SCOPE_USER)
+    changes, _ = notify(SCOPE_USER)
+    assert reported(changes) == {user[1].key: "C:\\Burst"}, changes
+    assert received.empty() and backend.launch_count == reads + 2, "notifications were not coalesced"
+
+    # 部分作用域读取失败：失败作用域的变量保留上一次的状态，不报告为删除
+    backend.unreadable_scopes = {SCOPE_MACHINE}
+    backend.apply([user[2].replace(value="C:\\Partial")], [machine[1]])
+    changes, env_list = notify(SCOPE_USER, SCOPE_MACHINE)
+    assert reported(changes) == {user[2].key: "C:\\Partial"}, changes
+    assert machine[1].key in {env.key for env in env_list}, "unreadable scope dropped from the merged state"
+
+    # 恢复读取后，之前没能确认的删除才会报告
+    backend.unreadable_scopes = set()
+    changes, _ = notify(SCOPE_MACHINE)
+    assert reported(changes) == {machine[1].key: None}, changes
+
+    # stop() 等线程退出后释放事件源
+    watcher.stop()
+    assert not watcher.thread.is_alive() and source.released
+
+    # 全部作用域读取失败：抛出 EnvReadError，基准保持不变，不回调
+    known = dict(watcher.known)
+    backend.unreadable_scopes = {SCOPE_USER, SCOPE_MACHINE}
+    backend.apply([user[3].replace(value="C:\\Lost")], [])
+    try:
+        watcher.refresh()
+    except EnvReadError:
+        pass
+    else:
+        raise AssertionError("refresh() should fail when no scope can be read")
+    assert watcher.known == known and received.empty()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="变化监视延迟基准")
+    parser.add_argument("--count", type=int, default=2000, help="变量数量")
+    parser.add_argument("--rounds", type=int, default=20, help="外部修改次数")
+    parser.add_argument("--changes", type=int, default=3, help="每次修改的变量数")
+    parser.add_argument("--source", choices=("fake", "polling"), default="fake")
+    parser.add_argument("--interval", type=float, default=0.1, help="polling 的轮询间隔（秒）")
+    parser.add_argument("--read-latency", type=float, default=0.05, help="每次读取模拟的延迟（秒）")
+    args = parser.parse_args()
+
+    check_watcher(make_rows(100))
+    print("watcher checks passed")
+
+    rng = random.Random(0)
+    rows = make_rows(args.count)
+    backend = MemoryBackend(rows, latency=args.read_latency)
+    source = FakeSource() if args.source == "fake" else PollingSource(backend.read_all, args.interval)
+
+    received = []
+    arrived = threading.Event()
+
+    def on_changes(changes, env_list):
+        received.append((time.perf_counter(), changes))
+        arrived.set()
+
+    watcher = EnvWatcher(source, backend.read_all, on_changes, debounce=0.02)
+    watcher.reset(backend.read_all())
+    watcher.start()
+    if args.source == "polling":
+        time.sleep(args.interval * 3)  # 等第一次轮询记录指纹
+
+    latencies = []
+    for n in range(args.rounds):
+        picked = rng.sample(rows, args.changes)
+        updated = [env.replace(value=f"{env.value};C:\\r{n}") for env in picked]
+        arrived.clear()
+        start = time.perf_counter()
+        backend.apply(updated, [])
+        if args.source == "fake":
+            source.notify(*{env.scope for env in updated})
+        assert arrived.wait(10), "no change reported"
+        when, changes = received[-1]
+        assert {key: env.value for key, env in changes} == {env.key: env.value for env in updated}
+        latencies.append(when - start)
+    watcher.stop()
+
+    latencies.sort()
+    print(f"variables: {args.count}, source: {args.source}, read latency {args.read_latency * 1000:.0f} ms")
+    print(f"  watcher change -> update:   median {latencies[len(latencies) // 2] * 1000:7.1f} ms, "
+          f"max {latencies[-1] * 1000:7.1f} ms")
+    print(f"  fixed after(1000) reload:          {1000 + args.read_latency * 1000:7.1f} ms + full diff and redraw")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+常驻工作进程基准
+
+使用 Python 替身工作进程 (src/fake_worker.py) 在任意平台上测量：
+- 首次请求（包含进程启动）和后续请求的延迟
+- 流水线请求的吞吐量
+- 超时和崩溃后的自动恢复
+
+测量之前先运行 check_recovery：懒启动、流水线、超时结束进程、崩溃重启与只读请求重试、
+无法解析的帧、重启次数上限，任何一项不符合预期都以 AssertionError 退出。
+"""
+import argparse
+import os
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from env_record import EnvVar
+from env_utils import WorkerBackend
+from ps_worker import HEADER, WorkerClient, WorkerCrashed, WorkerTimeout
+
+FAKE_WORKER = [sys.executable, os.path.join(SRC_DIR, "fake_worker.py")]
+
+
+def expect(error_type, fn, *args, **kwargs):
+    try:
+        fn(*args, **kwargs)
+    except error_type as e:
+        return e
+    raise AssertionError(f"{getattr(fn, '__name__', fn)} 没有抛出 {error_type.__name__}")
+
+
+def check_recovery():
+    """用替身工作进程检查协议和崩溃恢复"""
+    client = WorkerClient(FAKE_WORKER, timeout=10, max_restarts=2)
+    assert client.start_count == 0, "工作进程应在第一次请求时才启动"
+    assert client.request("ping") == "pong"
+    assert client.start_count == 1
+
+    # 流水线：先发送的慢请求不会挡住响应的分发，每个响应交给对应的请求
+    slow = client.submit("sleep", {"seconds": 0.2})
+    fast = client.submit("ping")
+    assert client.wait(fast) == "pong" and client.wait(slow) == "slept"
+
+    # 超时后结束卡住的进程，下一个请求启动新进程
+    process = client.process
+    expect(WorkerTimeout, client.request, "sleep", {"seconds": 5}, timeout=0.1)
+    assert process.poll() is not None, "超时的工作进程没有被结束"
+    assert client.ping() and client.start_count == 2
+
+    # 无法解析的帧只返回错误，工作进程不会退出
+    body = b"{not json"
+    with client._lock:
+        client.process.stdin.write(HEADER.pack(len(body)) + body)
+        client.process.stdin.flush()
+    assert client.ping() and client.start_count == 2, "无法解析的帧导致工作进程退出"
+
+    # 崩溃：非只读请求直接失败；排在崩溃之后的只读请求重启进程并自动重试
+    backend = WorkerBackend(client)
+    backend.apply([EnvVar("A", "1", "String", "User")], [])
+    crash = client.submit("crash")
+    rows = backend.read_scopes()
+    expect(WorkerCrashed, client.wait, crash)
+    assert rows.ok and rows.env_list == [], rows  # 新进程的数据为空，但读取成功
+    assert client.start_count == 3
+
+    # 两次成功请求之间最多自动重启 max_restarts 次，成功的请求让计数清零
+    for _ in range(2):
+        expect(WorkerCrashed, client.request, "crash")
+        assert client.ping()
+    assert client.restarts == 0
+    expect(WorkerCrashed, client.request, "crash")
+    expect(WorkerCrashed, client.request, "crash")
+    expect(WorkerCrashed, client.request, "crash")
+    error = expect(WorkerCrashed, client.request, "ping")
+    assert "不再自动重启" in str(error), error
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻工作进程协议基准")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    check_recovery()
+    print("recovery checks passed")
+
+    client = WorkerClient(FAKE_WORKER, timeout=10)
+
+    start = time.perf_counter()
+    client.request("ping")
+    print(f"first request (cold start): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        client.request("ping")
+    sequential = time.perf_counter() - start
+    print(f"sequential round-trip:      {sequential / args.requests * 1000:.3f} ms/request")
+
+    start = time.perf_counter()
+    pending = [client.submit("ping") for _ in range(args.requests)]
+    for request in pending:
+        client.wait(request)
+    pipelined = time.perf_counter() - start
+    print(f"pipelined:                  {pipelined / args.requests * 1000:.3f} ms/request")
+
+    items = [{"op": "set", "name": f"VAR_{i}", "value": "x", "kind": "String", "scope": "User"} for i in range(200)]
+    start = time.perf_counter()
+    statuses = client.request("apply", {"items": items})
+    print(f"apply 200 items:            {(time.perf_counter() - start) * 1000:.1f} ms ({len(statuses)} statuses)")
+
+    try:
+        client.request("sleep", {"seconds": 1}, timeout=0.1)
+    except WorkerTimeout as e:
+        print(f"timeout:                    {e}")
+    # 超时的进程已被结束，下一个请求重新启动
+    start = time.perf_counter()
+    alive = client.ping()
+    print(f"recovered after timeout:    {(time.perf_counter() - start) * 1000:.1f} ms, ping {alive}")
+
+    try:
+        client.request("crash")
+    except WorkerCrashed as e:
+        print(f"crash:                      {e}")
+    start = time.perf_counter()
+    rows = client.request("read_all")
+    print(f"recovered after crash:      {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{len(rows)} rows, {client.start_count} process starts")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
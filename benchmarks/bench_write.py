@@ -0,0 +1,59 @@
+"""
+批量写入性能基准
+
+用带模拟延迟的 MemoryBackend 对比逐个写入（旧实现，每个变量一个进程）
+与 set_env_to_system 批量写入的进程启动次数和耗时。
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import env_utils
+from env_utils import MemoryBackend, set_env_to_system
+
+
+def make_env_list(count):
+    """生成指定数量的合成环境变量"""
+    return [
+        [f"VAR_{i:06d}", f"C:\\Tools\\bin{i}", "String", "Machine" if i % 2 else "User"]
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="set_env_to_system 批量写入基准")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005, help="每次进程启动的模拟开销，秒")
+    args = parser.parse_args()
+
+    env_list = make_env_list(args.count)
+
+    # 旧实现：每个变量单独启动一次
+    backend = MemoryBackend(latency=args.latency)
+    start = time.perf_counter()
+    for env in env_list:
+        backend.set_values([env])
+    per_item_time = time.perf_counter() - start
+    per_item_launches = backend.launch_count
+
+    # 新实现：整个变更集一次调用
+    backend = MemoryBackend(latency=args.latency, read_only_scopes=["Machine"])
+    env_utils.set_backend(backend)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = set_env_to_system(env_list)
+    batch_time = time.perf_counter() - start
+
+    print(f"variables:            {args.count}")
+    print(f"per-item launches:    {per_item_launches}  ({per_item_time * 1000:.1f} ms)")
+    print(f"batched launches:     {backend.launch_count}  ({batch_time * 1000:.1f} ms)")
+    print(f"batched result:       {len(result.succeeded)} succeeded, {len(result.failed)} failed (Machine read-only)")
+
+
+if __name__ == "__main__":
+    main()
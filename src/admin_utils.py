@@ -5,6 +5,7 @@ import ctypes
 import sys
 import os
 import subprocess
+from functools import lru_cache
 import tkinter as tk
 from tkinter import messagebox
 
@@ -42,8 +43,9 @@ def run_as_admin(script_path=None):
         print(f"获取管理员权限失败: {e}")
         return False
 
+@lru_cache(maxsize=None)
 def get_current_user():
-    """获取当前用户信息"""
+    """获取当前用户信息（进程运行期间不会变化，whoami 只启动一次）"""
     try:
         result = subprocess.run(
             ["whoami"], 
@@ -55,8 +57,24 @@ def get_current_user():
     except:
         return "未知用户"
 
-def get_system_info():
-    """获取系统信息"""
+@lru_cache(maxsize=None)
+def get_platform_info():
+    """操作系统信息，第一次打开状态对话框时才导入 platform 并查询"""
+    try:
+        import platform
+        return {
+            'os_name': platform.system(),
+            'os_version': platform.version(),
+            'architecture': platform.architecture()[0],
+        }
+    except:
+        return {'os_name': "Windows", 'os_version': "未知版本", 'architecture': "未知架构"}
+
+def get_system_info(refresh=False):
+    """获取系统信息，refresh 为 True 时重新查询用户和操作系统信息"""
+    if refresh:
+        get_current_user.cache_clear()
+        get_platform_info.cache_clear()
     info = {}
     
     # 获取用户信息
@@ -70,15 +88,7 @@ def get_system_info():
     info['python_executable'] = sys.executable
     
     # 获取操作系统信息
-    try:
-        import platform
-        info['os_name'] = platform.system()
-        info['os_version'] = platform.version()
-        info['architecture'] = platform.architecture()[0]
-    except:
-        info['os_name'] = "Windows"
-        info['os_version'] = "未知版本"
-        info['architecture'] = "未知架构"
+    info.update(get_platform_info())
     
     return info
 
@@ -89,7 +99,7 @@ class AdminDialog:
         self.parent = parent
         self.result = False
         
-    def show_admin_dialog(self):
+    def show_admin_dialog(self, refresh=False):
         """显示管理员权限信息对话框"""
         dialog = tk.Toplevel(self.parent)
         dialog.title("管理员权限状态")
@@ -104,7 +114,7 @@ class AdminDialog:
         dialog.geometry(f"+{x}+{y}")
         
         # 获取系统信息
-        sys_info = get_system_info()
+        sys_info = get_system_info(refresh)
         
         # 标题
         title_frame = tk.Frame(dialog, bg='#f0f0f0')
@@ -218,7 +228,7 @@ Python路径: {sys_info['python_executable']}
         # 刷新按钮
         def refresh_info():
             dialog.destroy()
-            self.show_admin_dialog()
+            self.show_admin_dialog(refresh=True)
         
         tk.Button(
             button_frame, 
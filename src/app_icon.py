@@ -0,0 +1,6 @@
+"""
+窗口图标（base64 编码的 PNG）
+
+单独放在一个模块中，窗口显示之后才导入。
+"""
+ICON_DATA = """iVBORw0KGgoAAAANSUhEUgAAAGQAAABkCAYAAABw4pVUAAAOj0lEQVR4Xu1de1BU5xU/C+wC8pDXgggCiy+aYt/TSDKJjWPUmZgmjbVUkIxN/2jzR6cdUYHGycSZTmNj40xTjXWmNa2EWLDmIanFqKHRim20jcHEF+qyLI8EUIKIvJbdnnN3L+7jPnfv6n7r3hkG2P3ud797fvc8v3PO1UHkCCkK6EJqNZHFQASQEHsIIoBEAAkxCoTYciIccq8C4nA4VIJvR1JFeZBLp9M56AOay/1vIZrS9+qvKY8Of135kf6NUEkk9RdxEYUoa8Aful601yz0nTvl+TXxvwkZ78PGfWAEB/R5Yub6j64hdm/ctYaHh/XuZyKhPdDHddsTEhImcAx/ffp7HH8m6bNgARNUQPCmoiwWS/6xY8cWnTp16lv9ff1fnpycTNGBLgm/m0YEIUI4wKHHz+iRdq5HBzE+EOAg/jM8xwmI14FDuDHcXPg3/fYZ43DE0ACh87nP8ESa3zXXJP4/ho/QaHJS8uCCBQsuLlm2pP6++fcdwZGjOE7oYRGdWskXQQOEiHvhwoX8urq6Z06cPFE+ODiYa5uw6el+lSws1MZER0c7kGMmi+8r7llbsXbDwgcXvoVrtGkNStCIg4BEb926tfzAuwe2IBgzvOU5yQfNH687gGJsbKxt6ZKlTc/gMWfOnGvMAGJtscY/94fnfnOm9cyzdrvdVwTdAeIF5xI6SE9P66upqnlk2bJlFxAQ0imaHUHjkJaWlvgtL23589WrV7+Pq51SmDExMYCsD/pY1KlBu7pG9EEWHrk5AiOjI2B33Obn6Kjo4ZrqmiWlpaWnmAGkubk5btu2bX81W8zf5fQsHnGGOMgvzAej0QgokzWiWnCnGR8ZB/NVM/T297qDMl6zvuZ7ZRVlh9gExI6AII/kZOeAqdAECUkJkoaOFInddQ+hPGV6BQkX1H3Qae0Ec7sZbt26xV2FrLCN6zeuXLNmzd+ZAeTThk8N1bXVDe4ckl+QDwUFBRAfFx8k8gVn2s8/64MrV9rgxtANHpBJBKQMAdnPGiCNCMijvMjKN7kAiWULkL7P+6Dt8m1AyECsrqx+pvzp8teZAqRqT9WR9o72h/jnVhwQGeGD+nTg+gBc/+I62CYFfUJp1kA5l5icCBmpGRBriFXIRreFY9gAgiLrn8ghJfKASNOop7sHLB0WCndQHMtzsACWPj4OjiEjojC/EGbmzAS9wSNqIguQCCA/Qw7ZxRqHHEcO+XaggFw8fxGsnVYwZhohKysLyHRWc/T09EBvby+kpaUBOnOQlJTkssSVuaZCgKAOWV9RUfF7sTCOmvW5jw2aJ0BKHUWWJoCc/eQsdHd1w4oVK2Dp8qUwPXW6qvttfKcR3mt6D/R6PcybNw+Sk5NVnR82gKDI+jeKrK8HyiGtn7RygJT+oBSefOpJSE1PVUXQ+jfq4e233ubE1r0OyEmzpf0bvLfgr5V1NwBxV02COmR99cbyivLfMSWykENOI4csCEMOcVSvr/4lAvJbpgBBHfIfVOpfC1NA1iEgpNTZCC66lPoZBORLAQGCsqP1bHB0iNItAAGRRRzCJCCfICBzPQHJg/jYhNtKWUFAitchDz/0MJSUlEBiUqIqpX782HE4efIk4F6Gl1JXcHG8khAgVRuqfoqhk93MiCyK9r788sutvoBgLEtl6ORS2yWwdlg5szU+Pl51pJgcypGREcjKzoLZhbMhMUEdoOEJCPpg+bP9i2UNDw2DucMM165dA/ukMmfOm4USExPBZDJxzmFUlGc2ixy7iQCyFjnkjXuSQyhcMj4+DjabzTd0IkdN1/fkgxgMBtXcRadLAFLHjFLXTmQpVb0KkfFjmAggzyKH/PEeAESZovWDrn6fImJl/QTNXlLqbJi9Sjjk7j/7iJFvgqQPcPc4hwg9yFpDp26+sADE5Rhq4qn7K2s8hF8AkjBsAMFYFgYXzRhcdB6KgotuIkTdc+wvbPLnhQ8gr1cfw2yN+1UBgihg7iwUFRXBtCRM/w3Sjo1t3Abnz52HS5cucU6j1BE2gGBwsRk99QfUAJKdm82FR3JzcyEqWsyBC0D+uBZDvs3QjSFoPtrM5V2pBQSTHH6OW7ivMmNluXTIAQRkmRpA5s+bD/eX3A9pxjR5WRLgCMekA44ePgrnzp0DTHcVnU2IQ3ALtxK3cF9hBhA0e2MwlvWuWkAyMjJg0aJFMKtgVtDEFU/5gWsD8EHzB4AlE1wEQExnCYqsyqr1a55eQxtUzPghMZhKugeV+mo1HEIhjhkzZkBeQR4kJSRhaYaalFPKSFGmdEbGRwDXxm0NT4xTLY74IcIhzyGHbGUplsUD8kOeSoqsLBxMoFBkl35L1dYEIrFIRI1NjMGkTf4BlwDkJdY45C8uDuEeW6WABEJo57naGswioRPawiUOkUdUxQ0p428VE/JDSYegyLpLgPixYPUiiz2lrj0gMuZu4NawICwSeVlsWVk+gOTjBpWJvex3yny8cuUK3Lx5kwfMXlVZtYFFK4sKdp7ilTplDBbNK4K0dPQxgiYstRVXtCnW1tYGXV1d3AaZ62AWkDoEZBUPCG2dpiSlQEpaiuqEZ23JrHy2oaEhbuuYdizdEr3ZA+T06dP6zZs3H0BAyFOf4ocorM/nzNkoDVlEW6PKtVxnlj3W1XNevFfWPXuACIVOlD+XIT8yAkiIQWR3lSOwY2Wp4xBpmaO5RAocXTtmLj6PjuEWZhxDIUBiomK4OBX9KC8tC5x6/s5gAxtgFwquCtfN5KXpSGRtQbP3eaYByUzPhMLZhZCckgyk3EP9oH43pNTb29vBarXC2NgYv2QHAvIic4DgFm49WllP8FZW3qw8rk6d0kHFjhAUT9D7WS9XhTt0c+g2IBuqfoV5WZuZ4hBvQAIPLgYZLq/QC381kf0Q9jlkChA9cohKiUVeMokMqZ09KRFIbT246lsR90cK6rAIv7s6OXiILH85ZGhwiEu2HrwxCLTt6nvIRxUNcQYwFZjAmGHUJNnaVUHFTvhdS0Aut10Gi9Uiu7MnxSEo6yF3Zi6nw6YlcM3sFB9hsR+iJSBnP3WWRS99dCksfmQxJE9XV9bc1NQEuD/DFezMnTtXeVm0K0fsHgFEuYL2qcJNU1kWvVegLFpeyk1xkEheVg1aWVT0ycaOoV8cIkIkubJoOdoqrVMXm8cTEO5BYrPGUCuzVw4Qd2UgRFR5QKS5VWjHEGsMqT7kT+HNISJqVg0gQlPIAyKh31GP9PW5t2fiILczB4hrP+Qd9NSX8566pNkrIXfuKiC4+LBoz+Rv5qLQsxqKgGDPxbXYc5GKPtlQ6sQhL7zwQmN7hwV3DJ3OnAeHyGliN2TOnT8HnZ2dkDY9DVJTUlUXbvZf74eBLwbQKczE9kxYFu1W5y5v60Uhh3zu0VGOQMD9kCdQhzQxA4i/ydZCHNLf288lGnA9D/3Z+cXnITomGubOmQs5OTkQo1fXb8tbZFH6KGa/r0AOOcIMIFMiy4rZ765oh7+hEwqBU606ATJhk87DFVTPyAbknackp4BBb6CuovJeuhsHCwKysXphWVnZRziXf4XzIitQsDL5tQuNENQh1JXUpL6TA81PSQbUNMCtJ7+qhVHGCyVW+JMrLKDUxzdVblpQ+nTpZWYAcYmsQ1iO8B2ecv5yiBLKy+kCFSrL53ISgLQhIJq2Dg4qh2Dm4r/Q7FVX0uYiRyAEVAKgmjECgIyiH7IAlfpVZjjE5YccN1ssCIhTzAaTQ9QQWO1YIUCwGX8R6hArM4A4RVY1NsE0B9yV1IOAd4F1wgYQv8qi1T6+WoyX6eYQToD41ZU0OysbZns5cFrQ3X0OKoumja+uni5BU9rdSJAApIMlpU6vq2hR2yY2NTUVShaWcK+1IGcuWAeZ0RQ0PHH8BHR1dkleJiw4pKWhJf7F2hf/h4AUqTF7aUdv4QMLId2Y7jcWciYwPzE5nO8ffp9rIKCyLHqUOaV+6NChhO3bt/8Xraz53lZWArb4E3NvTXkmKHmoBDKzM/0GROmJJLYOHzrMdXPw6SnvNokIh3wFrawrzFhZzQ3Nidtqt32EHDJHDYdQaKP4q8VQXFwMCYnYLDNInhLXWuP8eWj9uBVuDDrfCyJ2CDmG6IeUoB9yhhlADh48mLxz507kEHWAEFFi42K5l74E87VIlE00NnJLUa5XH77Qpc3zhS62msqaR1ZXrD7JTHDxcMPh6a/UvkIcYlLDIUrFjdw4pXpEbh76XiC4yF74vamhKW1H7Y6zFot5Jq8vguWpa0l8IYBEdgyfwOYz/2CGQ95888303bt3UyPlGXeeQ7SFSASQMgTkb8wA0tjYmLFr166LCMhUW598RsuiRbJOfsRU397GhsacXXt2UWfrKUAyMzO5zEHnG24EDqkQhoJmlUr0gT9jqElNu7kdxkad9SHEFVXrqn6MHEJ9e/14KZb4KoJkVALs378/97XXXvvYHRB6VRFtoVLL73hDPCbAq0yBV0xN5V2BpKa02bGC6otB6LB2OBO9Xe+/QhAmNlRuKMduQG8xA8iRI0eydry64yMsdMl2v2nq8kPAqG33rRiLgAZ6AYn/0lvhJiYmPDx5fbR+tKam5rFVq1Z9wIwO6e7unrZp06b6D09/+BhxeUB0upMny4f3HagLe9f9Yt2DixcvbmcGEHq5fW1t7QN1b9S93tXdlRcyoMgTXAp+O77ZYaB8dfnOlatW/hr7Qo4x46m73p+u27t3r7F+X30ZKsXlmKSQ7dA5puNNxOD3cQJ3buA/wzEBhXrpfe7u8+N8ShQWnubs9adz6CbxT0qCG8fEiAnk8W5juvEovinuwOOPP/4xvn5vGL+zMxN+J2K4vdRetw/26WAf0JuidRjM01yEzZo1a4rgl/HaUwE0N1SwklYWZJxnKhMRxzt92m8CpF5NtaPO4BMaHFoDMfUg3knxHLmWPAU0f1LlLxkZIUWBCCAh9nxEAIkAEmIUCLHlRDgkAkiIUSDElhPhkBAD5P9QlpXspSSy8wAAAABJRU5ErkJggg=="""
@@ -0,0 +1,219 @@
+"""
+二进制紧凑快照格式（.envs）
+
+文件通过 mmap 只读映射，按 (scope, name) 查找一个变量只需在有序索引上二分查找，
+O(log n) 次比较，不需要像 get_env_from_yaml 那样解析整个文件；值以 memoryview 切片返回，不复制。
+
+文件布局（小端序）:
+    文件头    magic "ENVS", 版本, 符号数, 变量数, 索引偏移, 字符串表偏移, 字符串表长度
+    符号表    scope/kind 字符串（按字母序），每个为 u16 长度 + UTF-8
+    索引      每个变量 20 字节: scope 符号, kind 符号, 名称偏移/长度, 值偏移/长度,
+              按 (scope, 名称的 ASCII 大写) 排序，偏移相对于字符串表
+    字符串表  UTF-8 编码的名称和值，相同的值只保存一次
+
+变量名按 ASCII 大小写不敏感比较，与 Windows 环境变量一致。
+"""
+import mmap
+import struct
+
+from env_record import EnvVar, SCOPE_MACHINE, SCOPE_USER
+from yaml_utils import BackupFormatError, atomic_write, iter_env_from_yaml, save_env_to_yaml
+
+MAGIC = b"ENVS"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHIIII")
+SYMBOL_LENGTH = struct.Struct("<H")
+RECORD = struct.Struct("<HHIIII")
+
+def name_key(name):
+    """索引排序和查找使用的名称键"""
+    return name.encode("utf-8").upper()
+
+def write_binary_snapshot(env_list, filename):
+    """
+    把环境变量写成二进制快照，原子替换目标文件。
+
+    同一作用域内名称（大小写不敏感）重复时保留最后一个。
+    """
+    rows = {}
+    for env in env_list:
+        env = EnvVar.from_row(env)
+        if not env.name:
+            raise ValueError("变量名不能为空")
+        if env.scope not in (SCOPE_USER, SCOPE_MACHINE):
+            raise ValueError(f"未知的作用域: {env.scope}")
+        rows[(env.scope, name_key(env.name))] = env
+    keys = sorted(rows)
+
+    symbols = sorted({env.scope for env in rows.values()} | {env.kind for env in rows.values()})
+    symbol_ids = {symbol: i for i, symbol in enumerate(symbols)}
+    symbol_table = bytearray()
+    for symbol in symbols:
+        data = symbol.encode("utf-8")
+        symbol_table += SYMBOL_LENGTH.pack(len(data)) + data
+
+    strings = bytearray()
+    value_offsets = {}
+    index = bytearray()
+    for key in keys:
+        env = rows[key]
+        name = env.name.encode("utf-8")
+        name_offset = len(strings)
+        strings += name
+        value = env.value.encode("utf-8")
+        value_offset = value_offsets.get(value)
+        if value_offset is None:
+            value_offset = value_offsets[value] = len(strings)
+            strings += value
+        index += RECORD.pack(symbol_ids[env.scope], symbol_ids[env.kind],
+                             name_offset, len(name), value_offset, len(value))
+    if len(strings) > 0xFFFFFFFF:
+        raise ValueError("快照过大，字符串表超过 4 GB")
+
+    index_offset = HEADER.size + len(symbol_table)
+    strings_offset = index_offset + len(index)
+    with atomic_write(filename, binary=True) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(symbols), len(keys), index_offset, strings_offset, len(strings)))
+        f.write(symbol_table)
+        f.write(index)
+        f.write(strings)
+    return len(keys)
+
+class BinarySnapshot:
+    """
+    只读打开的二进制快照
+
+    value_view 返回的 memoryview 在 close 之前必须释放，否则 close 会抛出 BufferError。
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BackupFormatError(filename, None, "文件为空") from None
+        try:
+            self._parse_header()
+        except BaseException:
+            self._mmap.close()
+            raise
+        self._view = memoryview(self._mmap)
+
+    def _fail(self, message):
+        raise BackupFormatError(self.filename, None, message)
+
+    def _parse_header(self):
+        data = self._mmap
+        if len(data) < HEADER.size:
+            self._fail("文件头不完整")
+        magic, version, symbol_count, count, index_offset, strings_offset, strings_size = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            self._fail("不是二进制快照文件")
+        if version != VERSION:
+            self._fail(f"不支持的快照版本: {version}")
+        if strings_offset != index_offset + count * RECORD.size or strings_offset + strings_size > len(data):
+            self._fail("文件已截断或损坏")
+
+        symbols = []
+        offset = HEADER.size
+        for _ in range(symbol_count):
+            if offset + SYMBOL_LENGTH.size > index_offset:
+                self._fail("符号表损坏")
+            (length,) = SYMBOL_LENGTH.unpack_from(data, offset)
+            offset += SYMBOL_LENGTH.size
+            if offset + length > index_offset:
+                self._fail("符号表损坏")
+            symbols.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+        self.symbols = symbols
+        self.count = count
+        self.index_offset = index_offset
+        self.strings_offset = strings_offset
+        self.strings_end = strings_offset + strings_size
+        # 作用域按字母序编号，查找时先比较作用域编号再比较名称
+        self.scope_ids = {symbol: i for i, symbol in enumerate(symbols) if symbol in (SCOPE_USER, SCOPE_MACHINE)}
+
+    def _record(self, position):
+        record = RECORD.unpack_from(self._mmap, self.index_offset + position * RECORD.size)
+        if record[0] >= len(self.symbols) or record[1] >= len(self.symbols):
+            self._fail(f"索引第 {position} 项引用了不存在的符号")
+        for offset, length in ((record[2], record[3]), (record[4], record[5])):
+            if self.strings_offset + offset + length > self.strings_end:
+                self._fail(f"索引第 {position} 项超出字符串表")
+        return record
+
+    def _slice(self, offset, length):
+        start = self.strings_offset + offset
+        return self._view[start:start + length]
+
+    def _entry(self, record):
+        scope_id, kind_id, name_offset, name_length, value_offset, value_length = record
+        return EnvVar(str(self._slice(name_offset, name_length), "utf-8"),
+                      str(self._slice(value_offset, value_length), "utf-8"),
+                      self.symbols[kind_id], self.symbols[scope_id])
+
+    def find(self, name, scope):
+        """二分查找 (scope, name)，返回索引记录，不存在时返回 None"""
+        scope_id = self.scope_ids.get(scope)
+        if scope_id is None:
+            return None
+        target = (scope_id, name_key(name))
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record = self._record(middle)
+            key = (record[0], self._slice(record[2], record[3]).tobytes().upper())
+            if key < target:
+                low = middle + 1
+            elif key > target:
+                high = middle
+            else:
+                return record
+        return None
+
+    def value_view(self, name, scope):
+        """变量值的 UTF-8 字节切片（memoryview，不复制），不存在时返回 None"""
+        record = self.find(name, scope)
+        return self._slice(record[4], record[5]) if record is not None else None
+
+    def get(self, name, scope):
+        """查找一个变量，不存在时返回 None"""
+        record = self.find(name, scope)
+        return self._entry(record) if record is not None else None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """按 (scope, name) 顺序逐条读取全部变量"""
+        for position in range(self.count):
+            yield self._entry(self._record(position))
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def iter_env_from_binary(filename):
+    """逐条读取二进制快照中的全部变量（生成器）"""
+    with BinarySnapshot(filename) as snapshot:
+        yield from snapshot
+
+def yaml_to_binary(yaml_file, binary_file):
+    """把 YAML 备份转换为二进制快照，返回变量数量"""
+    return write_binary_snapshot(iter_env_from_yaml(yaml_file), binary_file)
+
+def binary_to_yaml(binary_file, yaml_file):
+    """把二进制快照转换为 YAML 备份，返回变量数量"""
+    env_list = list(iter_env_from_binary(binary_file))
+    save_env_to_yaml(env_list, yaml_file)
+    return len(env_list)
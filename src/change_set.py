@@ -0,0 +1,76 @@
+"""
+变更集规划工具：把编辑数据和差异状态合并为一次批量应用
+"""
+from env_utils import apply_changes, normalize_kind
+
+class ChangePlan:
+    """有序的变更计划：先删除 removals，再写入 added 和 modified"""
+
+    def __init__(self):
+        self.added = []  # 系统中不存在、需要新增的变量
+        self.modified = []  # 值或类型与系统不同的变量
+        self.removals = []  # 需要从系统中删除的变量
+
+    @property
+    def upserts(self):
+        return self.added + self.modified
+
+    def is_empty(self):
+        return not (self.added or self.modified or self.removals)
+
+    def machine_count(self):
+        """计划中涉及系统作用域（需要管理员权限）的变量数"""
+        return sum(1 for env in self.upserts + self.removals if env[3].lower() == "machine")
+
+    def __len__(self):
+        return len(self.added) + len(self.modified) + len(self.removals)
+
+def _plan_order(env):
+    return (env[3], env[0].lower())
+
+def build_change_plan(env_data, diff_status):
+    """根据 env_data 和 diff_status 生成变更计划，same 状态的变量不会出现在计划中"""
+    plan = ChangePlan()
+    for env in env_data:
+        status = diff_status.get((env[0], env[3]), "same")
+        if status == "added":
+            plan.added.append(env)
+        elif status == "modified":
+            plan.modified.append(env)
+        elif status == "removed":
+            plan.removals.append(env)
+
+    plan.added.sort(key=_plan_order)
+    plan.modified.sort(key=_plan_order)
+    plan.removals.sort(key=_plan_order)
+    return plan
+
+def apply_change_plan(plan):
+    """在一次后端调用中应用整个计划，返回 BatchResult"""
+    return apply_changes(plan.upserts, plan.removals)
+
+def update_baseline(system_env_data, env_data, result):
+    """
+    根据应用结果更新内存中的系统基准数据，不需要重新读取注册表。
+
+    返回新的 (system_env_data, env_data)：写入成功的变量以新值替换基准，
+    删除成功或本就不存在的变量从两份数据中移除；失败的变量保持原样。
+    """
+    written = {env.key: env.replace(kind=normalize_kind(env.kind)) for env in result.succeeded}
+    gone_keys = {(env[0], env[3]) for env in result.deleted + result.missing}
+
+    new_system = []
+    for env in system_env_data:
+        key = (env[0], env[3])
+        if key in gone_keys:
+            continue
+        if key in written:
+            new_system.append(written.pop(key))
+        else:
+            new_system.append(env)
+    # 新增的变量追加到基准数据中
+    new_system.extend(written.values())
+    new_system.sort(key=lambda x: x.name.lower())
+
+    new_env_data = [env for env in env_data if (env[0], env[3]) not in gone_keys]
+    return new_system, new_env_data
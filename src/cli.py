@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+环境变量管理器命令行工具（不依赖 tkinter）
+
+与 GUI 共用注册表后端（env_utils）、差异引擎（DiffEngine）、变更计划（change_set）和快照存储，
+结果以 JSON 写到标准输出，进度和提示信息写到标准错误。
+
+子命令:
+    dump [-o 文件]                      输出系统环境变量，或按扩展名保存为 YAML/JSON/.envs 备份
+    diff 文件                           比较备份文件与系统环境变量
+    apply 文件 [--keep-extra] [--dry-run]
+                                        把系统环境变量同步为备份文件的内容（与 GUI 导入后应用所有修改相同）
+    delete 名称... --scope User|Machine 删除环境变量
+    snapshot create|list|restore|delete|prune
+
+所有子命令都支持 --scope，只处理一个作用域；这时另一个作用域读取失败（例如没有管理员权限）不算出错。
+只读的子命令（dump、diff、snapshot create/list）不写入历史日志，可以放心在脚本和循环中调用。
+
+退出码: 0 成功（diff 时表示没有差异），1 diff 发现差异，2 出错或有操作失败
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+EXIT_OK = 0
+EXIT_DIFF = 1
+EXIT_ERROR = 2
+
+SCOPES = ("User", "Machine")
+
+def output(data):
+    json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+
+def env_to_dict(env):
+    return {"name": env.name, "value": env.value, "kind": env.kind, "scope": env.scope}
+
+def result_to_dict(result):
+    return {
+        "ok": result.ok,
+        "succeeded": [env_to_dict(env) for env in result.succeeded],
+        "deleted": [{"name": env.name, "scope": env.scope} for env in result.deleted],
+        "missing": [{"name": env.name, "scope": env.scope} for env in result.missing],
+        "failed": [dict(env_to_dict(env), error=error) for env, error in result.failed],
+    }
+
+@contextlib.contextmanager
+def backend_output(quiet):
+    """后端的打印信息改写到标准错误（--quiet 时丢弃），标准输出只保留 JSON"""
+    target = open(os.devnull, "w") if quiet else sys.stderr
+    try:
+        with contextlib.redirect_stdout(target):
+            yield
+    finally:
+        if quiet:
+            target.close()
+
+def log(args, message):
+    if not args.quiet:
+        print(message, file=sys.stderr)
+
+def in_scope(args, env):
+    return args.scope is None or env.scope == args.scope
+
+def read_system(args, record=False):
+    """
+    读取系统环境变量，返回 --scope 范围内的变量
+
+    只有 --scope 范围内的作用域读取失败才抛出 EnvReadError。record 为 True 时（会修改系统的子命令）
+    把读取到的完整状态记录到历史日志；有作用域读取失败时不记录，否则会被当作该作用域的变量全部删除。
+    """
+    from env_utils import read_env_scopes
+
+    with backend_output(args.quiet):
+        result = read_env_scopes()
+    env_list = [env for env in result.check([args.scope] if args.scope else SCOPES) if in_scope(args, env)]
+    for scope, error in result.errors.items():
+        log(args, f"跳过读取失败的 {scope} 作用域: {error}")
+
+    if record and result.ok:
+        from history_log import HistoryLog
+        try:
+            HistoryLog().record(result.env_list)
+        except Exception as e:
+            log(args, f"记录历史失败: {e}")
+    return env_list
+
+def compare(args, system_list, records):
+    """
+    按 GUI 导入备份的方式比较差异，返回 (DiffEngine, 当前数据)。
+
+    当前数据中包含系统中存在但 records 中没有的变量（removed 状态）。
+    """
+    from diff_engine import DiffEngine
+
+    engine = DiffEngine()
+    engine.reset(system_list, [])
+    env_data = [env for env in engine.feed_current(env for env in records if in_scope(args, env))]
+    env_data.extend(engine.removed_rows())
+    return engine, env_data
+
+def load_file(filename):
+    from yaml_utils import iter_env_from_file
+    return iter_env_from_file(filename)
+
+def cmd_dump(args):
+    env_list = read_system(args)
+    if not args.output:
+        output([env_to_dict(env) for env in env_list])
+        return EXIT_OK
+
+    if args.output.endswith(".json"):
+        from yaml_utils import save_env_to_json
+        save_env_to_json(env_list, args.output)
+    elif args.output.endswith(".envs"):
+        from binary_snapshot import write_binary_snapshot
+        write_binary_snapshot(env_list, args.output)
+    else:
+        from yaml_utils import save_env_to_yaml
+        save_env_to_yaml(env_list, args.output)
+    log(args, f"环境变量已保存到 {args.output}")
+    output({"file": args.output, "count": len(env_list)})
+    return EXIT_OK
+
+def diff_changes(engine, env_data):
+    """非 same 状态的变量，按作用域和名称排序"""
+    changes = []
+    for env in sorted(env_data, key=lambda env: (env.scope, env.name.lower())):
+        status = engine.status.get(env.key, "same")
+        if status == "same":
+            continue
+        change = dict(env_to_dict(env), status=status)
+        system = engine.get_system(env.key)
+        if status == "removed":
+            del change["value"], change["kind"]
+        if system is not None:
+            change["system_value"], change["system_kind"] = system
+        changes.append(change)
+    return changes
+
+def cmd_diff(args):
+    engine, env_data = compare(args, read_system(args), load_file(args.file))
+    changes = diff_changes(engine, env_data)
+    summary = dict(engine.counts)
+    if args.keep_extra:
+        changes = [change for change in changes if change["status"] != "removed"]
+        summary["removed"] = 0
+    output({"file": args.file, "summary": summary, "changes": changes})
+    return EXIT_DIFF if changes else EXIT_OK
+
+def plan_to_dict(plan):
+    return {
+        "added": [env_to_dict(env) for env in plan.added],
+        "modified": [env_to_dict(env) for env in plan.modified],
+        "removed": [env_to_dict(env) for env in plan.removals],
+    }
+
+def plan_summary(plan):
+    return {"added": len(plan.added), "modified": len(plan.modified), "removed": len(plan.removals)}
+
+def apply_records(args, records, source):
+    """把系统同步为 records 的内容：先为系统当前状态创建快照，再一次应用整个变更计划"""
+    from change_set import build_change_plan, apply_change_plan
+    from snapshot_store import SnapshotStore
+
+    system_list = read_system(args, record=True)
+    engine, env_data = compare(args, system_list, records)
+    plan = build_change_plan(env_data, engine.status)
+    if args.keep_extra:
+        plan.removals = []
+
+    # 报告根据过滤后的计划生成，--keep-extra 时不包含删除
+    report = {"source": source, "summary": plan_summary(plan), "plan": plan_to_dict(plan)}
+    if args.dry_run or plan.is_empty():
+        output(dict(report, applied=False))
+        return EXIT_OK
+
+    try:
+        info, _ = SnapshotStore().create(system_list, label=f"命令行应用 {source} 前自动快照", scope=args.scope)
+        report["snapshot"] = info.id
+    except Exception as e:
+        log(args, f"自动快照失败: {e}")
+    with backend_output(args.quiet):
+        result = apply_change_plan(plan)
+    output(dict(report, applied=True, result=result_to_dict(result)))
+    return EXIT_OK if result.ok else EXIT_ERROR
+
+def cmd_apply(args):
+    return apply_records(args, load_file(args.file), args.file)
+
+def cmd_delete(args):
+    from env_record import EnvVar, KIND_STRING
+    from env_utils import delete_env_vars
+
+    env_list = [EnvVar(name, "", KIND_STRING, args.scope) for name in args.names]
+    with backend_output(args.quiet):
+        result = delete_env_vars(env_list)
+    output(result_to_dict(result))
+    return EXIT_OK if result.ok else EXIT_ERROR
+
+def info_to_dict(info):
+    return {"id": info.id, "created": info.created, "label": info.label, "count": info.count, "scope": info.scope}
+
+def cmd_snapshot(args):
+    from snapshot_store import SnapshotStore
+
+    store = SnapshotStore()
+    if args.action == "create":
+        info, written = store.create(read_system(args), label=args.label, scope=args.scope)
+        output(dict(info_to_dict(info), written=written))
+    elif args.action == "list":
+        output([info_to_dict(info) for info in store.list()])
+    elif args.action == "restore":
+        # 只包含一个作用域的快照只恢复该作用域，否则另一个作用域的变量都会被当作需要删除
+        scope = store.info(args.id).scope
+        if scope is not None:
+            if args.scope not in (None, scope):
+                raise ValueError(f"快照 {args.id} 只包含 {scope} 作用域，不能按 {args.scope} 恢复")
+            args.scope = scope
+        return apply_records(args, store.load(args.id), f"快照 {args.id}")
+    elif args.action == "delete":
+        store.delete(args.id)
+        output({"deleted": [args.id], "objects_removed": store.gc()})
+    else:
+        if args.keep_last is None and args.keep_days is None:
+            raise ValueError("prune 需要 --keep-last 或 --keep-days")
+        output({"deleted": store.apply_retention(keep_last=args.keep_last, keep_days=args.keep_days)})
+    return EXIT_OK
+
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"至少为 1: {text}")
+    return value
+
+def non_negative_float(text):
+    value = float(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"不能为负数: {text}")
+    return value
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Windows 环境变量管理器命令行工具")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--scope", choices=SCOPES, help="只处理一个作用域")
+    common.add_argument("-q", "--quiet", action="store_true", help="不输出进度和提示信息")
+    sync = argparse.ArgumentParser(add_help=False)
+    sync.add_argument("--keep-extra", action="store_true", help="保留系统中存在但文件中没有的变量，不删除")
+    sync.add_argument("--dry-run", action="store_true", help="只输出变更计划，不修改系统")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    dump = commands.add_parser("dump", parents=[common], help="输出系统环境变量")
+    dump.add_argument("-o", "--output", help="保存为备份文件（.yaml/.json/.envs）")
+    dump.set_defaults(handler=cmd_dump)
+
+    diff = commands.add_parser("diff", parents=[common], help="比较备份文件与系统环境变量")
+    diff.add_argument("file")
+    diff.add_argument("--keep-extra", action="store_true", help="不报告系统中存在但文件中没有的变量")
+    diff.set_defaults(handler=cmd_diff)
+
+    apply = commands.add_parser("apply", parents=[common, sync], help="把系统环境变量同步为备份文件的内容")
+    apply.add_argument("file")
+    apply.set_defaults(handler=cmd_apply)
+
+    delete = commands.add_parser("delete", parents=[common], help="删除环境变量")
+    delete.add_argument("names", nargs="+", metavar="name")
+    delete.set_defaults(handler=cmd_delete)
+
+    snapshot = commands.add_parser("snapshot", help="管理快照")
+    actions = snapshot.add_subparsers(dest="action", required=True)
+    create = actions.add_parser("create", parents=[common], help="为系统当前状态创建快照")
+    create.add_argument("--label", default="命令行快照")
+    actions.add_parser("list", parents=[common], help="列出快照")
+    restore = actions.add_parser("restore", parents=[common, sync], help="把系统恢复为快照的内容")
+    restore.add_argument("id")
+    remove = actions.add_parser("delete", parents=[common], help="删除快照并回收不再引用的值")
+    remove.add_argument("id")
+    prune = actions.add_parser("prune", parents=[common], help="按保留策略删除旧快照")
+    prune.add_argument("--keep-last", type=positive_int, help="保留最新的几个快照（至少 1）")
+    prune.add_argument("--keep-days", type=non_negative_float, help="保留几天以内的快照")
+    snapshot.set_defaults(handler=cmd_snapshot)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "delete" and args.scope is None:
+        # 删除必须明确作用域，避免误删同名的另一个变量
+        output({"error": "delete 需要 --scope"})
+        return EXIT_ERROR
+    try:
+        return args.handler(args)
+    except Exception as e:
+        output({"error": str(e)})
+        return EXIT_ERROR
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+增量差异引擎
+
+在两次编辑之间保留系统数据和当前数据的 (name, scope) 索引，
+修改单个变量时只重新分类这一个键，并维护各状态的计数，不再全量重算。
+"""
+from env_record import EnvVar
+
+STATUSES = ("added", "modified", "removed", "same")
+
+def classify(current, system):
+    """
+    根据当前值和系统值判断差异状态。
+
+    current 和 system 为 (value, kind) 或 None（不存在），两者都不存在时返回 None。
+    """
+    if current is None:
+        return "removed" if system is not None else None
+    if system is None:
+        return "added"
+    return "same" if current == system else "modified"
+
+class DiffEngine:
+    """维护当前数据与系统数据之间的差异状态"""
+
+    def __init__(self):
+        self.system = {}  # {(name, scope): (value, kind)}
+        self.current = {}  # {(name, scope): (value, kind)}，不含仅用于显示的已删除行
+        self.status = {}  # {(name, scope): 'added'|'removed'|'modified'|'same'}
+        self.counts = dict.fromkeys(STATUSES, 0)
+
+    def clear(self):
+        """清空所有索引和状态（status 字典保持同一个对象）"""
+        self.system.clear()
+        self.current.clear()
+        self.status.clear()
+        self.counts = dict.fromkeys(STATUSES, 0)
+
+    def reset(self, system_data, current_data):
+        """
+        全量重建索引和状态。
+
+        返回系统中存在但当前数据中没有的变量（已删除行），调用方通常把它们追加到显示数据中。
+        """
+        self.clear()
+        for name, value, kind, scope in system_data:
+            self.system[(name, scope)] = (value, kind)
+        for name, value, kind, scope in current_data:
+            self.current[(name, scope)] = (value, kind)
+
+        for key in self.current:
+            self._reclassify(key)
+        for key in self.system:
+            if key not in self.current:
+                self._reclassify(key)
+        return self.removed_rows()
+
+    def removed_rows(self):
+        """系统中存在但当前数据中没有的变量"""
+        return [EnvVar(key[0], value, kind, key[1])
+                for key, (value, kind) in self.system.items() if key not in self.current]
+
+    def feed_current(self, records):
+        """
+        逐条把记录加入当前数据并重新分类（生成器），原样产出每条记录。
+
+        与流式读取器配合使用，读取备份的同时完成差异分类，不需要先得到完整列表。
+        """
+        for env in records:
+            self.update_current(env)
+            yield env
+
+    def _reclassify(self, key):
+        """重新计算一个键的状态并更新计数，返回新状态"""
+        old = self.status.get(key)
+        new = classify(self.current.get(key), self.system.get(key))
+        if old == new:
+            return new
+
+        if old is not None:
+            self.counts[old] -= 1
+        if new is None:
+            del self.status[key]
+        else:
+            self.status[key] = new
+            self.counts[new] += 1
+        return new
+
+    def update_current(self, env):
+        """当前数据中新增或修改了一个变量，返回该变量的新状态"""
+        name, value, kind, scope = env
+        key = (name, scope)
+        self.current[key] = (value, kind)
+        return self._reclassify(key)
+
+    def remove_current(self, key):
+        """当前数据中去掉了一个变量，返回新状态（系统中存在时为 removed）"""
+        self.current.pop(key, None)
+        return self._reclassify(key)
+
+    def update_system(self, env):
+        """系统数据中新增或修改了一个变量，返回该变量的新状态"""
+        name, value, kind, scope = env
+        key = (name, scope)
+        self.system[key] = (value, kind)
+        return self._reclassify(key)
+
+    def remove_system(self, key):
+        """系统数据中去掉了一个变量，返回新状态"""
+        self.system.pop(key, None)
+        return self._reclassify(key)
+
+    def get_system(self, key):
+        """返回系统中的 (value, kind)，不存在时返回 None"""
+        return self.system.get(key)
+
+    def summary(self):
+        return (
+            f"新增:{self.counts['added']}, 修改:{self.counts['modified']}, "
+            f"删除:{self.counts['removed']}, 相同:{self.counts['same']}"
+        )
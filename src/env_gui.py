@@ -1,17 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import json
 from datetime import datetime
-from env_utils import get_all_env_list, set_env_to_system, delete_env_vars
-from yaml_utils import save_env_to_yaml, get_env_from_yaml
+from env_utils import get_all_env_list, read_env_scopes, set_env_to_system, delete_env_vars, get_last_read_time, SCOPES
+from diff_engine import DiffEngine
+from env_store import EnvStore, env_key
+from env_record import EnvVar
+from change_set import build_change_plan, apply_change_plan, update_baseline
+from tree_sync import TreeReconciler
+from search_index import SearchIndex, PathIndex
+from virtual_tree import VirtualTree, VIRTUAL_THRESHOLD
+from snapshot_store import SnapshotStore
+from history_log import HistoryLog
+from env_watcher import EnvWatcher, make_default_source
+from job_executor import JobExecutor
+from yaml_utils import save_env_to_yaml, save_env_to_json, iter_env_from_file
+from binary_snapshot import write_binary_snapshot
 from admin_utils import is_admin, show_admin_status, get_current_user
-import threading
+import itertools
 import os
-import base64
-import tempfile
 
-# 硬编码的图标数据（base64编码）
-ICON_DATA = """iVBORw0KGgoAAAANSUhEUgAAAGQAAABkCAYAAABw4pVUAAAOj0lEQVR4Xu1de1BU5xU/C+wC8pDXgggCiy+aYt/TSDKJjWPUmZgmjbVUkIxN/2jzR6cdUYHGycSZTmNj40xTjXWmNa2EWLDmIanFqKHRim20jcHEF+qyLI8EUIKIvJbdnnN3L+7jPnfv6n7r3hkG2P3ud797fvc8v3PO1UHkCCkK6EJqNZHFQASQEHsIIoBEAAkxCoTYciIccq8C4nA4VIJvR1JFeZBLp9M56AOay/1vIZrS9+qvKY8Of135kf6NUEkk9RdxEYUoa8Aful601yz0nTvl+TXxvwkZ78PGfWAEB/R5Yub6j64hdm/ctYaHh/XuZyKhPdDHddsTEhImcAx/ffp7HH8m6bNgARNUQPCmoiwWS/6xY8cWnTp16lv9ff1fnpycTNGBLgm/m0YEIUI4wKHHz+iRdq5HBzE+EOAg/jM8xwmI14FDuDHcXPg3/fYZ43DE0ACh87nP8ESa3zXXJP4/ho/QaHJS8uCCBQsuLlm2pP6++fcdwZGjOE7oYRGdWskXQQOEiHvhwoX8urq6Z06cPFE+ODiYa5uw6el+lSws1MZER0c7kGMmi+8r7llbsXbDwgcXvoVrtGkNStCIg4BEb926tfzAuwe2IBgzvOU5yQfNH687gGJsbKxt6ZKlTc/gMWfOnGvMAGJtscY/94fnfnOm9cyzdrvdVwTdAeIF5xI6SE9P66upqnlk2bJlFxAQ0imaHUHjkJaWlvgtL23589WrV7+Pq51SmDExMYCsD/pY1KlBu7pG9EEWHrk5AiOjI2B33Obn6Kjo4ZrqmiWlpaWnmAGkubk5btu2bX81W8zf5fQsHnGGOMgvzAej0QgokzWiWnCnGR8ZB/NVM/T297qDMl6zvuZ7ZRVlh9gExI6AII/kZOeAqdAECUkJkoaOFInddQ+hPGV6BQkX1H3Qae0Ec7sZbt26xV2FrLCN6zeuXLNmzd+ZAeTThk8N1bXVDe4ckl+QDwUFBRAfFx8k8gVn2s8/64MrV9rgxtANHpBJBKQMAdnPGiCNCMijvMjKN7kAiWULkL7P+6Dt8m1AyECsrqx+pvzp8teZAqRqT9WR9o72h/jnVhwQGeGD+nTg+gBc/+I62CYFfUJp1kA5l5icCBmpGRBriFXIRreFY9gAgiLrn8ghJfKASNOop7sHLB0WCndQHMtzsACWPj4OjiEjojC/EGbmzAS9wSNqIguQCCA/Qw7ZxRqHHEcO+XaggFw8fxGsnVYwZhohKysLyHRWc/T09EBvby+kpaUBOnOQlJTkssSVuaZCgKAOWV9RUfF7sTCOmvW5jw2aJ0BKHUWWJoCc/eQsdHd1w4oVK2Dp8qUwPXW6qvttfKcR3mt6D/R6PcybNw+Sk5NVnR82gKDI+jeKrK8HyiGtn7RygJT+oBSefOpJSE1PVUXQ+jfq4e233ubE1r0OyEmzpf0bvLfgr5V1NwBxV02COmR99cbyivLfMSWykENOI4csCEMOcVSvr/4lAvJbpgBBHfIfVOpfC1NA1iEgpNTZCC66lPoZBORLAQGCsqP1bHB0iNItAAGRRRzCJCCfICBzPQHJg/jYhNtKWUFAitchDz/0MJSUlEBiUqIqpX782HE4efIk4F6Gl1JXcHG8khAgVRuqfoqhk93MiCyK9r788sutvoBgLEtl6ORS2yWwdlg5szU+Pl51pJgcypGREcjKzoLZhbMhMUEdoOEJCPpg+bP9i2UNDw2DucMM165dA/ukMmfOm4USExPBZDJxzmFUlGc2ixy7iQCyFjnkjXuSQyhcMj4+DjabzTd0IkdN1/fkgxgMBtXcRadLAFLHjFLXTmQpVb0KkfFjmAggzyKH/PEeAESZovWDrn6fImJl/QTNXlLqbJi9Sjjk7j/7iJFvgqQPcPc4hwg9yFpDp26+sADE5Rhq4qn7K2s8hF8AkjBsAMFYFgYXzRhcdB6KgotuIkTdc+wvbPLnhQ8gr1cfw2yN+1UBgihg7iwUFRXBtCRM/w3Sjo1t3Abnz52HS5cucU6j1BE2gGBwsRk99QfUAJKdm82FR3JzcyEqWsyBC0D+uBZDvs3QjSFoPtrM5V2pBQSTHH6OW7ivMmNluXTIAQRkmRpA5s+bD/eX3A9pxjR5WRLgCMekA44ePgrnzp0DTHcVnU2IQ3ALtxK3cF9hBhA0e2MwlvWuWkAyMjJg0aJFMKtgVtDEFU/5gWsD8EHzB4AlE1wEQExnCYqsyqr1a55eQxtUzPghMZhKugeV+mo1HEIhjhkzZkBeQR4kJSRhaYaalFPKSFGmdEbGRwDXxm0NT4xTLY74IcIhzyGHbGUplsUD8kOeSoqsLBxMoFBkl35L1dYEIrFIRI1NjMGkTf4BlwDkJdY45C8uDuEeW6WABEJo57naGswioRPawiUOkUdUxQ0p428VE/JDSYegyLpLgPixYPUiiz2lrj0gMuZu4NawICwSeVlsWVk+gOTjBpWJvex3yny8cuUK3Lx5kwfMXlVZtYFFK4sKdp7ilTplDBbNK4K0dPQxgiYstRVXtCnW1tYGXV1d3AaZ62AWkDoEZBUPCG2dpiSlQEpaiuqEZ23JrHy2oaEhbuuYdizdEr3ZA+T06dP6zZs3H0BAyFOf4ocorM/nzNkoDVlEW6PKtVxnlj3W1XNevFfWPXuACIVOlD+XIT8yAkiIQWR3lSOwY2Wp4xBpmaO5RAocXTtmLj6PjuEWZhxDIUBiomK4OBX9KC8tC5x6/s5gAxtgFwquCtfN5KXpSGRtQbP3eaYByUzPhMLZhZCckgyk3EP9oH43pNTb29vBarXC2NgYv2QHAvIic4DgFm49WllP8FZW3qw8rk6d0kHFjhAUT9D7WS9XhTt0c+g2IBuqfoV5WZuZ4hBvQAIPLgYZLq/QC381kf0Q9jlkChA9cohKiUVeMokMqZ09KRFIbT246lsR90cK6rAIv7s6OXiILH85ZGhwiEu2HrwxCLTt6nvIRxUNcQYwFZjAmGHUJNnaVUHFTvhdS0Aut10Gi9Uiu7MnxSEo6yF3Zi6nw6YlcM3sFB9hsR+iJSBnP3WWRS99dCksfmQxJE9XV9bc1NQEuD/DFezMnTtXeVm0K0fsHgFEuYL2qcJNU1kWvVegLFpeyk1xkEheVg1aWVT0ycaOoV8cIkIkubJoOdoqrVMXm8cTEO5BYrPGUCuzVw4Qd2UgRFR5QKS5VWjHEGsMqT7kT+HNISJqVg0gQlPIAyKh31GP9PW5t2fiILczB4hrP+Qd9NSX8566pNkrIXfuKiC4+LBoz+Rv5qLQsxqKgGDPxbXYc5GKPtlQ6sQhL7zwQmN7hwV3DJ3OnAeHyGliN2TOnT8HnZ2dkDY9DVJTUlUXbvZf74eBLwbQKczE9kxYFu1W5y5v60Uhh3zu0VGOQMD9kCdQhzQxA4i/ydZCHNLf288lGnA9D/3Z+cXnITomGubOmQs5OTkQo1fXb8tbZFH6KGa/r0AOOcIMIFMiy4rZ765oh7+hEwqBU606ATJhk87DFVTPyAbknackp4BBb6CuovJeuhsHCwKysXphWVnZRziXf4XzIitQsDL5tQuNENQh1JXUpL6TA81PSQbUNMCtJ7+qhVHGCyVW+JMrLKDUxzdVblpQ+nTpZWYAcYmsQ1iO8B2ecv5yiBLKy+kCFSrL53ISgLQhIJq2Dg4qh2Dm4r/Q7FVX0uYiRyAEVAKgmjECgIyiH7IAlfpVZjjE5YccN1ssCIhTzAaTQ9QQWO1YIUCwGX8R6hArM4A4RVY1NsE0B9yV1IOAd4F1wgYQv8qi1T6+WoyX6eYQToD41ZU0OysbZns5cFrQ3X0OKoumja+uni5BU9rdSJAApIMlpU6vq2hR2yY2NTUVShaWcK+1IGcuWAeZ0RQ0PHH8BHR1dkleJiw4pKWhJf7F2hf/h4AUqTF7aUdv4QMLId2Y7jcWciYwPzE5nO8ffp9rIKCyLHqUOaV+6NChhO3bt/8Xraz53lZWArb4E3NvTXkmKHmoBDKzM/0GROmJJLYOHzrMdXPw6SnvNokIh3wFrawrzFhZzQ3Nidtqt32EHDJHDYdQaKP4q8VQXFwMCYnYLDNInhLXWuP8eWj9uBVuDDrfCyJ2CDmG6IeUoB9yhhlADh48mLxz507kEHWAEFFi42K5l74E87VIlE00NnJLUa5XH77Qpc3zhS62msqaR1ZXrD7JTHDxcMPh6a/UvkIcYlLDIUrFjdw4pXpEbh76XiC4yF74vamhKW1H7Y6zFot5Jq8vguWpa0l8IYBEdgyfwOYz/2CGQ95888303bt3UyPlGXeeQ7SFSASQMgTkb8wA0tjYmLFr166LCMhUW598RsuiRbJOfsRU397GhsacXXt2UWfrKUAyMzO5zEHnG24EDqkQhoJmlUr0gT9jqElNu7kdxkad9SHEFVXrqn6MHEJ9e/14KZb4KoJkVALs378/97XXXvvYHRB6VRFtoVLL73hDPCbAq0yBV0xN5V2BpKa02bGC6otB6LB2OBO9Xe+/QhAmNlRuKMduQG8xA8iRI0eydry64yMsdMl2v2nq8kPAqG33rRiLgAZ6AYn/0lvhJiYmPDx5fbR+tKam5rFVq1Z9wIwO6e7unrZp06b6D09/+BhxeUB0upMny4f3HagLe9f9Yt2DixcvbmcGEHq5fW1t7QN1b9S93tXdlRcyoMgTXAp+O77ZYaB8dfnOlatW/hr7Qo4x46m73p+u27t3r7F+X30ZKsXlmKSQ7dA5puNNxOD3cQJ3buA/wzEBhXrpfe7u8+N8ShQWnubs9adz6CbxT0qCG8fEiAnk8W5juvEovinuwOOPP/4xvn5vGL+zMxN+J2K4vdRetw/26WAf0JuidRjM01yEzZo1a4rgl/HaUwE0N1SwklYWZJxnKhMRxzt92m8CpF5NtaPO4BMaHFoDMfUg3knxHLmWPAU0f1LlLxkZIUWBCCAh9nxEAIkAEmIUCLHlRDgkAkiIUSDElhPhkBAD5P9QlpXspSSy8wAAAABJRU5ErkJggg=="""
+# 搜索框停止输入多久之后再执行查询（毫秒）
+SEARCH_DELAY_MS = 150
+
+# 搜索模式：全文子串匹配，或按 ; 分隔的路径段精确查找
+SEARCH_MODE_TEXT = "全文"
+SEARCH_MODE_PATH = "路径"
+
+# 快照管理中"清理旧快照"保留的快照数量
+SNAPSHOT_KEEP_LAST = 50
+
+# 监视器一次报告的变化超过这个数量时整体刷新视图，而不是逐行更新
+WATCH_ROW_LIMIT = 50
 
 class EnvironmentVariableGUI:
     def __init__(self, root):
@@ -23,15 +42,44 @@ class EnvironmentVariableGUI:
         self.root.title(f"环境变量管理器{admin_suffix}")
         self.root.geometry("1200x800")
 
-        self.root.iconphoto(True, tk.PhotoImage(data=ICON_DATA))
-
         # 环境变量数据
-        self.env_data = []          # 当前编辑的数据
-        self.system_env_data = []   # 系统实际数据
+        self.env_data = EnvStore()          # 当前编辑的数据
+        self.system_env_data = EnvStore()   # 系统实际数据
         self.filtered_data = []
         
-        # 差异状态字典 - 用于跟踪每个变量的状态
-        self.diff_status = {}  # {(name, scope): 'added'|'removed'|'modified'|'same'}
+        # 搜索索引 - 预计算的小写文本，按键防抖，过期的查询可以取消
+        self.search_index = SearchIndex()
+        self.path_index = PathIndex()  # 路径段 -> 包含它的变量
+        self.search_after_id = None
+        self.search_generation = 0
+        
+        # 快照存储 - 变量值按内容去重，快照只保存引用清单
+        self.snapshot_store = SnapshotStore()
+        
+        # 历史日志 - 每次读取或应用后只记录系统状态的差异
+        self.history_log = HistoryLog()
+        
+        # 上一次读取中失败的作用域 {scope: 错误信息}，为空表示读取完整
+        self.read_errors = {}
+        
+        # 增量差异引擎 - diff_status 与引擎共用同一个状态字典
+        self.diff_engine = DiffEngine()
+        self.diff_status = self.diff_engine.status  # {(name, scope): 'added'|'removed'|'modified'|'same'}
+        
+        # 后台任务执行器 - 所有后台工作共用一个线程池，结果由界面线程上的一个轮询统一处理
+        self.jobs = JobExecutor()
+        self.jobs.start_polling(self.root)
+        self.busy_count = 0
+        self.import_job = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # 系统环境变量监视器 - 外部修改和本程序的写入都通过它增量合并，不再定时重新读取
+        read_fresh = lambda: get_all_env_list(fresh=True)
+        self.env_watcher = EnvWatcher(
+            make_default_source(read_fresh),
+            read_fresh,
+            lambda changes, env_list: self.on_system_changes(changes, env_list),
+        )
         
         # 创建界面
         self.create_widgets()
@@ -43,6 +91,60 @@ class EnvironmentVariableGUI:
         self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
         self.tree.bind('<Double-1>', self.on_tree_double_click)
         
+        # 窗口显示出来之后再加载图标和读取环境变量，读取在后台线程中进行
+        self.root.after_idle(self.on_window_shown)
+        
+    def on_window_shown(self):
+        """启动后的第一个空闲时刻：设置图标并开始读取环境变量"""
+        from app_icon import ICON_DATA
+        self.root.iconphoto(True, tk.PhotoImage(data=ICON_DATA))
+        self.load_and_compare_env_vars()
+        self.env_watcher.start()
+        
+    def on_close(self):
+        """关闭窗口时取消尚未完成的后台任务并停止监视"""
+        self.env_watcher.stop()
+        self.jobs.shutdown()
+        self.root.destroy()
+        
+    def begin_busy(self, message):
+        """后台任务开始：显示状态并设置等待光标"""
+        self.busy_count += 1
+        self.status_var.set(message)
+        self.root.config(cursor="wait")
+        
+    def end_busy(self):
+        """后台任务结束，所有任务都结束后恢复光标"""
+        self.busy_count = max(0, self.busy_count - 1)
+        if not self.busy_count:
+            self.root.config(cursor="")
+        
+    def job_failed(self, action, status="就绪"):
+        """后台任务失败时的回调：显示错误并更新状态栏"""
+        def on_error(e):
+            messagebox.showerror("错误", f"{action}: {str(e)}")
+            self.status_var.set(status)
+        return on_error
+        
+    def read_system_env_async(self, on_done, on_error, allow_partial=False):
+        """
+        在后台读取系统环境变量；已有读取正在进行时共享它的结果，不重复读取。
+
+        读取结果先在界面线程中由 accept_system_read 处理，再以变量列表调用 on_done。
+        """
+        return self.jobs.submit(
+            lambda token: self.read_system_env(allow_partial),
+            on_done=lambda result: on_done(self.accept_system_read(*result)),
+            on_error=on_error, on_finally=self.end_busy,
+            key="read_system_env_partial" if allow_partial else "read_system_env",
+        )
+        
+    def snapshot_scope(self):
+        """上一次读取只有一个作用域成功时，快照只记录该作用域，恢复时不会删除另一个作用域"""
+        if not self.read_errors:
+            return None
+        return next(scope for scope in SCOPES if scope not in self.read_errors)
+        
     def configure_diff_colors(self):
         """配置差异显示的颜色"""
         # 创建标签用于不同的差异状态
@@ -81,7 +183,9 @@ class EnvironmentVariableGUI:
         backup_group.pack(side=tk.LEFT)
         
         ttk.Button(backup_group, text="备份环境变量", command=self.backup_env_vars).pack(side=tk.LEFT, padx=(0, 2))
-        ttk.Button(backup_group, text="导入备份", command=self.import_backup).pack(side=tk.LEFT)
+        ttk.Button(backup_group, text="导入备份", command=self.import_backup).pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Button(backup_group, text="创建快照", command=self.create_snapshot).pack(side=tk.LEFT, padx=(0, 2))
+        ttk.Button(backup_group, text="快照管理", command=self.show_snapshots).pack(side=tk.LEFT)
         
         # 管理员权限状态和按钮
         admin_frame = ttk.Frame(button_frame)
@@ -111,6 +215,12 @@ class EnvironmentVariableGUI:
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=30)
         search_entry.pack(side=tk.LEFT, padx=(5, 0))
         
+        self.search_mode_var = tk.StringVar(value=SEARCH_MODE_TEXT)
+        search_mode_combo = ttk.Combobox(search_frame, textvariable=self.search_mode_var,
+                                         values=[SEARCH_MODE_TEXT, SEARCH_MODE_PATH], state='readonly', width=6)
+        search_mode_combo.pack(side=tk.LEFT, padx=(5, 0))
+        search_mode_combo.bind('<<ComboboxSelected>>', lambda e: self.run_search())
+        
         # 差异状态图例
         legend_frame = ttk.Frame(search_frame)
         legend_frame.pack(side=tk.RIGHT)
@@ -148,11 +258,17 @@ class EnvironmentVariableGUI:
         self.tree.column('kind', width=100)
         self.tree.column('scope', width=100)
         
+        # 差量同步树形控件，只对变化的行调用 Tk
+        self.tree_sync = TreeReconciler(self.tree)
+        
         # 添加滚动条
         tree_scrollbar_v = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
         tree_scrollbar_h = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
         self.tree.configure(yscrollcommand=tree_scrollbar_v.set, xscrollcommand=tree_scrollbar_h.set)
         
+        # 变量很多时只渲染可见区域的虚拟列表模式，由 populate_tree 自动切换
+        self.virtual_tree = VirtualTree(self.tree, self.tree_sync, tree_scrollbar_v)
+        
         # 布局树形控件和滚动条
         self.tree.grid(row=0, column=0, sticky='nsew')
         tree_scrollbar_v.grid(row=0, column=1, sticky='ns')
@@ -327,11 +443,10 @@ class EnvironmentVariableGUI:
             # 查找系统中的值
             system_value = None
             system_kind = None
-            for env in self.system_env_data:
-                if env[0] == name and env[3] == scope:
-                    system_value = env[1]
-                    system_kind = env[2]
-                    break
+            system_env = self.system_env_data.get(key)
+            if system_env is not None:
+                system_value = system_env[1]
+                system_kind = system_env[2]
             
             if system_value is not None:
                 ttk.Label(dialog, text="系统值:", font=('Arial', 10, 'bold')).pack(anchor=tk.W, padx=10, pady=(5, 0))
@@ -363,27 +478,24 @@ class EnvironmentVariableGUI:
         key = (name, scope)
         
         # 查找系统中的值
-        for env in self.system_env_data:
-            if env[0] == name and env[3] == scope:
-                system_name, system_value, system_kind, system_scope = env
-                
-                # 更新当前数据
-                for i, current_env in enumerate(self.env_data):
-                    if current_env[0] == name and current_env[3] == scope:
-                        self.env_data[i] = [system_name, system_value, system_kind, system_scope]
-                        break
-                
-                # 更新编辑器显示
-                self.load_env_to_editor(system_name, system_value, system_kind, system_scope)
-                
-                # 重新计算差异
-                if self.system_env_data:
-                    self.update_diff_status(self.system_env_data)
-                
-                self.status_var.set(f"已恢复 {name} 为系统值")
-                return
+        env = self.system_env_data.get(key)
+        if env is None:
+            messagebox.showinfo("提示", f"未找到变量 {name} 在系统中的值")
+            return
+        
+        system_name, system_value, system_kind, system_scope = env
         
-        messagebox.showinfo("提示", f"未找到变量 {name} 在系统中的值")
+        # 更新当前数据
+        self.env_data.upsert(env)
+        
+        # 更新编辑器显示
+        self.load_env_to_editor(system_name, system_value, system_kind, system_scope)
+        
+        # 只重新分类这一个变量
+        self.diff_engine.update_current(env)
+        self.refresh_tree_row(env)
+        
+        self.status_var.set(f"已恢复 {name} 为系统值")
         
     def show_admin_status(self):
         """显示管理员权限状态"""
@@ -507,193 +619,222 @@ class EnvironmentVariableGUI:
         
     def compare_with_system(self):
         """比较当前数据与系统实际数据的差异"""
-        def compare_worker():
-            try:
-                self.root.after(0, lambda: self.status_var.set("正在获取系统环境变量..."))
-                self.root.after(0, lambda: self.root.config(cursor="wait"))
-                
-                # 获取系统实际数据
-                system_data = get_all_env_list()
-                
-                # 在主线程中更新差异状态
-                self.root.after(0, lambda: self.update_diff_status(system_data))
-                
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("错误", f"比较失败: {str(e)}"))
-                self.root.after(0, lambda: self.status_var.set("比较失败"))
-            finally:
-                self.root.after(0, lambda: self.root.config(cursor=""))
-        
-        # 启动后台线程
-        thread = threading.Thread(target=compare_worker, daemon=True)
-        thread.start()
+        self.begin_busy("正在获取系统环境变量...")
+        self.read_system_env_async(self.update_diff_status, self.job_failed("比较失败", "比较失败"))
     
     def update_diff_status(self, system_data):
-        """更新差异状态并重新渲染树形控件"""
+        """全量更新差异状态并重新渲染树形控件"""
         try:
-            self.system_env_data = system_data
-            self.diff_status = {}
-            
-            # 创建系统数据的查找字典
-            system_dict = {}
-            for env in system_data:
-                name, value, kind, scope = env
-                key = (name, scope)
-                system_dict[key] = (value, kind)
-            
-            # 创建当前数据的查找字典
-            current_dict = {}
-            for env in self.env_data:
-                name, value, kind, scope = env
-                key = (name, scope)
-                current_dict[key] = (value, kind)
-            
-            # 检查当前数据中的变量状态
-            for env in self.env_data:
-                name, value, kind, scope = env
-                key = (name, scope)
-                
-                if key not in system_dict:
-                    # 系统中不存在，标记为新增
-                    self.diff_status[key] = 'added'
-                else:
-                    system_value, system_kind = system_dict[key]
-                    if value != system_value or kind != system_kind:
-                        # 值或类型不同，标记为修改
-                        self.diff_status[key] = 'modified'
-                    else:
-                        # 完全相同
-                        self.diff_status[key] = 'same'
+            self.system_env_data = EnvStore(system_data)
             
-            # 检查系统中存在但当前数据中不存在的变量（已删除）
-            for env in system_data:
-                name, value, kind, scope = env
-                key = (name, scope)
-                if key not in current_dict:
-                    # 添加到当前数据中，但标记为删除状态
-                    self.env_data.append([name, value, kind, scope])
-                    self.diff_status[key] = 'removed'
+            # 去掉上一次比较时追加的已删除行，它们不属于当前编辑数据
+            if self.diff_engine.counts['removed']:
+                for key, status in list(self.diff_status.items()):
+                    if status == 'removed':
+                        self.env_data.remove(key)
             
-            # 更新过滤数据并重新渲染
-            self.filtered_data = self.env_data.copy()
-            self.populate_tree()
+            # 重建索引；系统中存在但当前数据中不存在的变量追加到当前数据中，标记为删除状态
+            removed_rows = self.diff_engine.reset(system_data, self.env_data)
+            self.env_data.extend(removed_rows)
             
-            # 统计差异
-            added_count = sum(1 for status in self.diff_status.values() if status == 'added')
-            modified_count = sum(1 for status in self.diff_status.values() if status == 'modified')
-            removed_count = sum(1 for status in self.diff_status.values() if status == 'removed')
-            same_count = sum(1 for status in self.diff_status.values() if status == 'same')
+            # 重建搜索索引并按当前搜索条件重新渲染
+            self.refresh_view()
             
-            self.status_var.set(f"差异对比完成 - 新增:{added_count}, 修改:{modified_count}, 删除:{removed_count}, 相同:{same_count}")
+            self.status_var.set(f"差异对比完成 - {self.diff_engine.summary()}")
             
         except Exception as e:
             messagebox.showerror("错误", f"更新差异状态失败: {str(e)}")
             self.status_var.set("差异对比失败")
-        
+    
+    def refresh_tree_row(self, env):
+        """只更新树形控件中的一行；该行尚未显示时退回全量同步"""
+        key = env_key(env)
+        self.search_index.update(env)
+        self.path_index.update(env)
+        view = self.virtual_tree if self.virtual_tree.active else self.tree_sync
+        if not view.update_row(env, self.diff_status.get(key, 'same')):
+            self.refresh_view()
+        
+    def read_system_env(self, allow_partial=False):
+        """
+        读取系统环境变量（在后台线程中调用），返回 (变量列表, {失败的作用域: 错误信息})
+
+        不修改任何界面状态，结果交给界面线程中的 accept_system_read。某个作用域读取失败时抛出
+        EnvReadError；allow_partial 为 True 时（只用于显示）改为返回读取成功的作用域。
+        """
+        result = read_env_scopes()
+        if not allow_partial or not result.scopes:
+            return result.check(), {}
+        if result.errors:
+            print(f"部分作用域读取失败: {result.errors}")
+        return result.env_list, result.errors
+    
+    def accept_system_read(self, env_data, errors):
+        """
+        在界面线程中接受一次系统读取的结果，返回 env_data。
+
+        记录失败的作用域，重置监视器的基准；读取完整时把变化记录到历史日志
+        （缺少某个作用域时记录历史会被当作该作用域的变量全部删除）。
+        """
+        self.read_errors = errors
+        if not errors:
+            self.record_history(env_data)
+        self.env_watcher.reset(env_data)
+        return env_data
+    
+    def on_system_changes(self, changes, env_list):
+        """监视器发现系统环境变量变化（在监视线程中调用），交给界面线程处理"""
+        self.jobs.post(self.apply_system_changes, changes, env_list)
+    
+    def apply_system_changes(self, changes, env_list):
+        """
+        把系统中变化的变量增量合并到系统基准数据和差异引擎。
+
+        没有未应用修改的变量直接采用系统中的新值；新增或修改状态的变量保留编辑内容，只重新分类；
+        标记为删除的变量在系统中被修改时仍保持删除状态。changes 为 [(key, EnvVar 或 None)]，
+        env_list 为监视器读取到的完整状态，基准完整时记录到历史日志。
+        """
+        if not self.read_errors:
+            self.record_history(env_list)
+        if not self.system_env_data and not self.env_data:
+            return  # 尚未读取过，第一次完整读取会得到最新状态
+        
+        rows = []
+        refresh_all = len(changes) > WATCH_ROW_LIMIT
+        for key, env in changes:
+            status = self.diff_status.get(key)
+            if env is None:
+                self.system_env_data.remove(key)
+                if status in ('same', 'removed'):
+                    # 未编辑或待删除的变量随系统一起消失
+                    self.env_data.remove(key)
+                    self.diff_engine.remove_current(key)
+                    refresh_all = True
+                if self.diff_engine.remove_system(key) is not None:
+                    rows.append(self.env_data.get(key))
+                continue
+            
+            self.system_env_data.upsert(env)
+            if status in (None, 'same', 'removed'):
+                self.env_data.upsert(env)
+                if status != 'removed':
+                    self.diff_engine.update_current(env)
+            self.diff_engine.update_system(env)
+            rows.append(self.env_data.get(key))
+        
+        if refresh_all:
+            self.refresh_view()
+        else:
+            for row in rows:
+                self.refresh_tree_row(row)
+        self.status_var.set(f"检测到 {len(changes)} 个系统环境变量变化 - {self.diff_engine.summary()}")
+    
+    def record_history(self, env_data):
+        """记录历史失败不影响正常操作"""
+        try:
+            self.history_log.record(env_data)
+        except Exception as e:
+            print(f"记录历史失败: {e}")
+    
     def load_env_vars(self):
-        """在后台线程中读取环境变量"""
-        def load_worker():
-            try:
-                self.status_var.set("正在读取环境变量...")
-                self.root.config(cursor="wait")
-                
-                # 在后台线程中获取环境变量
-                env_data = get_all_env_list()
-                
-                # 在主线程中更新界面
-                self.root.after(0, lambda: self.update_tree_data(env_data))
-                
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("错误", f"读取环境变量失败: {str(e)}"))
-                self.root.after(0, lambda: self.status_var.set("就绪"))
-                self.root.after(0, lambda: self.root.config(cursor=""))
-        
-        # 启动后台线程
-        thread = threading.Thread(target=load_worker, daemon=True)
-        thread.start()
+        """在后台读取环境变量"""
+        self.begin_busy("正在读取环境变量...")
+        self.read_system_env_async(self.update_tree_data, self.job_failed("读取环境变量失败"), allow_partial=True)
     
     def update_tree_data(self, env_data):
         """更新树形控件数据"""
         try:
-            self.env_data = env_data
-            self.system_env_data = env_data.copy()  # 保存为系统基准数据
-            self.filtered_data = env_data.copy()
+            self.env_data = EnvStore(env_data)
+            self.system_env_data = EnvStore(env_data)  # 保存为系统基准数据
             
             # 初始化差异状态 - 全部标记为相同
-            self.diff_status = {}
-            for env in env_data:
-                name, value, kind, scope = env
-                key = (name, scope)
-                self.diff_status[key] = 'same'
+            self.diff_engine.reset(env_data, env_data)
             
-            self.populate_tree()
-            self.status_var.set(f"已加载 {len(env_data)} 个环境变量")
+            self.refresh_view()
+            read_time = get_last_read_time()
+            if self.read_errors:
+                self.status_var.set(
+                    f"已加载 {len(env_data)} 个环境变量 - {'、'.join(self.read_errors)} 环境变量读取失败，未显示"
+                )
+            elif read_time is not None:
+                self.status_var.set(f"已加载 {len(env_data)} 个环境变量 (读取耗时 {read_time * 1000:.0f} ms)")
+            else:
+                self.status_var.set(f"已加载 {len(env_data)} 个环境变量")
         except Exception as e:
             messagebox.showerror("错误", f"更新界面失败: {str(e)}")
-        finally:
-            self.root.config(cursor="")
             
     def populate_tree(self):
-        """填充树形控件并应用差异颜色"""
-        # 清空现有内容
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 按作用域分组
-        user_vars = []
-        machine_vars = []
-        
-        for env in self.filtered_data:
-            name, value, kind, scope = env
-            if scope.lower() == 'user':
-                user_vars.append(env)
-            else:
-                machine_vars.append(env)
-        
-        # 添加用户变量
-        if user_vars:
-            user_root = self.tree.insert('', 'end', text='用户变量', values=('', '', 'User'))
-            for env in user_vars:
-                name, value, kind, scope = env
-                key = (name, scope)
-                
-                # 获取差异状态
-                diff_status = self.diff_status.get(key, 'same')
-                
-                # 根据差异状态应用标签
-                item = self.tree.insert(user_root, 'end', text=name, values=(value, kind, scope), tags=(diff_status,))
-        
-        # 添加系统变量
-        if machine_vars:
-            machine_root = self.tree.insert('', 'end', text='系统变量', values=('', '', 'Machine'))
-            for env in machine_vars:
-                name, value, kind, scope = env
-                key = (name, scope)
-                
-                # 获取差异状态
-                diff_status = self.diff_status.get(key, 'same')
-                
-                # 根据差异状态应用标签
-                item = self.tree.insert(machine_root, 'end', text=name, values=(value, kind, scope), tags=(diff_status,))
+        """填充树形控件并应用差异颜色（只同步发生变化的行）"""
+        if len(self.filtered_data) > VIRTUAL_THRESHOLD:
+            # 行数很多时只渲染可见区域
+            self.virtual_tree.set_rows(self.filtered_data, self.diff_status)
+            return
         
-        # 展开所有节点
-        for item in self.tree.get_children():
-            self.tree.item(item, open=True)
+        self.virtual_tree.deactivate()
+        # 被过滤掉的行只 detach，放宽搜索条件时直接挂回
+        self.tree_sync.sync(self.filtered_data, self.diff_status, keep_keys=self.env_data.keys())
+    
+    def refresh_view(self):
+        """按当前数据重建搜索索引，并按当前搜索条件重新显示"""
+        self.search_index.rebuild(self.env_data)
+        self.path_index.rebuild(self.env_data)
+        self.cancel_search()
+        self.filtered_data = self.search_now()
+        self.populate_tree()
+    
+    def search_now(self):
+        """立即按当前搜索条件查询，返回匹配的变量"""
+        query = self.search_var.get()
+        if self.search_mode_var.get() == SEARCH_MODE_PATH and query.strip():
+            return self.find_vars_with_path(query)
+        return self.search_index.search(query)
+    
+    def find_vars_with_path(self, path):
+        """返回值中包含 path 这一路径段的变量，按变量名排序"""
+        rows = [self.env_data.get(key) for key in self.path_index.lookup(path)]
+        return sorted((env for env in rows if env is not None), key=lambda env: env[0].lower())
     
     def filter_tree(self, *args):
-        """过滤树形控件内容"""
-        search_text = self.search_var.get().lower()
-        if not search_text:
-            self.filtered_data = self.env_data.copy()
-        else:
-            self.filtered_data = []
-            for env in self.env_data:
-                name, value, kind, scope = env
-                if (search_text in name.lower() or 
-                    search_text in value.lower() or 
-                    search_text in scope.lower()):
-                    self.filtered_data.append(env)
-        
+        """搜索框内容变化：防抖后再执行查询"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DELAY_MS, self.run_search)
+    
+    def cancel_search(self):
+        """取消等待中和正在分块执行的查询"""
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        self.search_generation += 1
+    
+    def run_search(self):
+        """开始一次新的查询，之前未完成的查询作废"""
+        self.search_after_id = None
+        self.cancel_search()
+        if self.search_mode_var.get() == SEARCH_MODE_PATH:
+            # 路径查找只是一次字典访问，不需要分块
+            self.filtered_data = self.search_now()
+            self.populate_tree()
+            return
+        steps = self.search_index.search_steps(self.search_var.get())
+        self.continue_search(self.search_generation, steps, self.search_index.generation)
+    
+    def continue_search(self, generation, steps, index_generation):
+        """执行查询的下一块，未完成时让出事件循环后继续"""
+        if generation != self.search_generation:
+            return  # 已被新的输入或数据刷新取代
+        result = next(steps)
+        if result is None:
+            self.search_after_id = self.root.after(
+                1, lambda: self.continue_search(generation, steps, index_generation)
+            )
+            return
+        self.search_after_id = None
+        if index_generation != self.search_index.generation:
+            # 查询期间有行被修改或新增（refresh_tree_row），结果可能漏掉它们，按最新数据重新查询
+            self.run_search()
+            return
+        self.filtered_data = result
         self.populate_tree()
     
     def on_tree_select(self, event):
@@ -734,27 +875,19 @@ class EnvironmentVariableGUI:
             messagebox.showwarning("警告", "变量名不能为空")
             return
         
-        # 查找现有变量并更新，或添加新变量
-        found = False
-        for i, env in enumerate(self.env_data):
-            if env[0] == name and env[3] == scope:
-                self.env_data[i] = [name, value, kind, scope]
-                found = True
-                break
-        
-        if not found:
-            self.env_data.append([name, value, kind, scope])
-        
-        self.filtered_data = self.env_data.copy()
+        # 更新现有变量，或添加新变量
+        env = EnvVar(name, value, kind, scope)
+        self.env_data.upsert(env)
         
         # 自动更新差异状态
         if self.system_env_data:
-            # 如果有系统数据，重新计算差异
-            self.update_diff_status(self.system_env_data)
-            self.status_var.set(f"已更新变量: {name} - 差异已重新计算")
+            # 如果有系统数据，只重新分类这一个变量
+            diff_status = self.diff_engine.update_current(env)
+            self.refresh_tree_row(env)
+            self.status_var.set(f"已更新变量: {name} ({diff_status}) - {self.diff_engine.summary()}")
         else:
             # 如果没有系统数据，只是重新填充树
-            self.populate_tree()
+            self.refresh_view()
             self.status_var.set(f"已更新变量: {name} - 请点击'读取当前环境变量'获取完整状态")
     
     def cancel_edit(self):
@@ -782,7 +915,7 @@ class EnvironmentVariableGUI:
                 values = self.tree.item(item, 'values')
                 if len(values) >= 3:
                     value, kind, scope = values[0], values[1], values[2]
-                    selected_vars.append([name, value, kind, scope])
+                    selected_vars.append(EnvVar(name, value, kind, scope))
         
         return selected_vars
     
@@ -844,24 +977,29 @@ class EnvironmentVariableGUI:
             return
         
         if messagebox.askyesno("确认", f"确定要写入 {len(selected_vars)} 个环境变量到系统吗？\n注意：系统变量需要管理员权限"):
-            def write_worker():
-                try:
-                    self.root.after(0, lambda: self.status_var.set("正在写入环境变量..."))
-                    self.root.after(0, lambda: self.root.config(cursor="wait"))
-                    
-                    set_env_to_system(selected_vars)
-                    
-                    self.root.after(0, lambda: messagebox.showinfo("成功", f"已写入 {len(selected_vars)} 个环境变量"))
-                    self.root.after(0, lambda: self.status_var.set("写入完成"))
-                    
-                except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror("错误", f"写入失败: {str(e)}"))
-                    self.root.after(0, lambda: self.status_var.set("就绪"))
-                finally:
-                    self.root.after(0, lambda: self.root.config(cursor=""))
+            def write_done(result):
+                self.show_batch_result("写入", result)
+                self.status_var.set("写入完成")
             
-            thread = threading.Thread(target=write_worker, daemon=True)
-            thread.start()
+            self.begin_busy("正在写入环境变量...")
+            self.jobs.submit(
+                lambda token: set_env_to_system(selected_vars),
+                on_done=write_done, on_error=self.job_failed("写入失败"), on_finally=self.end_busy, serial=True,
+            )
+    
+    def show_batch_result(self, action, result):
+        """显示批量操作的逐项结果"""
+        if result.ok:
+            messagebox.showinfo("成功", f"已{action} {len(result.succeeded) + len(result.deleted)} 个环境变量")
+            return
+        
+        failed_list = "\n".join([f"- {env[0]} ({env[3]}): {error}" for env, error in result.failed[:10]])
+        if len(result.failed) > 10:
+            failed_list += f"\n... 另有 {len(result.failed) - 10} 个"
+        messagebox.showwarning(
+            "部分失败",
+            f"已{action} {len(result.succeeded) + len(result.deleted)} 个环境变量，{len(result.failed)} 个失败：\n\n{failed_list}"
+        )
     
     def modify_selected_env(self):
         """变更选中的环境变量 - 仅允许修改状态的变量"""
@@ -913,27 +1051,16 @@ class EnvironmentVariableGUI:
             return
         
         if messagebox.askyesno("确认", f"确定要变更 {len(valid_vars)} 个环境变量到系统吗？"):
-            def modify_worker():
-                try:
-                    self.root.after(0, lambda: self.status_var.set("正在变更环境变量..."))
-                    self.root.after(0, lambda: self.root.config(cursor="wait"))
-                    
-                    set_env_to_system(valid_vars)
-                    
-                    self.root.after(0, lambda: messagebox.showinfo("成功", f"已变更 {len(valid_vars)} 个环境变量"))
-                    self.root.after(0, lambda: self.status_var.set("变更完成"))
-                    
-                    # 重新加载并比较
-                    self.root.after(1000, self.load_and_compare_env_vars)
-                    
-                except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror("错误", f"变更失败: {str(e)}"))
-                    self.root.after(0, lambda: self.status_var.set("就绪"))
-                finally:
-                    self.root.after(0, lambda: self.root.config(cursor=""))
+            def modify_done(result):
+                self.show_batch_result("变更", result)
+                self.status_var.set("变更完成")
             
-            thread = threading.Thread(target=modify_worker, daemon=True)
-            thread.start()
+            # 写入后的系统状态由监视器增量合并，无需重新读取
+            self.begin_busy("正在变更环境变量...")
+            self.jobs.submit(
+                lambda token: set_env_to_system(valid_vars),
+                on_done=modify_done, on_error=self.job_failed("变更失败"), on_finally=self.end_busy, serial=True,
+            )
     
     def delete_selected_env(self):
         """删除选中的环境变量"""
@@ -994,56 +1121,63 @@ class EnvironmentVariableGUI:
             return
         
         if messagebox.askyesno("确认", f"确定要从系统中删除 {len(selected_vars)} 个环境变量吗？\n此操作不可恢复！"):
-            def delete_worker():
-                try:
-                    self.root.after(0, lambda: self.status_var.set("正在删除环境变量..."))
-                    self.root.after(0, lambda: self.root.config(cursor="wait"))
-                    
-                    deleted_count = delete_env_vars(selected_vars)
-                    
-                    self.root.after(0, lambda: messagebox.showinfo("完成", f"已删除 {deleted_count} 个环境变量"))
-                    self.root.after(0, lambda: self.status_var.set("删除完成"))
-                    
-                    # 重新加载环境变量
-                    self.root.after(1000, self.load_env_vars)
-                    
-                    # 如果有系统数据，触发差异比较
-                    if hasattr(self, 'system_env_data') and self.system_env_data:
-                        self.root.after(1500, lambda: self.compare_with_system())
-                    
-                except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror("错误", f"删除失败: {str(e)}"))
-                    self.root.after(0, lambda: self.status_var.set("就绪"))
-                finally:
-                    self.root.after(0, lambda: self.root.config(cursor=""))
+            def delete_done(result):
+                # 根据逐项结果直接更新内存数据，无需重新读取
+                self.apply_delete_result(result)
+                self.show_delete_result(result)
             
-            thread = threading.Thread(target=delete_worker, daemon=True)
-            thread.start()
+            self.begin_busy("正在删除环境变量...")
+            self.jobs.submit(
+                lambda token: delete_env_vars(selected_vars),
+                on_done=delete_done, on_error=self.job_failed("删除失败"), on_finally=self.end_busy, serial=True,
+            )
+    
+    def apply_delete_result(self, result):
+        """把删除结果同步到当前数据和系统基准数据"""
+        gone_keys = {(env[0], env[3]) for env in result.deleted + result.missing}
+        if not gone_keys:
+            return
+        
+        for key in gone_keys:
+            self.env_data.remove(key)
+            self.system_env_data.remove(key)
+        
+        if self.diff_status:
+            self.update_diff_status(self.system_env_data)
+        else:
+            self.refresh_view()
+    
+    def show_delete_result(self, result):
+        """显示删除操作的逐项结果"""
+        message = f"已删除 {len(result.deleted)} 个环境变量"
+        if result.missing:
+            message += f"\n{len(result.missing)} 个在系统中已不存在"
+        
+        if result.failed:
+            failed_list = "\n".join([f"- {env[0]} ({env[3]}): {error}" for env, error in result.failed[:10]])
+            if len(result.failed) > 10:
+                failed_list += f"\n... 另有 {len(result.failed) - 10} 个"
+            messagebox.showwarning("部分失败", f"{message}\n{len(result.failed)} 个删除失败：\n\n{failed_list}")
+        else:
+            messagebox.showinfo("完成", message)
+        self.status_var.set(f"删除完成 - 删除:{len(result.deleted)}, 不存在:{len(result.missing)}, 失败:{len(result.failed)}")
     
     def apply_all_changes(self):
-        """应用所有修改的变量到系统"""
+        """把所有新增、修改和删除合并为一个变更计划，一次应用到系统"""
         if not self.diff_status:
             messagebox.showwarning("警告", "请先读取当前环境变量并比较差异")
             return
         
-        # 筛选出所有有变化的变量
-        changed_vars = []
-        for env in self.env_data:
-            name, value, kind, scope = env
-            key = (name, scope)
-            diff_status = self.diff_status.get(key, 'same')
-            
-            if diff_status in ['added', 'modified']:
-                changed_vars.append(env)
+        # 生成变更计划：先删除，再写入新增和修改
+        plan = build_change_plan(self.env_data, self.diff_status)
         
-        if not changed_vars:
+        if plan.is_empty():
             messagebox.showinfo("提示", "没有需要应用的修改")
             return
         
         # 检查是否有系统变量且没有管理员权限
-        has_machine_vars = any(env[3].lower() == 'machine' for env in changed_vars)
-        if has_machine_vars and not self.is_admin:
-            machine_count = sum(1 for env in changed_vars if env[3].lower() == 'machine')
+        machine_count = plan.machine_count()
+        if machine_count and not self.is_admin:
             if messagebox.askyesno(
                 "权限不足", 
                 f"待应用的变量包含 {machine_count} 个系统变量，"
@@ -1053,38 +1187,58 @@ class EnvironmentVariableGUI:
             return
         
         # 统计变更类型
-        added_count = sum(1 for env in changed_vars 
-                         if self.diff_status.get((env[0], env[3]), 'same') == 'added')
-        modified_count = sum(1 for env in changed_vars 
-                           if self.diff_status.get((env[0], env[3]), 'same') == 'modified')
+        added_count = len(plan.added)
+        modified_count = len(plan.modified)
+        removed_count = len(plan.removals)
         
-        confirm_msg = f"确定要应用所有修改到系统吗？\n\n新增: {added_count} 个\n修改: {modified_count} 个\n总计: {len(changed_vars)} 个环境变量"
+        confirm_msg = (
+            f"确定要应用所有修改到系统吗？\n\n新增: {added_count} 个\n修改: {modified_count} 个\n"
+            f"删除: {removed_count} 个\n总计: {len(plan)} 个环境变量"
+        )
         
         if messagebox.askyesno("确认应用所有修改", confirm_msg):
-            def apply_worker():
+            baseline = self.system_env_data.copy()
+            scope = self.snapshot_scope()
+            
+            def apply_worker(token):
+                # 应用前自动为系统当前状态创建快照，未变化的值不会重复写入
                 try:
-                    self.root.after(0, lambda: self.status_var.set("正在应用所有修改..."))
-                    self.root.after(0, lambda: self.root.config(cursor="wait"))
-                    
-                    set_env_to_system(changed_vars)
-                    
-                    self.root.after(0, lambda: messagebox.showinfo(
-                        "成功", 
-                        f"已应用所有修改到系统\n新增: {added_count} 个\n修改: {modified_count} 个"
-                    ))
-                    self.root.after(0, lambda: self.status_var.set("应用完成"))
-                    
-                    # 重新加载并比较
-                    self.root.after(1000, self.load_and_compare_env_vars)
-                    
+                    self.snapshot_store.create(baseline, label="应用修改前自动快照", scope=scope)
                 except Exception as e:
-                    self.root.after(0, lambda: messagebox.showerror("错误", f"应用修改失败: {str(e)}"))
-                    self.root.after(0, lambda: self.status_var.set("就绪"))
-                finally:
-                    self.root.after(0, lambda: self.root.config(cursor=""))
+                    print(f"自动快照失败: {e}")
+                
+                token.check()
+                return apply_change_plan(plan)
+            
+            def apply_done(result):
+                # 根据应用结果更新基准数据，无需重新读取注册表
+                self.apply_plan_result(result)
+                
+                if result.ok:
+                    messagebox.showinfo(
+                        "成功", 
+                        f"已应用所有修改到系统\n新增: {added_count} 个\n修改: {modified_count} 个\n删除: {removed_count} 个"
+                    )
+                else:
+                    self.show_batch_result("应用", result)
             
-            thread = threading.Thread(target=apply_worker, daemon=True)
-            thread.start()
+            self.begin_busy("正在应用所有修改...")
+            self.jobs.submit(
+                apply_worker,
+                on_done=apply_done, on_error=self.job_failed("应用修改失败"), on_finally=self.end_busy, serial=True,
+            )
+    
+    def apply_plan_result(self, result):
+        """用变更计划的应用结果更新系统基准数据并重新计算差异"""
+        system_env_data, env_data = update_baseline(self.system_env_data, self.env_data, result)
+        self.system_env_data = EnvStore(system_env_data)
+        self.env_data = EnvStore(env_data)
+        if not self.read_errors:
+            self.record_history(self.system_env_data)
+        self.update_diff_status(self.system_env_data)
+        self.status_var.set(
+            f"应用完成 - 写入:{len(result.succeeded)}, 删除:{len(result.deleted) + len(result.missing)}, 失败:{len(result.failed)}"
+        )
     
     def backup_env_vars(self):
         """备份当前环境变量"""
@@ -1100,6 +1254,7 @@ class EnvironmentVariableGUI:
             filetypes=[
                 ("YAML files", "*.yaml"),
                 ("JSON files", "*.json"),
+                ("Binary snapshot", "*.envs"),
                 ("All files", "*.*")
             ]
         )
@@ -1108,26 +1263,14 @@ class EnvironmentVariableGUI:
             try:
                 if filename.endswith('.json'):
                     # 保存为JSON格式
-                    backup_data = {
-                        'timestamp': datetime.now().isoformat(),
-                        'count': len(self.env_data),
-                        'variables': []
-                    }
-                    
-                    for env in self.env_data:
-                        name, value, kind, scope = env
-                        backup_data['variables'].append({
-                            'name': name,
-                            'value': value,
-                            'kind': kind,
-                            'scope': scope
-                        })
-                    
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(backup_data, f, ensure_ascii=False, indent=2)
+                    save_env_to_json(self.env_data, filename)
+                elif filename.endswith('.envs'):
+                    # 保存为二进制紧凑快照
+                    write_binary_snapshot(self.env_data, filename)
                 else:
                     # 保存为YAML格式
                     save_env_to_yaml(self.env_data, filename)
+                print(f"环境变量已保存到 {filename}")
                 
                 messagebox.showinfo("成功", f"环境变量已备份到:\n{filename}")
                 self.status_var.set(f"已备份 {len(self.env_data)} 个环境变量")
@@ -1142,87 +1285,186 @@ class EnvironmentVariableGUI:
             filetypes=[
                 ("YAML files", "*.yaml"),
                 ("JSON files", "*.json"),
+                ("Binary snapshot", "*.envs"),
                 ("All files", "*.*")
             ]
         )
         
         if filename:
+            self.start_import(os.path.basename(filename), lambda: iter_env_from_file(filename))
+    
+    def start_import(self, source, load_records, scope=None):
+        """
+        在后台导入一组变量替换当前数据，并与系统环境变量比较差异。
+
+        load_records 返回变量记录的可迭代对象（备份文件的流式读取器或快照）。
+        scope 不为 None 时（只包含一个作用域的快照）另一个作用域保留系统中的现状，不会被标记为删除。
+        新的导入会取消尚未完成的上一次导入。
+        """
+        if self.import_job is not None:
+            self.import_job.cancel()
+        
+        def checked(records, token):
+            # 每读取 1000 条检查一次是否已被取消
+            for count, env in enumerate(records):
+                if count % 1000 == 0:
+                    token.check()
+                yield env
+        
+        def import_worker(token):
+            # 先读取系统环境变量，这样可以在流式读取备份的同时逐条完成差异分类
             try:
-                if filename.endswith('.json'):
-                    # 从JSON格式导入
-                    with open(filename, 'r', encoding='utf-8') as f:
-                        backup_data = json.load(f)
-                    
-                    env_data = []
-                    for var in backup_data.get('variables', []):
-                        env_data.append([
-                            var['name'],
-                            var['value'],
-                            var['kind'],
-                            var['scope']
-                        ])
-                else:
-                    # 从YAML格式导入
-                    env_data = get_env_from_yaml(filename)
-                
-                self.env_data = env_data
-                self.filtered_data = env_data.copy()
-                
-                # 自动读取系统环境变量并进行差异比较
-                def import_and_compare():
-                    try:
-                        # 获取系统环境变量
-                        system_data = get_all_env_list()
-                        
-                        # 在主线程中更新差异状态
-                        self.root.after(0, lambda: self.update_diff_status(system_data))
-                        self.root.after(0, lambda: messagebox.showinfo(
-                            "导入成功", 
-                            f"已导入 {len(env_data)} 个环境变量\n已自动与系统环境变量进行差异比较"
-                        ))
-                        
-                    except Exception as e:
-                        # 如果系统读取失败，只显示导入成功，提示手动比较
-                        self.root.after(0, lambda: self.populate_tree())
-                        self.root.after(0, lambda: messagebox.showinfo(
-                            "导入成功", 
-                            f"已导入 {len(env_data)} 个环境变量\n自动比较失败: {str(e)}\n请手动点击'读取当前环境变量'进行比较"
-                        ))
-                        self.root.after(0, lambda: self.status_var.set(f"已导入 {len(env_data)} 个环境变量 - 请手动比较差异"))
-                
-                # 启动后台线程进行系统环境变量读取和比较
-                import threading
-                thread = threading.Thread(target=import_and_compare, daemon=True)
-                thread.start()
-                
+                system_data, _ = self.read_system_env()
+                compare_error = None
             except Exception as e:
-                messagebox.showerror("错误", f"导入失败: {str(e)}")
+                system_data, compare_error = None, str(e)
+            
+            token.check()
+            if system_data is None:
+                return EnvStore(checked(load_records(), token)), None, None, compare_error
+            records = load_records()
+            if scope is not None:
+                # 另一个作用域保持系统中的现状
+                records = itertools.chain(records, (env for env in system_data if env.scope != scope))
+            engine = DiffEngine()
+            engine.reset(system_data, [])
+            return EnvStore(engine.feed_current(checked(records, token))), engine, system_data, None
+        
+        import_failed = self.job_failed("导入失败")
+        
+        def import_done(result):
+            # 已被新的导入取代（取消时已经读完）的结果直接丢弃
+            if self.import_job is job:
+                self.finish_import(*result)
+        
+        def import_error(e):
+            if self.import_job is job:
+                import_failed(e)
+        
+        self.begin_busy(f"正在导入 {source}...")
+        job = self.import_job = self.jobs.submit(
+            import_worker,
+            on_done=import_done,
+            on_error=import_error,
+            on_finally=self.end_busy,
+        )
+    
+    def finish_import(self, env_data, engine, system_data, compare_error):
+        """用导入的数据替换当前数据；engine 为已完成分类的差异引擎，系统读取失败时为 None"""
+        imported_count = len(env_data)
+        self.env_data = env_data
+        if system_data is not None:
+            self.accept_system_read(system_data, {})
+        
+        if engine is None:
+            # 导入的数据替换了当前数据，旧的差异状态不再适用
+            self.diff_engine.clear()
+            self.refresh_view()
+            messagebox.showinfo(
+                "导入成功", 
+                f"已导入 {imported_count} 个环境变量\n自动比较失败: {compare_error}\n请手动点击'读取当前环境变量'进行比较"
+            )
+            self.status_var.set(f"已导入 {imported_count} 个环境变量 - 请手动比较差异")
+            return
+        
+        # 系统中存在但备份中没有的变量追加到当前数据中，标记为删除状态
+        self.system_env_data = EnvStore(system_data)
+        self.env_data.extend(engine.removed_rows())
+        self.diff_engine = engine
+        self.diff_status = engine.status
+        self.refresh_view()
+        
+        self.status_var.set(f"差异对比完成 - {self.diff_engine.summary()}")
+        messagebox.showinfo(
+            "导入成功", 
+            f"已导入 {imported_count} 个环境变量\n已自动与系统环境变量进行差异比较"
+        )
+    
+    def create_snapshot(self):
+        """为当前数据创建快照"""
+        if not self.env_data:
+            messagebox.showwarning("警告", "没有可以保存的环境变量")
+            return
+        try:
+            info, written = self.snapshot_store.create(self.env_data, label="手动快照", scope=self.snapshot_scope())
+        except Exception as e:
+            messagebox.showerror("错误", f"创建快照失败: {str(e)}")
+            return
+        self.status_var.set(f"已创建快照 {info.id} - {info.count} 个变量，新写入 {written} 个值")
+    
+    def show_snapshots(self):
+        """快照管理对话框：恢复、删除、清理旧快照"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("快照管理")
+        dialog.geometry("600x400")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        listbox = tk.Listbox(dialog)
+        listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        snapshots = []
+        
+        def reload():
+            snapshots[:] = reversed(self.snapshot_store.list())  # 最新的在最上面
+            listbox.delete(0, tk.END)
+            for info in snapshots:
+                created = info.created.replace('T', ' ')[:19]
+                scope = f"  仅{info.scope}" if info.scope else ""
+                listbox.insert(tk.END, f"{created}  {info.count} 个变量{scope}  {info.label}")
+        
+        def selected():
+            selection = listbox.curselection()
+            if not selection:
+                messagebox.showwarning("警告", "请先选择一个快照", parent=dialog)
+                return None
+            return snapshots[selection[0]]
+        
+        def restore():
+            info = selected()
+            if info is None:
+                return
+            dialog.destroy()
+            self.start_import(f"快照 {info.id}", lambda: self.snapshot_store.load(info.id), scope=info.scope)
+        
+        def delete():
+            info = selected()
+            if info is None or not messagebox.askyesno("确认删除", f"确定要删除快照 {info.id} 吗？", parent=dialog):
+                return
+            self.snapshot_store.delete(info.id)
+            self.snapshot_store.gc()
+            reload()
+        
+        def prune():
+            deleted = self.snapshot_store.apply_retention(keep_last=SNAPSHOT_KEEP_LAST)
+            reload()
+            self.status_var.set(f"已清理 {len(deleted)} 个旧快照")
+        
+        try:
+            reload()
+        except Exception as e:
+            dialog.destroy()
+            messagebox.showerror("错误", f"读取快照失败: {str(e)}")
+            return
+        
+        button_frame = ttk.Frame(dialog)
+        button_frame.pack(pady=(0, 10))
+        ttk.Button(button_frame, text="恢复到编辑区", command=restore).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="删除", command=delete).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text=f"只保留最近 {SNAPSHOT_KEEP_LAST} 个", command=prune).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="关闭", command=dialog.destroy).pack(side=tk.LEFT, padx=5)
     
     def load_and_compare_env_vars(self):
         """读取环境变量并与现有数据比较差异"""
-        def load_and_compare_worker():
-            try:
-                self.root.after(0, lambda: self.status_var.set("正在读取环境变量..."))
-                self.root.after(0, lambda: self.root.config(cursor="wait"))
-                
-                # 在后台线程中获取环境变量
-                env_data = get_all_env_list()
-                
-                # 在主线程中更新界面并比较差异
-                self.root.after(0, lambda: self.update_tree_data(env_data))
-                
-                # 如果之前有数据，进行差异比较
-                if self.env_data:
-                    self.root.after(100, lambda: self.update_diff_status(env_data))
-                
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("错误", f"读取环境变量失败: {str(e)}"))
-                self.root.after(0, lambda: self.status_var.set("就绪"))
-                self.root.after(0, lambda: self.root.config(cursor=""))
+        def load_done(env_data):
+            had_data = bool(self.env_data)
+            self.update_tree_data(env_data)
+            
+            # 如果之前有数据，进行差异比较
+            if had_data:
+                self.update_diff_status(env_data)
         
-        # 启动后台线程
-        thread = threading.Thread(target=load_and_compare_worker, daemon=True)
-        thread.start()
+        self.begin_busy("正在读取环境变量...")
+        self.read_system_env_async(load_done, self.job_failed("读取环境变量失败"), allow_partial=True)
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,102 @@
+"""
+环境变量记录类型
+
+EnvVar 取代原来到处传递的 [name, value, kind, scope] 列表：
+不可变、使用 __slots__ 节省内存，scope 和 kind 使用驻留的字符串常量，
+哈希只基于 (name, scope)。
+
+为了兼容旧代码，EnvVar 仍然支持解包 (name, value, kind, scope = env)、
+按下标访问 (env[0]、env[3]) 和 len()。
+"""
+import sys
+
+SCOPE_USER = sys.intern("User")
+SCOPE_MACHINE = sys.intern("Machine")
+KIND_STRING = sys.intern("String")
+KIND_EXPAND_STRING = sys.intern("ExpandString")
+
+_INTERNED = {
+    value: value for value in (SCOPE_USER, SCOPE_MACHINE, KIND_STRING, KIND_EXPAND_STRING)
+}
+
+def intern_value(value):
+    """返回 scope/kind 字符串的驻留版本，相同的值在内存中只保存一份"""
+    interned = _INTERNED.get(value)
+    if interned is None:
+        interned = _INTERNED[value] = sys.intern(value)
+    return interned
+
+class EnvVar:
+    """不可变的环境变量记录"""
+
+    __slots__ = ("name", "value", "kind", "scope")
+
+    def __init__(self, name, value, kind, scope):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "kind", intern_value(kind))
+        object.__setattr__(self, "scope", intern_value(scope))
+
+    @classmethod
+    def from_row(cls, row):
+        """从 EnvVar 或旧的 [name, value, kind, scope] 列表得到 EnvVar"""
+        if isinstance(row, cls):
+            return row
+        name, value, kind, scope = row
+        return cls(name, value, kind, scope)
+
+    @property
+    def key(self):
+        return (self.name, self.scope)
+
+    def replace(self, **changes):
+        """返回修改了部分字段的新记录"""
+        fields = {"name": self.name, "value": self.value, "kind": self.kind, "scope": self.scope}
+        fields.update(changes)
+        return EnvVar(**fields)
+
+    def to_list(self):
+        return [self.name, self.value, self.kind, self.scope]
+
+    def copy(self):
+        # 不可变对象无需复制
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EnvVar 是不可变的，请使用 replace() 创建新记录")
+
+    def __delattr__(self, name):
+        raise AttributeError("EnvVar 是不可变的")
+
+    def __iter__(self):
+        yield self.name
+        yield self.value
+        yield self.kind
+        yield self.scope
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and -4 <= index < 4:
+            return getattr(self, self.__slots__[index])
+        return (self.name, self.value, self.kind, self.scope)[index]
+
+    def __len__(self):
+        return 4
+
+    def __eq__(self, other):
+        if not isinstance(other, EnvVar):
+            return NotImplemented
+        return (
+            self.name == other.name
+            and self.scope == other.scope
+            and self.value == other.value
+            and self.kind == other.kind
+        )
+
+    def __hash__(self):
+        return hash((self.name, self.scope))
+
+    def __reduce__(self):
+        return (EnvVar, (self.name, self.value, self.kind, self.scope))
+
+    def __repr__(self):
+        return f"EnvVar({self.name!r}, {self.value!r}, {self.kind!r}, {self.scope!r})"
@@ -0,0 +1,65 @@
+"""
+以 (name, scope) 为索引的环境变量存储
+"""
+from env_record import EnvVar
+
+def env_key(env):
+    """返回变量的 (name, scope) 键，兼容 EnvVar 和旧的列表"""
+    return env.key if isinstance(env, EnvVar) else (env[0], env[3])
+
+class EnvStore:
+    """
+    包装环境变量列表（EnvVar 或 [name, value, kind, scope]）的数据模型，提供 O(1) 的 (name, scope) 查找。
+
+    遍历顺序与列表相同：更新已有变量保持其位置，新变量追加到末尾，sort 之后按排序顺序遍历。
+    """
+
+    def __init__(self, env_list=None):
+        self._rows = {}  # {(name, scope): EnvVar}，字典本身保持顺序
+        for env in env_list or []:
+            self.upsert(env)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows.values())
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def __repr__(self):
+        return f"EnvStore({list(self._rows.values())!r})"
+
+    def get(self, key, default=None):
+        """按 (name, scope) 查找变量"""
+        return self._rows.get(key, default)
+
+    def upsert(self, env):
+        """新增或替换一个变量，返回 True 表示是新变量"""
+        key = env_key(env)
+        is_new = key not in self._rows
+        self._rows[key] = env
+        return is_new
+
+    append = upsert
+
+    def extend(self, env_list):
+        for env in env_list:
+            self.upsert(env)
+
+    def remove(self, key):
+        """删除一个变量并返回它，不存在时返回 None"""
+        return self._rows.pop(key, None)
+
+    def keys(self):
+        return self._rows.keys()
+
+    def sort(self, key=None):
+        """按给定的排序键重新排列，默认按变量名（不区分大小写）"""
+        key = key or (lambda env: env[0].lower())
+        self._rows = {env_key(env): env for env in sorted(self._rows.values(), key=key)}
+
+    def copy(self):
+        """返回按当前顺序排列的普通列表"""
+        return list(self._rows.values())
@@ -1,175 +1,715 @@
+import json
 import subprocess
-from tqdm import tqdm
-
-def get_all_env_list():
-    """获取所有环境变量列表，包括用户和系统环境变量"""
-    env_list = []
-
-    # 获取所有用户环境变量
-    user_ps_script = """
-    $envVars = @()
-    $userKey = Get-Item -Path 'HKCU:\\Environment' -ErrorAction SilentlyContinue
-    if ($userKey) {
-        foreach ($name in $userKey.GetValueNames()) {
-            try {
-                $value = $userKey.GetValue($name, '', 'DoNotExpandEnvironmentNames')
-                $kind = $userKey.GetValueKind($name)
-                $output = '{0}|{1}|{2}|User' -f $name, $value, $kind
-                $envVars += $output
-            } catch {
-                Write-Host "Error reading user env var: $name" -ForegroundColor Yellow
-            }
-        }
-    }
-    $envVars | ForEach-Object { Write-Output $_ }
-    """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from env_record import EnvVar, SCOPE_MACHINE, SCOPE_USER, KIND_EXPAND_STRING, KIND_STRING
+from ps_worker import WorkerClient, WorkerError
 
-    try:
-        user_result = subprocess.run(
-            ["powershell", "-Command", user_ps_script],
-            capture_output=True,
-            text=True,
-            check=True,
+try:
+    import winreg
+except ImportError:  # 非 Windows 平台
+    winreg = None
+
+# get_all_env_list 结果的默认缓存时间（秒），0 表示不缓存
+CACHE_TTL = 1.0
+
+# 同步和异步接口同时执行的后端调用数量上限，超出的调用排队等待
+ASYNC_CONCURRENCY = 4
+
+# RegistryBackend.read_scopes 读取的作用域，并发读取后按此顺序合并
+SCOPES = (SCOPE_USER, SCOPE_MACHINE)
+
+USER_ENV_PATH = "HKCU:\\Environment"
+MACHINE_ENV_PATH = "HKLM:\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment"
+SCOPE_PATHS = {SCOPE_USER: USER_ENV_PATH, SCOPE_MACHINE: MACHINE_ENV_PATH}
+
+# 读取一个作用域（用 str.format 填入 path 和 scope），注册表键无法打开时进程以非零退出码结束
+# 结果以 JSON 输出，值中包含 | 或换行也不会被截断
+READ_SCOPE_PS_SCRIPT = """
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+$rows = New-Object System.Collections.ArrayList
+$key = Get-Item -Path '{path}' -ErrorAction Stop
+foreach ($name in $key.GetValueNames()) {{
+    try {{
+        $value = $key.GetValue($name, '', 'DoNotExpandEnvironmentNames')
+        $kind = $key.GetValueKind($name).ToString()
+        [void]$rows.Add(@($name, [string]$value, $kind, '{scope}'))
+    }} catch {{
+        Write-Host "Error reading env var: $name" -ForegroundColor Yellow
+    }}
+}}
+ConvertTo-Json -InputObject $rows -Compress
+"""
+
+# 批量应用：变更列表以 JSON 形式从标准输入传入，逐项输出 OK/MISSING/ERR 结果
+# op 为 set 时写入变量，为 delete 时先检查值是否存在再删除
+APPLY_PS_SCRIPT = f"""
+[Console]::OutputEncoding = [System.Text.Encoding]::UTF8
+$items = [Console]::In.ReadToEnd() | ConvertFrom-Json
+$items = @($items)
+$paths = @{{ 'User' = '{USER_ENV_PATH}'; 'Machine' = '{MACHINE_ENV_PATH}' }}
+for ($i = 0; $i -lt $items.Count; $i++) {{
+    $item = $items[$i]
+    try {{
+        if ($item.op -eq 'set') {{
+            Set-ItemProperty -Path $paths[$item.scope] -Name $item.name -Value $item.value -Type $item.kind -ErrorAction Stop
+            Write-Output "OK`t$i"
+        }} else {{
+            $key = Get-Item -Path $paths[$item.scope] -ErrorAction Stop
+            if ($null -eq $key.GetValue($item.name, $null)) {{
+                Write-Output "MISSING`t$i"
+            }} else {{
+                Remove-ItemProperty -Path $paths[$item.scope] -Name $item.name -ErrorAction Stop
+                Write-Output "OK`t$i"
+            }}
+        }}
+    }} catch {{
+        Write-Output ("ERR`t$i`t" + ($_.Exception.Message -replace '\\s+', ' '))
+    }}
+}}
+"""
+
+def normalize_scope(scope):
+    """统一作用域写法，非 Machine 的一律视为 User"""
+    return SCOPE_MACHINE if scope.lower() == "machine" else SCOPE_USER
+
+def normalize_kind(kind):
+    """统一值类型，非 ExpandString 的一律按 String 写入"""
+    return KIND_EXPAND_STRING if kind == "ExpandString" else KIND_STRING
+
+class BatchResult:
+    """批量操作的逐项结果"""
+
+    def __init__(self):
+        self.succeeded = []  # 成功写入的 EnvVar
+        self.deleted = []  # 成功删除的变量
+        self.missing = []  # 要删除但系统中本就不存在的变量
+        self.failed = []  # (env, 错误信息)
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    def __repr__(self):
+        return (
+            f"BatchResult(succeeded={len(self.succeeded)}, deleted={len(self.deleted)}, "
+            f"missing={len(self.missing)}, failed={len(self.failed)})"
         )
 
-        for line in tqdm(
-            user_result.stdout.strip().split("\n"),
-            desc="Processing User environment variables",
-        ):
-            line = line.strip()
-            if line and "|" in line:
-                parts = line.split("|", 3)
-                if len(parts) == 4:
-                    name, value, kind, scope = parts
-                    env_list.append([name, value, kind, scope])
-
-    except subprocess.CalledProcessError as e:
-        print(f"获取用户环境变量失败: {e}")
-
-    # 获取所有系统环境变量
-    machine_ps_script = """
-    $envVars = @()
-    $machineKey = Get-Item -Path 'HKLM:\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment' -ErrorAction SilentlyContinue
-    if ($machineKey) {
-        foreach ($name in $machineKey.GetValueNames()) {
-            try {
-                $value = $machineKey.GetValue($name, '', 'DoNotExpandEnvironmentNames')
-                $kind = $machineKey.GetValueKind($name)
-                $output = '{0}|{1}|{2}|Machine' -f $name, $value, $kind
-                $envVars += $output
-            } catch {
-                Write-Host "Error reading machine env var: $name" -ForegroundColor Yellow
-            }
-        }
-    }
-    $envVars | ForEach-Object { Write-Output $_ }
+class EnvReadError(Exception):
     """
+    读取环境变量失败
 
-    try:
-        machine_result = subprocess.run(
-            ["powershell", "-Command", machine_ps_script],
+    errors 为 {作用域: 错误信息}；env_list 是读取成功的作用域中的变量。只有确认只使用这些作用域时
+    才能继续使用 env_list，否则读取失败的作用域会被当作没有任何变量（例如在差异比较中全部变成删除）。
+    """
+
+    def __init__(self, errors, env_list=()):
+        self.errors = dict(errors)
+        self.env_list = list(env_list)
+        details = "; ".join(f"{scope}: {error}" for scope, error in self.errors.items())
+        super().__init__(f"读取环境变量失败 ({details})")
+
+class ReadResult:
+    """
+    按作用域读取的结果
+
+    env_list 只包含读取成功的作用域中的变量，errors 为读取失败的作用域 {作用域: 错误信息}。
+    errors 不为空时，只有确认只使用读取成功的作用域（scopes）才能继续使用 env_list。
+    """
+
+    def __init__(self, env_list, errors=None, times=None):
+        self.env_list = env_list
+        self.errors = dict(errors or {})
+        self.times = dict(times or {})  # {作用域: 读取耗时（秒）}
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def scopes(self):
+        """读取成功的作用域"""
+        return [scope for scope in SCOPES if scope not in self.errors]
+
+    def copy(self):
+        return ReadResult(list(self.env_list), self.errors, self.times)
+
+    def check(self, scopes=SCOPES):
+        """scopes 中有作用域读取失败时抛出 EnvReadError，否则返回 env_list"""
+        errors = {scope: error for scope, error in self.errors.items() if scope in scopes}
+        if errors:
+            raise EnvReadError(errors, self.env_list)
+        return self.env_list
+
+    def __repr__(self):
+        return f"ReadResult(count={len(self.env_list)}, errors={self.errors})"
+
+# winreg 的值类型与 PowerShell RegistryValueKind 名称的对应关系
+WINREG_KIND_NAMES = {
+    1: "String",  # REG_SZ
+    2: "ExpandString",  # REG_EXPAND_SZ
+    3: "Binary",  # REG_BINARY
+    4: "DWord",  # REG_DWORD
+    7: "MultiString",  # REG_MULTI_SZ
+    11: "QWord",  # REG_QWORD
+}
+
+def make_operations(upserts, removals):
+    """生成有序的操作列表：先删除再写入"""
+    return [("delete", env) for env in removals] + [("set", env) for env in upserts]
+
+def collect_results(operations, reported, result):
+    """把 {序号: (状态, 错误信息)} 形式的逐项结果归入 BatchResult，没有回报的项视为失败"""
+    for i, (op, env) in enumerate(operations):
+        status, message = reported.get(i, ("ERR", "未返回执行结果"))
+        if status == "OK":
+            (result.succeeded if op == "set" else result.deleted).append(EnvVar.from_row(env))
+        elif status == "MISSING":
+            result.missing.append(EnvVar.from_row(env))
+        else:
+            result.failed.append((EnvVar.from_row(env), message))
+
+class RegistryBackend:
+    """注册表访问后端基类，所有读写操作都通过后端完成"""
+
+    parallel_reads = True  # read_scopes 是否并发读取各作用域
+
+    def __init__(self):
+        self.scope_times = {}  # 最近一次 read_scopes 中每个作用域的读取耗时（秒）
+        self.scope_errors = {}  # 最近一次 read_scopes 中读取失败的作用域及错误信息
+
+    def read_scope(self, scope):
+        """读取一个作用域的环境变量，返回 EnvVar 列表，失败时抛出异常"""
+        raise NotImplementedError
+
+    def _timed_read(self, scope):
+        start = time.perf_counter()
+        try:
+            return self.read_scope(scope), None, time.perf_counter() - start
+        except Exception as e:
+            return [], e, time.perf_counter() - start
+
+    def read_scopes(self):
+        """
+        分别读取用户和系统环境变量，返回 ReadResult
+
+        两个作用域并发读取，总耗时取决于较慢的一个。某个作用域读取失败（例如没有管理员权限）
+        不影响另一个作用域，失败的作用域记录在结果的 errors 中。
+        """
+        if self.parallel_reads:
+            with ThreadPoolExecutor(max_workers=len(SCOPES), thread_name_prefix="env-read") as pool:
+                results = list(pool.map(self._timed_read, SCOPES))
+        else:
+            results = [self._timed_read(scope) for scope in SCOPES]
+
+        env_list = []
+        times = {}
+        errors = {}
+        for scope, (rows, error, elapsed) in zip(SCOPES, results):
+            times[scope] = elapsed
+            if error is not None:
+                errors[scope] = str(error)
+            env_list.extend(rows)
+        self.scope_times = times
+        self.scope_errors = errors
+        return ReadResult(env_list, errors, times)
+
+    def read_all(self):
+        """读取用户和系统环境变量，返回 EnvVar 列表；任何一个作用域读取失败时抛出 EnvReadError"""
+        return self.read_scopes().check()
+
+    def apply(self, upserts, removals):
+        """在一次后端调用中先删除 removals，再写入 upserts，返回 BatchResult"""
+        raise NotImplementedError
+
+    def set_values(self, env_list):
+        """在一次后端调用中写入全部变量，返回 BatchResult"""
+        return self.apply(env_list, [])
+
+    def delete_values(self, env_list):
+        """在一次后端调用中删除全部变量，返回 BatchResult"""
+        return self.apply([], env_list)
+
+class PowerShellBackend(RegistryBackend):
+    """
+    通过 PowerShell 访问注册表的后端
+
+    每个作用域由一个 PowerShell 进程读取，两个进程并发运行，总耗时约等于一次进程启动。
+    """
+
+    def __init__(self, executable="powershell"):
+        super().__init__()
+        self.executable = executable
+        self.launch_count = 0  # 启动的 PowerShell 进程数
+
+    def run_script(self, script, input_text=None):
+        """启动一个 PowerShell 进程执行脚本，返回标准输出"""
+        self.launch_count += 1
+        result = subprocess.run(
+            [self.executable, "-NoProfile", "-Command", script],
+            input=input_text,
             capture_output=True,
             text=True,
+            encoding="utf-8",
+            errors="replace",
             check=True,
         )
+        return result.stdout
 
-        for line in tqdm(
-            machine_result.stdout.strip().split("\n"),
-            desc="Processing Machine environment variables",
-        ):
-            line = line.strip()
-            if line and "|" in line:
-                parts = line.split("|", 3)
-                if len(parts) == 4:
-                    name, value, kind, scope = parts
-                    env_list.append([name, value, kind, scope])
+    def read_scope(self, scope):
+        try:
+            output = self.run_script(READ_SCOPE_PS_SCRIPT.format(path=SCOPE_PATHS[scope], scope=scope))
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(e.stderr.strip() if e.stderr else str(e)) from e
 
-    except subprocess.CalledProcessError as e:
-        print(f"获取系统环境变量失败: {e}")
+        output = output.strip()
+        if not output:
+            return []
+        try:
+            rows = json.loads(output)
+        except ValueError as e:
+            raise ValueError(f"解析结果失败: {e}") from e
 
-    # 按名称排序
-    env_list.sort(key=lambda x: x[0].lower())
-    return env_list
+        # 进度条只在输出到终端时显示；延迟导入，命令行工具不需要为此多花几十毫秒启动时间
+        from tqdm import tqdm
+        return [
+            EnvVar(name, value, kind, scope)
+            for name, value, kind, scope in tqdm(rows, desc=f"Processing {scope} environment variables", disable=None)
+        ]
 
-def set_env_to_system(env_list):
-    """将环境变量列表写入系统"""
-    user_count = 0
-    machine_count = 0
-
-    for env in tqdm(env_list, desc="Setting environment variables"):
-        name, value, kind, scope = env
-
-        # 转义单引号，但不要对反斜杠进行双重转义
-        escaped_name = name.replace("'", "''")
-        escaped_value = value.replace("'", "''")
-
-        if scope.lower() == "machine":
-            # 设置系统环境变量
-            hive = "HKLM"
-            subkey = "SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment"
-            machine_count += 1
-        else:
-            # 设置用户环境变量
-            hive = "HKCU"
-            subkey = "Environment"
-            user_count += 1
-
-        # 根据数据类型设置环境变量
-        if kind == "ExpandString":
-            kind_flag = "ExpandString"
-        else:
-            kind_flag = "String"
+    def apply(self, upserts, removals):
+        result = BatchResult()
+        operations = make_operations(upserts, removals)
+        if not operations:
+            return result
+
+        items = [
+            {"op": op, "name": name, "value": value, "kind": normalize_kind(kind), "scope": normalize_scope(scope)}
+            for op, (name, value, kind, scope) in operations
+        ]
+        try:
+            output = self.run_script(APPLY_PS_SCRIPT, json.dumps(items))
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.strip() if e.stderr else str(e)
+            result.failed.extend((EnvVar.from_row(env), error) for op, env in operations)
+            return result
+
+        # 按序号收集每一项的结果，脚本没有回报的项视为失败
+        reported = {}
+        for line in output.splitlines():
+            parts = line.strip().split("\t", 2)
+            if len(parts) >= 2 and parts[0] in ("OK", "MISSING", "ERR") and parts[1].isdigit():
+                reported[int(parts[1])] = (parts[0], parts[2] if len(parts) == 3 else "")
+
+        collect_results(operations, reported, result)
+        return result
+
+class WorkerBackend(RegistryBackend):
+    """
+    通过常驻工作进程访问注册表的后端，所有请求共用一个进程
+
+    两个作用域的读取作为两个请求流水线发送，工作进程依次处理，每个作用域单独报告错误和耗时。
+    """
+
+    def __init__(self, client=None):
+        super().__init__()
+        self.client = client or WorkerClient()
+
+    @property
+    def launch_count(self):
+        return self.client.start_count
+
+    def read_scope(self, scope):
+        # 超时或进程崩溃时抛出 WorkerError，该作用域记为读取失败，不会被当作没有任何变量
+        return [EnvVar(*row) for row in self.client.request("read_scope", {"scope": scope})]
 
+    def apply(self, upserts, removals):
+        result = BatchResult()
+        operations = make_operations(upserts, removals)
+        if not operations:
+            return result
+
+        items = [
+            {"op": op, "name": name, "value": value, "kind": normalize_kind(kind), "scope": normalize_scope(scope)}
+            for op, (name, value, kind, scope) in operations
+        ]
+        try:
+            statuses = self.client.request("apply", {"items": items})
+        except WorkerError as e:
+            result.failed.extend((EnvVar.from_row(env), str(e)) for op, env in operations)
+            return result
+
+        collect_results(operations, {i: tuple(status) for i, status in enumerate(statuses)}, result)
+        return result
+
+class WinRegBackend(RegistryBackend):
+    """通过 winreg 直接读写注册表的后端，不需要启动任何进程，仅在 Windows 上可用"""
+
+    KEYS = {
+        "User": ("HKEY_CURRENT_USER", "Environment"),
+        "Machine": ("HKEY_LOCAL_MACHINE", "SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment"),
+    }
+
+    def __init__(self):
+        if winreg is None:
+            raise RuntimeError("winreg 仅在 Windows 上可用")
+        super().__init__()
+        self.launch_count = 0  # 不启动进程，始终为 0
+
+    def open_key(self, scope, access):
+        hive, subkey = self.KEYS[scope]
+        return winreg.OpenKey(getattr(winreg, hive), subkey, 0, access)
+
+    def read_scope(self, scope):
+        env_list = []
+        with self.open_key(scope, winreg.KEY_READ) as key:
+            index = 0
+            while True:
+                try:
+                    name, value, value_type = winreg.EnumValue(key, index)
+                except OSError:
+                    break
+                index += 1
+                if isinstance(value, list):
+                    value = "\n".join(value)
+                elif not isinstance(value, str):
+                    value = str(value)
+                env_list.append(EnvVar(name, value, WINREG_KIND_NAMES.get(value_type, "Unknown"), scope))
+        return env_list
+
+    def apply(self, upserts, removals):
+        result = BatchResult()
+        keys = {}  # 每个作用域只打开一次可写键，打开失败时记录异常
         try:
-            # 使用更简单的 PowerShell 命令设置环境变量
-            if scope.lower() == "machine":
-                ps_command = f"Set-ItemProperty -Path 'HKLM:\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment' -Name '{escaped_name}' -Value '{escaped_value}' -Type {kind_flag}"
+            for op, env in make_operations(upserts, removals):
+                name, value, kind, scope = env
+                scope = normalize_scope(scope)
+                try:
+                    if scope not in keys:
+                        try:
+                            keys[scope] = self.open_key(scope, winreg.KEY_READ | winreg.KEY_SET_VALUE)
+                        except OSError as e:
+                            keys[scope] = e
+                    if isinstance(keys[scope], OSError):
+                        raise keys[scope]
+                    key = keys[scope]
+
+                    if op == "set":
+                        value_type = winreg.REG_EXPAND_SZ if normalize_kind(kind) == "ExpandString" else winreg.REG_SZ
+                        winreg.SetValueEx(key, name, 0, value_type, value)
+                        result.succeeded.append(EnvVar.from_row(env))
+                        continue
+
+                    try:
+                        winreg.QueryValueEx(key, name)
+                    except FileNotFoundError:
+                        result.missing.append(EnvVar.from_row(env))
+                        continue
+                    winreg.DeleteValue(key, name)
+                    result.deleted.append(EnvVar.from_row(env))
+                except OSError as e:
+                    result.failed.append((EnvVar.from_row(env), e.strerror or str(e)))
+        finally:
+            for key in keys.values():
+                if not isinstance(key, OSError):
+                    key.Close()
+        return result
+
+class MemoryBackend(RegistryBackend):
+    """
+    基于内存字典的后端，用于测试和性能基准，可在 Linux 上运行。
+
+    行为与注册表保持一致：变量名不区分大小写并保留首次写入时的大小写，
+    写入的值类型只会是 String 或 ExpandString，删除不存在的变量报告为 missing。
+    """
+
+    def __init__(self, env_list=None, latency=0.0, read_only_scopes=(), scope_latency=None, unreadable_scopes=()):
+        super().__init__()
+        self.data = {SCOPE_USER: {}, SCOPE_MACHINE: {}}  # {scope: {NAME: EnvVar}}
+        self.latency = latency  # 每次调用模拟的延迟（秒），例如进程启动开销
+        self.read_only_scopes = set(read_only_scopes)  # 模拟没有写权限的作用域
+        self.scope_latency = dict(scope_latency or {})  # {scope: 秒}，读取每个作用域额外的模拟延迟
+        self.unreadable_scopes = set(unreadable_scopes)  # 模拟没有读权限的作用域
+        self.launch_count = 0  # 模拟的进程启动次数
+        for name, value, kind, scope in env_list or []:
+            scope = normalize_scope(scope)
+            self.data[scope][name.upper()] = EnvVar(name, value, kind, scope)
+
+    def _call(self):
+        """模拟一次后端调用"""
+        self.launch_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def read_scopes(self):
+        self._call()
+        return super().read_scopes()
+
+    def read_scope(self, scope):
+        if self.scope_latency.get(scope):
+            time.sleep(self.scope_latency[scope])
+        if scope in self.unreadable_scopes:
+            raise PermissionError("拒绝访问")
+        return list(self.data[scope].values())
+
+    def apply(self, upserts, removals):
+        result = BatchResult()
+        if not upserts and not removals:
+            return result
+
+        self._call()
+        for op, env in make_operations(upserts, removals):
+            name, value, kind, scope = env
+            scope = normalize_scope(scope)
+            variables = self.data[scope]
+            if scope in self.read_only_scopes:
+                result.failed.append((EnvVar.from_row(env), "拒绝访问"))
+            elif op == "set":
+                stored_name = variables[name.upper()].name if name.upper() in variables else name
+                variables[name.upper()] = EnvVar(stored_name, value, normalize_kind(kind), scope)
+                result.succeeded.append(EnvVar.from_row(env))
+            elif name.upper() in variables:
+                del variables[name.upper()]
+                result.deleted.append(EnvVar.from_row(env))
             else:
-                ps_command = f"Set-ItemProperty -Path 'HKCU:\\Environment' -Name '{escaped_name}' -Value '{escaped_value}' -Type {kind_flag}"
+                result.missing.append(EnvVar.from_row(env))
+        return result
 
-            result = subprocess.run(
-                ["powershell", "-Command", ps_command],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
+class ReadCache:
+    """
+    按作用域读取（ReadResult）的单飞读取与短期缓存
 
-        except subprocess.CalledProcessError as e:
-            print(f"设置环境变量 {name} 失败: {e.stderr if e.stderr else str(e)}")
-            continue
+    同时到达的读取共用一次后端调用；结果在 ttl 秒内直接返回副本。通过 env_utils 写入或删除后
+    缓存失效，失效前已经开始的读取结果不会写入缓存。读取失败（包括只有部分作用域失败）时不缓存，
+    同一个结果或异常交给所有等待这次读取的调用方。
+    """
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.value = None
+        self.expires = 0.0
+        self.inflight = None  # 正在进行的读取: [完成事件, 结果, 异常]
+        self.generation = 0  # 失效次数
+        self.hits = 0  # 直接使用缓存
+        self.coalesced = 0  # 等待并共用正在进行的读取
+        self.misses = 0  # 实际调用后端
+
+    def get(self, load, fresh=False):
+        """返回缓存的结果或调用 load()；fresh 为 True 时总是重新读取并更新缓存"""
+        with self.lock:
+            if not fresh and self.value is not None and time.monotonic() < self.expires:
+                self.hits += 1
+                return self.value.copy()
+            if not fresh and self.inflight is not None:
+                self.coalesced += 1
+                flight = self.inflight
+                leader = False
+            else:
+                self.misses += 1
+                flight = self.inflight = [threading.Event(), None, None]
+                generation = self.generation
+                leader = True
+
+        if not leader:
+            flight[0].wait()
+            if flight[2] is not None:
+                raise flight[2]
+            return flight[1].copy()
+
+        try:
+            flight[1] = load()
+        except BaseException as e:
+            flight[2] = e
+            raise
+        finally:
+            with self.lock:
+                if self.inflight is flight:
+                    self.inflight = None
+                if flight[2] is None and flight[1].ok and generation == self.generation and self.ttl > 0:
+                    self.value = flight[1]
+                    self.expires = time.monotonic() + self.ttl
+            flight[0].set()
+        return flight[1].copy()
+
+    def invalidate(self):
+        """丢弃缓存；之后的读取不会再共用失效前开始的读取"""
+        with self.lock:
+            self.value = None
+            self.inflight = None
+            self.generation += 1
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "coalesced": self.coalesced, "misses": self.misses, "ttl": self.ttl}
+
+_backend = None
+_last_read_time = None
+_read_cache = ReadCache()
+_async_pool = None  # 同步和异步接口共用的有界线程池（首次调用时创建）
+_async_pool_lock = threading.Lock()
+
+def get_backend():
+    """获取当前使用的注册表后端（首次调用时创建）"""
+    global _backend
+    if _backend is None:
+        # Windows 上直接使用 winreg，其他情况退回常驻 PowerShell 工作进程
+        _backend = WinRegBackend() if winreg is not None else WorkerBackend()
+    return _backend
+
+def set_backend(backend):
+    """替换注册表后端，例如在测试和基准中使用 MemoryBackend"""
+    global _backend
+    _backend = backend
+    _read_cache.invalidate()
+
+def set_cache_ttl(seconds):
+    """设置 get_all_env_list 的缓存时间（秒），0 表示不缓存"""
+    _read_cache.ttl = seconds
+    _read_cache.invalidate()
+
+def invalidate_env_cache():
+    """丢弃缓存的读取结果，例如得知注册表在本程序之外被修改后"""
+    _read_cache.invalidate()
 
+def get_cache_stats():
+    """返回读取缓存的命中统计 {hits, coalesced, misses, ttl}"""
+    return _read_cache.stats()
+
+def get_last_scope_times():
+    """返回最近一次读取中每个作用域的耗时 {scope: 秒}；不按作用域读取的后端返回空字典"""
+    return dict(get_backend().scope_times)
+
+def get_last_read_time():
+    """返回最近一次 get_all_env_list 的耗时（秒），尚未读取时返回 None"""
+    return _last_read_time
+
+def _read_scopes_sorted():
+    global _last_read_time
+
+    start = time.perf_counter()
+    result = get_backend().read_scopes()
+
+    # 按名称排序
+    result.env_list.sort(key=lambda x: x.name.lower())
+    _last_read_time = time.perf_counter() - start
+    return result
+
+def read_env_scopes(fresh=False):
+    """
+    分别读取用户和系统环境变量，返回 ReadResult
+
+    一个作用域读取失败不影响另一个：结果中包含读取成功的作用域的变量，失败的作用域及错误信息在 errors 中。
+    同时进行的调用共用一次读取，CACHE_TTL 秒内的重复调用直接返回缓存的副本（只缓存完整的读取）；
+    fresh 为 True 时跳过缓存重新读取（例如收到注册表变化通知后）。
+    """
+    return _run_sync(_read_cached, fresh)
+
+def get_all_env_list(fresh=False):
+    """
+    获取所有环境变量列表，包括用户和系统环境变量
+
+    任何一个作用域读取失败时抛出 EnvReadError，不会把缺少该作用域的列表当作完整结果返回；
+    只需要部分作用域或可以接受部分结果时使用 read_env_scopes。
+    """
+    return read_env_scopes(fresh).check()
+
+def set_env_to_system(env_list):
+    """将环境变量列表写入系统，所有变量在一次后端调用中完成，返回 BatchResult"""
+    result = _run_sync(_write, "set_values", env_list)
+
+    for env, error in result.failed:
+        print(f"设置环境变量 {env[0]} 失败: {error}")
+
+    user_count = sum(1 for env in result.succeeded if normalize_scope(env[3]) == "User")
+    machine_count = len(result.succeeded) - user_count
     print(f"成功设置 {user_count} 个用户环境变量和 {machine_count} 个系统环境变量")
-    print("注意: 系统环境变量需要管理员权限才能设置成功")
+    if result.failed:
+        print("注意: 系统环境变量需要管理员权限才能设置成功")
+    return result
+
+def apply_changes(upserts, removals):
+    """在一次后端调用中应用一组写入和删除，返回 BatchResult"""
+    result = _run_sync(_write, "apply", upserts, removals)
+
+    for env, error in result.failed:
+        print(f"✗ {env[0]} ({env[3]}) 应用失败: {error}")
+
+    print(
+        f"应用结果: 写入 {len(result.succeeded)}/{len(upserts)} 个，删除 {len(result.deleted)}/{len(removals)} 个，"
+        f"不存在 {len(result.missing)} 个，失败 {len(result.failed)} 个"
+    )
+    return result
 
 def delete_env_vars(env_list):
-    """删除环境变量"""
-    deleted_count = 0
+    """删除环境变量，所有变量在一次后端调用中完成，返回 BatchResult"""
+    result = _run_sync(_write, "delete_values", env_list)
 
-    for env in tqdm(env_list, desc="Deleting environment variables"):
-        name, value, kind, scope = env
+    for env, error in result.failed:
+        print(f"✗ 删除 {env[0]} ({env[3]}) 失败: {error}")
+    for env in result.missing:
+        print(f"- {env[0]} ({env[3]}) 在系统中不存在")
 
-        # 转义单引号
-        escaped_name = name.replace("'", "''")
+    print(
+        f"\n删除结果: 成功删除 {len(result.deleted)}/{len(env_list)} 个环境变量，"
+        f"不存在 {len(result.missing)} 个，失败 {len(result.failed)} 个"
+    )
+    return result
 
-        if scope.lower() == "machine":
-            # 删除系统环境变量
-            ps_command = f"Remove-ItemProperty -Path 'HKLM:\\SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment' -Name '{escaped_name}' -ErrorAction SilentlyContinue"
-        else:
-            # 删除用户环境变量
-            ps_command = f"Remove-ItemProperty -Path 'HKCU:\\Environment' -Name '{escaped_name}' -ErrorAction SilentlyContinue"
+def _run_sync(fn, *args):
+    """
+    同步接口：在与异步接口共用的有界线程池中执行后端调用并等待结果。
 
-        try:
-            result = subprocess.run(
-                ["powershell", "-Command", ps_command],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
+    不经过事件循环，在任何线程中都可以调用（包括正在运行事件循环的线程，只是会阻塞它）。
+    """
+    return _get_async_pool().submit(fn, *args).result()
 
-            deleted_count += 1
+def _get_async_pool():
+    global _async_pool
+    with _async_pool_lock:
+        if _async_pool is None:
+            _async_pool = ThreadPoolExecutor(max_workers=ASYNC_CONCURRENCY, thread_name_prefix="env-async")
+        return _async_pool
 
-        except subprocess.CalledProcessError as e:
-            print(f"✗ 删除 {name} ({scope}) 失败: {e.stderr if e.stderr else str(e)}")
+async def _run_blocking(fn, *args, timeout=None):
+    """
+    在有界线程池中执行阻塞的后端调用，超时抛出 asyncio.TimeoutError。
+
+    还在排队的调用被取消或超时后不会再执行；已经开始的后端调用无法中断，会在后台完成，结果被丢弃。
+    """
+    import asyncio
+
+    future = asyncio.get_running_loop().run_in_executor(_get_async_pool(), fn, *args)
+    return await asyncio.wait_for(future, timeout)
+
+def _write(method, *args):
+    try:
+        return getattr(get_backend(), method)(*args)
+    finally:
+        # 写入失败也可能已经修改了部分变量
+        _read_cache.invalidate()
+
+def _read_cached(fresh):
+    return _read_cache.get(_read_scopes_sorted, fresh)
+
+async def read_env_scopes_async(fresh=False, timeout=None):
+    """read_env_scopes 的异步版本，与同步调用共用读取缓存"""
+    return await _run_blocking(_read_cached, fresh, timeout=timeout)
+
+async def get_all_env_list_async(fresh=False, timeout=None):
+    """get_all_env_list 的异步版本，与同步调用共用读取缓存"""
+    return (await read_env_scopes_async(fresh, timeout)).check()
+
+async def set_env_to_system_async(env_list, timeout=None):
+    """set_env_to_system 的异步版本，不输出任何信息，由调用方检查返回的 BatchResult"""
+    return await _run_blocking(_write, "set_values", env_list, timeout=timeout)
+
+async def apply_changes_async(upserts, removals, timeout=None):
+    """apply_changes 的异步版本，不输出任何信息"""
+    return await _run_blocking(_write, "apply", upserts, removals, timeout=timeout)
 
-    print(f"\n删除结果: 成功删除 {deleted_count}/{len(env_list)} 个环境变量")
-    return deleted_count
+async def delete_env_vars_async(env_list, timeout=None):
+    """delete_env_vars 的异步版本，不输出任何信息"""
+    return await _run_blocking(_write, "delete_values", env_list, timeout=timeout)
@@ -0,0 +1,297 @@
+"""
+系统环境变量变化监视
+
+EnvWatcher 在后台线程中等待变化事件源报告两个 Environment 键发生了变化，随后重新读取
+系统环境变量，与上一次的状态比较，把变化的变量通过 on_changes 回调交给调用方
+（GUI 据此增量更新系统基准数据和 DiffEngine），不再需要手动或定时重新读取。
+
+事件源是可替换的：
+    RegistryNotifySource  Windows 上用 RegNotifyChangeKeyValue 订阅注册表通知
+    PollingSource         定期读取并比较指纹，适用于没有通知机制的后端
+    FakeSource            由测试代码调用 notify() 手动触发
+"""
+import queue
+import threading
+
+from env_record import SCOPE_MACHINE, SCOPE_USER
+from env_utils import EnvReadError, SCOPES
+
+# 收到第一个事件后等待多久再读取，合并短时间内的连续修改（秒）
+DEBOUNCE_SECONDS = 0.2
+
+# PollingSource 默认的轮询间隔（秒）
+POLL_INTERVAL = 2.0
+
+# stop() 等待监视线程退出的最长时间（秒），超时后不释放事件源，避免线程仍在使用句柄
+STOP_TIMEOUT = 1.0
+
+def diff_states(old, new):
+    """
+    比较两个 {(name, scope): EnvVar} 状态，返回 [(key, EnvVar 或 None)]。
+
+    None 表示变量已从系统中删除；值和类型都没变的变量不会出现在结果中。
+    """
+    changes = []
+    for key, env in new.items():
+        previous = old.get(key)
+        if previous is None or previous.value != env.value or previous.kind != env.kind:
+            changes.append((key, env))
+    for key in old:
+        if key not in new:
+            changes.append((key, None))
+    return changes
+
+class ChangeSource:
+    """变化事件源基类"""
+
+    def wait(self, timeout=None):
+        """阻塞到有作用域发生变化、超时或 close()，返回变化的作用域集合（超时或关闭时为空集合）"""
+        raise NotImplementedError
+
+    def close(self):
+        """唤醒正在等待的 wait()，可以在任意线程中调用"""
+
+    def release(self):
+        """释放资源，必须在等待线程退出后调用"""
+
+class FakeSource(ChangeSource):
+    """由测试代码手动触发的事件源"""
+
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def notify(self, *scopes):
+        self.events.put(set(scopes or (SCOPE_USER, SCOPE_MACHINE)))
+
+    def wait(self, timeout=None):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return set()
+
+    def close(self):
+        self.events.put(set())
+
+class PollingSource(ChangeSource):
+    """
+    定期调用 read_all 并比较每个作用域的指纹，发现不同时报告变化。
+
+    第一次轮询只记录指纹，不报告变化。
+    """
+
+    def __init__(self, read_all, interval=POLL_INTERVAL):
+        self.read_all = read_all
+        self.interval = interval
+        self.fingerprints = None
+        self.closed = threading.Event()
+
+    def fingerprint(self):
+        rows = {SCOPE_USER: [], SCOPE_MACHINE: []}
+        for name, value, kind, scope in self.read_all():
+            rows.setdefault(scope, []).append((name, value, kind))
+        return {scope: hash(frozenset(items)) for scope, items in rows.items()}
+
+    def wait(self, timeout=None):
+        if self.fingerprints is None:
+            self.fingerprints = self.fingerprint()
+        if self.closed.wait(self.interval if timeout is None else min(timeout, self.interval)):
+            return set()
+        current = self.fingerprint()
+        changed = {scope for scope in current if current[scope] != self.fingerprints.get(scope)}
+        self.fingerprints = current
+        return changed
+
+    def close(self):
+        self.closed.set()
+
+class RegistryNotifySource(ChangeSource):
+    """
+    用 RegNotifyChangeKeyValue 订阅 HKCU\\Environment 和 HKLM 下 Session Manager\\Environment 的变化，仅 Windows 可用。
+
+    通知是一次性的，每次收到后重新订阅；必须在调用 wait() 的同一个线程中订阅。
+    """
+
+    HKEY_CURRENT_USER = 0x80000001
+    HKEY_LOCAL_MACHINE = 0x80000002
+    KEY_NOTIFY = 0x0010
+    REG_NOTIFY_CHANGE_NAME = 0x1
+    REG_NOTIFY_CHANGE_LAST_SET = 0x4
+    WAIT_OBJECT_0 = 0
+    WAIT_FAILED = 0xFFFFFFFF
+    INFINITE = 0xFFFFFFFF
+
+    KEYS = (
+        (SCOPE_USER, HKEY_CURRENT_USER, "Environment"),
+        (SCOPE_MACHINE, HKEY_LOCAL_MACHINE, "SYSTEM\\CurrentControlSet\\Control\\Session Manager\\Environment"),
+    )
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+
+        self.ctypes = ctypes
+        self.advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+        self.kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self.advapi32.RegOpenKeyExW.argtypes = [wintypes.HKEY, wintypes.LPCWSTR, wintypes.DWORD,
+                                                wintypes.DWORD, ctypes.POINTER(wintypes.HKEY)]
+        self.advapi32.RegOpenKeyExW.restype = wintypes.LONG
+        self.advapi32.RegNotifyChangeKeyValue.argtypes = [wintypes.HKEY, wintypes.BOOL, wintypes.DWORD,
+                                                          wintypes.HANDLE, wintypes.BOOL]
+        self.advapi32.RegNotifyChangeKeyValue.restype = wintypes.LONG
+        self.advapi32.RegCloseKey.argtypes = [wintypes.HKEY]
+        self.kernel32.CreateEventW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        self.kernel32.CreateEventW.restype = wintypes.HANDLE
+        self.kernel32.SetEvent.argtypes = [wintypes.HANDLE]
+        self.kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self.kernel32.WaitForMultipleObjects.argtypes = [wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE),
+                                                         wintypes.BOOL, wintypes.DWORD]
+        self.kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+
+        self.watches = []  # [(scope, hkey, event)]
+        for scope, root, subkey in self.KEYS:
+            hkey = wintypes.HKEY()
+            error = self.advapi32.RegOpenKeyExW(wintypes.HKEY(root), subkey, 0, self.KEY_NOTIFY, ctypes.byref(hkey))
+            if error:
+                print(f"无法监视{scope}环境变量: {ctypes.FormatError(error)}")
+                continue
+            # 自动复位的事件：WaitForMultipleObjects 返回时自动清除
+            self.watches.append((scope, hkey, self.kernel32.CreateEventW(None, False, False, None)))
+        self.stop_event = self.kernel32.CreateEventW(None, True, False, None)
+        self.handles = (wintypes.HANDLE * (len(self.watches) + 1))(
+            *[event for _, _, event in self.watches], self.stop_event)
+        self.armed = set()
+
+    def arm(self, index):
+        scope, hkey, event = self.watches[index]
+        error = self.advapi32.RegNotifyChangeKeyValue(
+            hkey, False, self.REG_NOTIFY_CHANGE_NAME | self.REG_NOTIFY_CHANGE_LAST_SET, event, True)
+        if error:
+            raise OSError(error, f"订阅{scope}环境变量变化失败: {self.ctypes.FormatError(error)}")
+        self.armed.add(index)
+
+    def wait(self, timeout=None):
+        for index in range(len(self.watches)):
+            if index not in self.armed:
+                self.arm(index)
+
+        milliseconds = self.INFINITE if timeout is None else int(timeout * 1000)
+        changed = set()
+        while True:
+            result = self.kernel32.WaitForMultipleObjects(len(self.handles), self.handles, False, milliseconds)
+            if result == self.WAIT_FAILED:
+                raise self.ctypes.WinError(self.ctypes.get_last_error())
+            index = result - self.WAIT_OBJECT_0
+            if index >= len(self.watches):
+                return changed  # 超时或关闭
+            changed.add(self.watches[index][0])
+            self.armed.discard(index)
+            self.arm(index)
+            milliseconds = 0  # 顺便收集已经到达的其他通知
+
+    def close(self):
+        self.kernel32.SetEvent(self.stop_event)
+
+    def release(self):
+        """关闭注册表键和事件句柄，必须在等待线程退出后调用"""
+        if self.stop_event is None:
+            return
+        for _, hkey, event in self.watches:
+            self.advapi32.RegCloseKey(hkey)
+            self.kernel32.CloseHandle(event)
+        self.kernel32.CloseHandle(self.stop_event)
+        self.watches = []
+        self.stop_event = None
+
+def make_default_source(read_all):
+    """Windows 上订阅注册表通知，其他平台退回轮询 read_all"""
+    try:
+        return RegistryNotifySource()
+    except (AttributeError, OSError):  # 没有 ctypes.WinDLL
+        return PollingSource(read_all)
+
+class EnvWatcher:
+    """
+    根据事件源的通知重新读取系统环境变量，把与上一次状态之间的变化交给 on_changes(changes, env_list)。
+
+    reset() 设置比较的基准（例如 GUI 完整读取之后），设置之前收到的通知会被忽略。
+    回调在监视线程中执行，GUI 需要自行切换到主线程。
+
+    读取时某个作用域失败（EnvReadError）不会把该作用域的变量报告为删除，而是保留上一次的状态；
+    全部作用域都失败时基准保持不变，等下一次通知再重新读取。
+    """
+
+    def __init__(self, source, read_all, on_changes, debounce=DEBOUNCE_SECONDS):
+        self.source = source
+        self.read_all = read_all
+        self.on_changes = on_changes
+        self.debounce = debounce
+        self.lock = threading.Lock()
+        self.known = None  # {(name, scope): EnvVar}
+        self.generation = 0  # reset() 的次数，用于丢弃读取期间被 reset 覆盖的结果
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def reset(self, env_list):
+        """设置比较基准，可以在任意线程中调用"""
+        with self.lock:
+            self.known = {(env.name, env.scope): env for env in env_list}
+            self.generation += 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=STOP_TIMEOUT):
+        """停止监视；监视线程退出后释放事件源（注册表键和事件句柄）"""
+        self.stopped.set()
+        self.source.close()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                return  # 线程仍在读取，进程退出时由系统回收
+        self.source.release()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                scopes = self.source.wait()
+                if not scopes or self.stopped.is_set():
+                    continue
+                # 合并短时间内连续到达的通知，只读取一次
+                while self.source.wait(self.debounce):
+                    pass
+                self.refresh()
+            except Exception as e:
+                print(f"监视环境变量失败: {e}")
+                self.stopped.wait(POLL_INTERVAL)
+
+    def refresh(self):
+        """
+        重新读取并报告变化，返回变化列表；尚未设置基准时返回空列表
+
+        传给 on_changes 的是合并后的完整状态：读取失败的作用域使用上一次的数据。
+        """
+        while True:
+            with self.lock:
+                if self.known is None:
+                    return []
+                generation = self.generation
+            try:
+                env_list = self.read_all()
+                failed = set()
+            except EnvReadError as e:
+                if len(e.errors) >= len(SCOPES):
+                    raise  # 全部失败：基准不变，由 run() 报告
+                env_list, failed = e.env_list, set(e.errors)
+            current = {(env.name, env.scope): env for env in env_list}
+            with self.lock:
+                if generation != self.generation:
+                    continue  # 读取期间基准被替换，按新基准重新比较
+                for key, env in self.known.items():
+                    if key[1] in failed:
+                        current[key] = env
+                changes = diff_states(self.known, current)
+                self.known = current
+            if changes:
+                self.on_changes(changes, list(current.values()))
+            return changes
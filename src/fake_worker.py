@@ -0,0 +1,82 @@
+"""
+Python 版替身工作进程
+
+与 ps_worker.WORKER_PS_SCRIPT 使用相同的帧协议，数据保存在 MemoryBackend 中，
+用于在 Linux 上测试协议、流水线请求和崩溃恢复。
+
+额外支持两个测试用请求：
+- sleep: 按 args.seconds 延迟后响应，用于测试超时
+- crash: 立即以退出码 3 退出，用于测试崩溃恢复
+
+用法: python fake_worker.py [初始数据.yaml]
+"""
+import os
+import sys
+import time
+
+from env_record import EnvVar
+from env_utils import MemoryBackend
+from ps_worker import encode_frame, read_frame
+
+def handle(backend, request):
+    """处理一个请求，返回结果对象"""
+    op = request.get("op")
+    args = request.get("args") or {}
+
+    if op == "ping":
+        return "pong"
+    if op == "read_all":
+        return [env.to_list() for env in backend.read_all()]
+    if op == "read_scope":
+        return [env.to_list() for env in backend.read_scope(args["scope"])]
+    if op == "apply":
+        items = args.get("items", [])
+        upserts = [EnvVar(i["name"], i["value"], i["kind"], i["scope"]) for i in items if i["op"] == "set"]
+        removals = [EnvVar(i["name"], i["value"], i["kind"], i["scope"]) for i in items if i["op"] != "set"]
+        result = backend.apply(upserts, removals)
+
+        # 按请求顺序返回每一项的 [状态, 错误信息]
+        statuses = {}
+        for env in result.succeeded + result.deleted:
+            statuses[(env[0], env[3])] = ["OK", ""]
+        for env in result.missing:
+            statuses[(env[0], env[3])] = ["MISSING", ""]
+        for env, error in result.failed:
+            statuses[(env[0], env[3])] = ["ERR", error]
+        return [statuses.get((i["name"], i["scope"]), ["ERR", "未处理"]) for i in items]
+    if op == "sleep":
+        time.sleep(args.get("seconds", 0))
+        return "slept"
+    if op == "crash":
+        sys.stdout.flush()
+        os._exit(3)
+    raise ValueError(f"unknown op: {op}")
+
+def main():
+    env_list = []
+    if len(sys.argv) > 1:
+        from yaml_utils import get_env_from_yaml
+        env_list = get_env_from_yaml(sys.argv[1])
+    backend = MemoryBackend(env_list)
+
+    stdin = sys.stdin.buffer
+    stdout = sys.stdout.buffer
+    while True:
+        try:
+            request = read_frame(stdin)
+        except ValueError as e:
+            # 与 PowerShell 工作进程相同：无法解析的帧只返回错误
+            stdout.write(encode_frame({"id": None, "ok": False, "error": f"无法解析请求: {e}"}))
+            stdout.flush()
+            continue
+        if request is None:
+            break
+        try:
+            response = {"id": request.get("id"), "ok": True, "result": handle(backend, request)}
+        except Exception as e:
+            response = {"id": request.get("id"), "ok": False, "error": str(e)}
+        stdout.write(encode_frame(response))
+        stdout.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+跨进程文件锁
+
+GUI 和命令行工具共用历史日志和快照存储，修改前用一个锁文件互斥。
+Windows 上使用 msvcrt.locking，其他平台使用 fcntl.flock；进程退出时锁随文件关闭自动释放，
+不会因为崩溃留下无法清除的锁。锁不可重入，同一进程内的线程还需要各自的 threading.Lock。
+"""
+import os
+
+try:
+    import msvcrt
+except ImportError:  # 非 Windows 平台
+    msvcrt = None
+    import fcntl
+
+class FileLock:
+    """基于锁文件的排他锁，用作上下文管理器；获取时一直等待到其他进程释放"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        f = open(self.path, "a+b")
+        try:
+            if msvcrt is not None:
+                f.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK 只重试 10 秒，超时后继续等待
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            f.close()
+            raise
+        self.file = f
+
+    def release(self):
+        f, self.file = self.file, None
+        if f is None:
+            return
+        try:
+            if msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,256 @@
+"""
+增量历史日志
+
+只追加的 JSON Lines 文件，每次记录系统环境变量时只写入与上一个状态之间的差异，
+分类方式与 update_diff_status 相同（added / modified / removed，见 diff_engine.classify）。
+每隔 checkpoint_interval 条差异写入一次完整检查点，检查点的时间和文件偏移保存在旁路索引
+（<日志>.idx）中；查询任意时间点的状态只需二分查找到最近的检查点，再重放不超过
+checkpoint_interval 条差异，而不是重放整个日志。
+
+GUI 和命令行工具可以同时写入同一个日志：每次读写都持有锁文件（<日志>.lock），
+计算差异前先读入其他进程在上次已知末尾之后追加的记录，差异总是基于日志中真正的最新状态。
+
+日志格式（每行一个 JSON 对象）:
+    {"ts": 时间戳, "checkpoint": [[name, scope, kind, value], ...]}
+    {"ts": 时间戳, "changes": [["added"|"modified", name, scope, kind, value], ["removed", name, scope], ...]}
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+
+from diff_engine import classify
+from env_record import EnvVar
+from file_lock import FileLock
+
+# 默认存放在项目根目录下，与快照存储放在一起
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "history", "history.jsonl")
+
+# 每隔多少条差异写入一次完整检查点
+CHECKPOINT_INTERVAL = 50
+
+class HistoryError(Exception):
+    """历史日志中间的记录已损坏"""
+
+def to_timestamp(when):
+    """把 datetime、ISO 格式字符串或数字转换为 Unix 时间戳"""
+    if isinstance(when, datetime):
+        return when.timestamp()
+    if isinstance(when, str):
+        return datetime.fromisoformat(when).timestamp()
+    return float(when)
+
+def apply_changes(state, changes):
+    """把一条差异记录应用到 {(name, scope): (value, kind)} 状态上"""
+    for change in changes:
+        status, name, scope = change[0], change[1], change[2]
+        if status == "removed":
+            state.pop((name, scope), None)
+        else:
+            state[(name, scope)] = (change[4], change[3])
+
+class HistoryLog:
+    """追加式差异日志，支持按时间点重建状态和查询单个变量的历史值"""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.checkpoint_interval = checkpoint_interval
+        self.lock = threading.Lock()  # 同一进程内的线程互斥
+        self.file_lock = FileLock(path + ".lock")  # 进程之间互斥
+        self._index = None  # [(时间戳, 检查点偏移)]
+        self._state = None  # 最新状态 {(name, scope): (value, kind)}
+        self._end = 0  # 已读入 _state 的日志末尾偏移
+        self._last_ts = None
+        self._since_checkpoint = 0
+
+    def _read_index(self):
+        index = []
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2:
+                        index.append((float(parts[0]), int(parts[1])))
+        except (OSError, ValueError):
+            return []
+        return index
+
+    def _index_is_valid(self, index):
+        """检查索引中最后一个检查点确实位于日志中的对应偏移"""
+        if not index:
+            return True
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(index[-1][1])
+                record = json.loads(f.readline())
+        except (OSError, ValueError):
+            return False
+        return "checkpoint" in record and record.get("ts") == index[-1][0]
+
+    def _append_index(self, ts, offset):
+        self._index.append((ts, offset))
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(f"{ts!r} {offset}\n")
+
+    def _sync(self):
+        """
+        让内存中的最新状态与日志一致，调用方需持有 lock 和 file_lock。
+
+        第一次使用时从最后一个检查点开始恢复，索引缺失或与日志不一致时从头扫描重建；
+        之后只读取其他进程在 _end 之后追加的记录。日志变短（被替换）时重新恢复。
+        """
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if self._state is not None and size == self._end:
+            return
+        if self._state is None or size < self._end:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._index = self._read_index()
+            if not self._index_is_valid(self._index):
+                self._index = []
+                with open(self.index_path, "w", encoding="utf-8"):
+                    pass
+            self._state = {}
+            self._end = self._index[-1][1] if self._index else 0
+            self._last_ts = None
+            self._since_checkpoint = 0
+        else:
+            # 其他进程写入的检查点已经在索引文件中
+            self._index = self._read_index()
+        self._scan()
+
+    def _scan(self):
+        """
+        从 _end 开始读取记录并合并到最新状态。
+
+        只有日志末尾因崩溃写了一半、没有换行符的最后一行会被截掉（写入都持有文件锁，不会是
+        其他进程正在写的行）；中间的行无法解析时抛出 HistoryError，不会丢弃它之后的记录。
+        """
+        if not os.path.exists(self.path):
+            return
+        good_end = self._end
+        with open(self.path, "rb") as f:
+            f.seek(good_end)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 没有换行符的只可能是最后一行
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise HistoryError(f"{self.path} 偏移 {good_end} 处的记录已损坏: {e}") from None
+                offset = good_end
+                good_end += len(line)
+                if "checkpoint" in record:
+                    if not self._index or self._index[-1][1] < offset:
+                        self._append_index(record["ts"], offset)
+                    self._state = {(name, scope): (value, kind) for name, scope, kind, value in record["checkpoint"]}
+                    self._since_checkpoint = 0
+                else:
+                    apply_changes(self._state, record["changes"])
+                    self._since_checkpoint += 1
+                self._last_ts = record["ts"]
+        if os.path.getsize(self.path) > good_end:
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+        self._end = good_end
+
+    def _append(self, record):
+        """追加一行并落盘，返回该行的偏移"""
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+            self._end = f.tell()
+        return offset
+
+    def record(self, env_list, when=None):
+        """
+        记录一个新的状态，返回与上一个状态相比变化的变量数量。
+
+        没有变化时不写入任何内容；时间戳不会早于上一条记录（包括其他进程写入的记录）。
+        """
+        with self.lock, self.file_lock:
+            self._sync()
+            ts = time.time() if when is None else to_timestamp(when)
+            if self._last_ts is not None and ts < self._last_ts:
+                ts = self._last_ts
+
+            current = {(name, scope): (value, kind) for name, value, kind, scope in env_list}
+            changes = []
+            for key in current.keys() | self._state.keys():
+                status = classify(current.get(key), self._state.get(key))
+                if status == "removed":
+                    changes.append([status, key[0], key[1]])
+                elif status != "same":
+                    value, kind = current[key]
+                    changes.append([status, key[0], key[1], kind, value])
+
+            if not changes and self._last_ts is not None:
+                return 0
+
+            if self._last_ts is None or self._since_checkpoint >= self.checkpoint_interval:
+                rows = [[name, scope, kind, value] for (name, scope), (value, kind) in current.items()]
+                offset = self._append({"ts": ts, "checkpoint": rows})
+                self._append_index(ts, offset)
+                self._since_checkpoint = 0
+            else:
+                self._append({"ts": ts, "changes": changes})
+                self._since_checkpoint += 1
+
+            self._state = current
+            self._last_ts = ts
+            return len(changes)
+
+    def _replay(self, ts, key=None):
+        """
+        从 ts 之前最近的检查点开始重放，返回 ts 时刻的 {(name, scope): (value, kind)}。
+
+        给出 key 时只跟踪这一个变量。ts 早于第一条记录时返回空字典。
+        """
+        with self.lock, self.file_lock:
+            self._sync()
+            index = list(self._index)
+        position = bisect_right([checkpoint_ts for checkpoint_ts, _ in index], ts) - 1
+        if position < 0:
+            return {}
+
+        state = {}
+        with open(self.path, "rb") as f:
+            f.seek(index[position][1])
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = json.loads(line)
+                if record["ts"] > ts:
+                    break
+                if "checkpoint" in record:
+                    state = {(name, scope): (value, kind) for name, scope, kind, value in record["checkpoint"]
+                             if key is None or (name, scope) == key}
+                else:
+                    apply_changes(state, [change for change in record["changes"]
+                                          if key is None or (change[1], change[2]) == key])
+        return state
+
+    def state_at(self, when):
+        """重建某一时刻的全部环境变量"""
+        state = self._replay(to_timestamp(when))
+        return [EnvVar(name, value, kind, scope) for (name, scope), (value, kind) in state.items()]
+
+    def value_at(self, name, scope, when):
+        """某一时刻变量的值，当时不存在时返回 None"""
+        found = self._replay(to_timestamp(when), (name, scope)).get((name, scope))
+        return found[0] if found is not None else None
+
+    def changes_between(self, start, end):
+        """两个时间点之间的差异 {(name, scope): 'added'|'modified'|'removed'}"""
+        before = self._replay(to_timestamp(start))
+        after = self._replay(to_timestamp(end))
+        changes = {}
+        for key in before.keys() | after.keys():
+            status = classify(after.get(key), before.get(key))
+            if status != "same":
+                changes[key] = status
+        return changes
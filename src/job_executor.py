@@ -0,0 +1,188 @@
+"""
+GUI 后台任务执行器
+
+后台工作提交到一个有界线程池：
+    - 相同 key 的任务正在执行时不会重复启动，新的回调直接挂到正在执行的任务上（例如多次读取系统环境变量）
+    - 每个任务带有 CancelToken，任务函数在合适的位置调用 token.check() 响应取消；
+      已经开始执行、没有响应取消而正常结束（或失败）的任务仍会报告结果
+    - serial=True 的任务（写入、删除等修改注册表的操作）提交到单独的单线程执行器依次执行，
+      排队时不会占用线程池中的线程
+    - 任务的结果和回调放入同一个线程安全队列，由界面线程上的一个 after 轮询统一执行，
+      工作线程不会直接调用任何 Tk 方法
+
+执行器本身不依赖 tkinter，start_polling 只需要一个提供 after(ms, callback) 的对象。
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 线程池大小（不含执行 serial 任务的单独线程）
+MAX_WORKERS = 2
+
+# 界面线程检查结果队列的间隔（毫秒）
+POLL_INTERVAL_MS = 50
+
+# 一次轮询最多执行的回调数量，避免大量结果堆积时界面卡顿
+DRAIN_LIMIT = 100
+
+class CancelledError(Exception):
+    """任务已被取消"""
+
+class CancelToken:
+    """取消标记，可以在任意线程中调用 cancel()"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """已取消时抛出 CancelledError"""
+        if self._event.is_set():
+            raise CancelledError()
+
+class Job:
+    """一个提交到执行器的任务；去重时多个调用方共享同一个 Job"""
+
+    def __init__(self, key, serial):
+        self.key = key
+        self.serial = serial
+        self.token = CancelToken()
+        self.subscribers = []  # [(on_done, on_error, on_finally)]
+        self.future = None  # 不调用 future.cancel()：排队中的任务也要运行一次，检查取消标记后通知 on_finally
+
+    def cancel(self):
+        """
+        取消任务（对共享该任务的所有调用方生效）。
+
+        尚未开始的任务不会执行，只调用 on_finally；已经开始的任务如果没有响应取消，
+        仍会报告 on_done / on_error，需要丢弃过时结果的调用方自行判断。
+        """
+        self.token.cancel()
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+class JobExecutor:
+    """有界线程池 + 串行执行器 + 去重 + 取消 + 交给界面线程执行的结果队列"""
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="env-job")
+        self.serial_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="env-job-serial")
+        self.results = queue.SimpleQueue()  # (callback, args)
+        self.lock = threading.Lock()
+        self.inflight = {}  # {key: Job}
+        self.jobs = set()  # 尚未结束的任务
+        self.closed = False
+
+    def submit(self, fn, on_done=None, on_error=None, on_finally=None, key=None, serial=False):
+        """
+        提交任务 fn(token)，返回 Job。
+
+        on_done(result)、on_error(exception) 和 on_finally() 都在界面线程中执行；任务在开始前
+        被取消或通过 token.check() 响应取消时只调用 on_finally。给出 key 且相同 key 的任务尚未结束时
+        不会重复执行，而是共享它的结果。serial=True 的任务在单独的线程中按提交顺序依次执行。
+        """
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("执行器已关闭")
+            job = self.inflight.get(key) if key is not None else None
+            if job is not None and not job.cancelled:
+                job.subscribers.append((on_done, on_error, on_finally))
+                return job
+
+            job = Job(key, serial)
+            job.subscribers.append((on_done, on_error, on_finally))
+            if key is not None:
+                self.inflight[key] = job
+            self.jobs.add(job)
+        pool = self.serial_pool if serial else self.pool
+        job.future = pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        result = error = None
+        finished = False  # fn 已执行完毕（返回或抛出取消以外的异常），即使期间被取消也报告结果
+        try:
+            job.token.check()
+            result = fn(job.token)
+            finished = True
+        except CancelledError:
+            pass
+        except Exception as e:
+            error = e
+            finished = True
+        finally:
+            with self.lock:
+                if self.inflight.get(job.key) is job:
+                    del self.inflight[job.key]
+                self.jobs.discard(job)
+                subscribers = list(job.subscribers)
+
+        for on_done, on_error, on_finally in subscribers:
+            if finished:
+                if error is not None:
+                    if on_error is not None:
+                        self.post(on_error, error)
+                    else:
+                        print(f"后台任务失败: {error}")
+                elif on_done is not None:
+                    self.post(on_done, result)
+            if on_finally is not None:
+                self.post(on_finally)
+
+    def post(self, callback, *args):
+        """让界面线程执行 callback(*args)，可以在任意线程中调用"""
+        self.results.put((callback, args))
+
+    def drain(self, limit=DRAIN_LIMIT):
+        """在界面线程中执行排队的回调，返回执行的数量"""
+        count = 0
+        while limit is None or count < limit:
+            try:
+                callback, args = self.results.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"执行回调失败: {e}")
+        return count
+
+    def start_polling(self, root, interval_ms=POLL_INTERVAL_MS):
+        """在界面线程上启动唯一的结果轮询"""
+        def poll():
+            self.drain()
+            if not self.closed:
+                root.after(interval_ms, poll)
+        root.after(interval_ms, poll)
+
+    def cancel(self, key):
+        """取消指定 key 的任务，没有时返回 False"""
+        with self.lock:
+            job = self.inflight.get(key)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def cancel_all(self):
+        with self.lock:
+            jobs = list(self.jobs)
+        for job in jobs:
+            job.cancel()
+
+    def shutdown(self, wait=False):
+        """取消所有任务并停止线程池和串行执行器"""
+        with self.lock:
+            self.closed = True
+        self.cancel_all()
+        self.pool.shutdown(wait=wait)
+        self.serial_pool.shutdown(wait=wait)
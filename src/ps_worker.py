@@ -0,0 +1,319 @@
+"""
+常驻 PowerShell 工作进程
+
+工作进程只启动一次（首次请求时），之后通过标准输入/输出交换带长度前缀的 JSON 帧：
+每一帧是 4 字节大端长度 + UTF-8 编码的 JSON。
+请求格式为 {"id": n, "op": "...", "args": {...}}，
+响应格式为 {"id": n, "ok": true, "result": ...} 或 {"id": n, "ok": false, "error": "..."}。
+请求带有序号，因此可以连续发送多个请求（流水线），响应按序号分发给等待方。
+"""
+import atexit
+import json
+import struct
+import subprocess
+import threading
+
+HEADER = struct.Struct(">I")
+
+# 可以在进程崩溃后自动重发的只读请求
+IDEMPOTENT_OPS = ("ping", "read_all", "read_scope")
+
+WORKER_PS_SCRIPT = r"""
+$ErrorActionPreference = 'Stop'
+$stdin = [Console]::OpenStandardInput()
+$stdout = [Console]::OpenStandardOutput()
+$utf8 = New-Object System.Text.UTF8Encoding($false)
+$keys = @{
+    'User' = @([Microsoft.Win32.Registry]::CurrentUser, 'Environment');
+    'Machine' = @([Microsoft.Win32.Registry]::LocalMachine, 'SYSTEM\CurrentControlSet\Control\Session Manager\Environment')
+}
+
+function Read-Exact($count) {
+    $buffer = New-Object byte[] $count
+    $offset = 0
+    while ($offset -lt $count) {
+        $read = $stdin.Read($buffer, $offset, $count - $offset)
+        if ($read -le 0) { return $null }
+        $offset += $read
+    }
+    return ,$buffer
+}
+
+function Write-Frame($object) {
+    $bytes = $utf8.GetBytes((ConvertTo-Json -InputObject $object -Compress -Depth 6))
+    $header = [BitConverter]::GetBytes([int]$bytes.Length)
+    [Array]::Reverse($header)
+    $stdout.Write($header, 0, 4)
+    $stdout.Write($bytes, 0, $bytes.Length)
+    $stdout.Flush()
+}
+
+function Add-ScopeRows($rows, $scope) {
+    if (-not $keys.ContainsKey($scope)) { throw "unknown scope: $scope" }
+    $key = $keys[$scope][0].OpenSubKey($keys[$scope][1])
+    if ($null -eq $key) { throw "cannot open $scope environment key" }
+    try {
+        foreach ($name in $key.GetValueNames()) {
+            $value = $key.GetValue($name, '', 'DoNotExpandEnvironmentNames')
+            $kind = $key.GetValueKind($name).ToString()
+            [void]$rows.Add(@($name, [string]$value, $kind, $scope))
+        }
+    } finally { $key.Close() }
+}
+
+function Read-Scope($scope) {
+    $rows = New-Object System.Collections.ArrayList
+    Add-ScopeRows $rows $scope
+    return ,$rows
+}
+
+function Read-AllScopes {
+    $rows = New-Object System.Collections.ArrayList
+    foreach ($scope in @('User', 'Machine')) {
+        Add-ScopeRows $rows $scope
+    }
+    return ,$rows
+}
+
+function Invoke-Apply($items) {
+    $statuses = New-Object System.Collections.ArrayList
+    foreach ($item in @($items)) {
+        try {
+            $key = $keys[$item.scope][0].OpenSubKey($keys[$item.scope][1], $true)
+            try {
+                if ($item.op -eq 'set') {
+                    $key.SetValue($item.name, $item.value, [Microsoft.Win32.RegistryValueKind]$item.kind)
+                    [void]$statuses.Add(@('OK', ''))
+                } elseif ($null -eq $key.GetValue($item.name, $null)) {
+                    [void]$statuses.Add(@('MISSING', ''))
+                } else {
+                    $key.DeleteValue($item.name)
+                    [void]$statuses.Add(@('OK', ''))
+                }
+            } finally { $key.Close() }
+        } catch {
+            [void]$statuses.Add(@('ERR', ($_.Exception.Message -replace '\s+', ' ')))
+        }
+    }
+    return ,$statuses
+}
+
+while ($true) {
+    $header = Read-Exact 4
+    if ($null -eq $header) { break }
+    [Array]::Reverse($header)
+    $body = Read-Exact ([BitConverter]::ToInt32($header, 0))
+    if ($null -eq $body) { break }
+    # 解析放在 try 中：一帧无法解析只返回错误，不会让工作进程退出
+    $request = $null
+    try {
+        $request = $utf8.GetString($body) | ConvertFrom-Json
+        switch ($request.op) {
+            'ping' { $result = 'pong' }
+            'read_all' { $result = Read-AllScopes }
+            'read_scope' { $result = Read-Scope $request.args.scope }
+            'apply' { $result = Invoke-Apply $request.args.items }
+            default { throw "unknown op: $($request.op)" }
+        }
+        Write-Frame @{ id = $request.id; ok = $true; result = $result }
+    } catch {
+        Write-Frame @{ id = $request.id; ok = $false; error = $_.Exception.Message }
+    }
+}
+"""
+
+POWERSHELL_WORKER_COMMAND = ["powershell", "-NoProfile", "-NonInteractive", "-Command", WORKER_PS_SCRIPT]
+
+class WorkerError(Exception):
+    """工作进程返回错误或无法通信"""
+
+class WorkerTimeout(WorkerError):
+    """请求在超时时间内没有得到响应"""
+
+class WorkerCrashed(WorkerError):
+    """工作进程在请求完成前退出"""
+
+def encode_frame(message):
+    """把对象编码为带长度前缀的 JSON 帧"""
+    body = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+def read_frame(stream):
+    """从字节流中读取一帧并解码，流结束时返回 None"""
+    header = _read_exact(stream, HEADER.size)
+    if header is None:
+        return None
+    body = _read_exact(stream, HEADER.unpack(header)[0])
+    if body is None:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+def _read_exact(stream, count):
+    data = b""
+    while len(data) < count:
+        chunk = stream.read(count - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+class PendingRequest:
+    """一个已发送、等待响应的请求"""
+
+    def __init__(self, request_id, op, process):
+        self.id = request_id
+        self.op = op
+        self.process = process  # 发送该请求的工作进程
+        self.response = None
+        self.error = None
+        self.done = threading.Event()
+
+    def finish(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.done.set()
+
+class WorkerClient:
+    """常驻工作进程的客户端：懒启动、流水线请求、单请求超时、崩溃后自动重启"""
+
+    def __init__(self, command=None, timeout=30.0, max_restarts=3):
+        self.command = list(command or POWERSHELL_WORKER_COMMAND)
+        self.timeout = timeout  # 默认的单请求超时（秒）
+        self.max_restarts = max_restarts  # 两次成功请求之间允许的自动重启次数
+        self.start_count = 0  # 启动过的进程数
+        self.restarts = 0  # 上一次成功请求之后的重启次数，请求成功后清零
+        self.process = None
+        self._next_id = 0
+        self._pending = {}  # {id: PendingRequest}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def _ensure_started(self):
+        """首次请求或进程退出后启动工作进程，调用方需持有 _lock"""
+        if self.is_alive():
+            return
+        if self.process is not None:
+            # 进程崩溃或因超时被结束后重新启动；连续重启太多次说明无法正常工作
+            if self.restarts >= self.max_restarts:
+                raise WorkerCrashed(f"工作进程已连续重启 {self.max_restarts} 次，不再自动重启")
+            self.restarts += 1
+
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.start_count += 1
+        reader = threading.Thread(target=self._reader_loop, args=(self.process,), daemon=True)
+        reader.start()
+
+    def _reader_loop(self, process):
+        """读取响应并按序号分发；进程退出时让所有未完成的请求失败"""
+        try:
+            while True:
+                response = read_frame(process.stdout)
+                if response is None:
+                    break
+                with self._lock:
+                    pending = self._pending.pop(response.get("id"), None)
+                if pending is not None:
+                    pending.finish(response=response)
+        except (OSError, ValueError):
+            pass
+
+        process.wait()
+        with self._lock:
+            crashed = [pending for pending in self._pending.values() if pending.process is process]
+            for pending in crashed:
+                del self._pending[pending.id]
+        for pending in crashed:
+            pending.finish(error=WorkerCrashed(f"工作进程意外退出 (退出码 {process.returncode})"))
+
+    def submit(self, op, args=None):
+        """发送请求但不等待响应，返回 PendingRequest，可用于流水线"""
+        with self._lock:
+            self._ensure_started()
+            self._next_id += 1
+            pending = PendingRequest(self._next_id, op, self.process)
+            self._pending[pending.id] = pending
+            try:
+                self.process.stdin.write(encode_frame({"id": pending.id, "op": op, "args": args or {}}))
+                self.process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(pending.id, None)
+                pending.finish(error=WorkerCrashed(f"无法向工作进程发送请求: {e}"))
+        return pending
+
+    def wait(self, pending, timeout=None):
+        """
+        等待请求完成并返回结果
+
+        超时说明工作进程卡在这个请求上，后面排队的请求也不会得到响应：结束该进程，
+        其他未完成的请求以 WorkerCrashed 失败（只读请求会自动重试），下一个请求重新启动进程。
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if not pending.done.wait(timeout):
+            with self._lock:
+                self._pending.pop(pending.id, None)
+            self._kill_process(pending.process)
+            raise WorkerTimeout(f"请求 {pending.op} 超时 ({timeout} 秒)")
+        if pending.error is not None:
+            raise pending.error
+        with self._lock:
+            self.restarts = 0
+        if not pending.response.get("ok"):
+            raise WorkerError(pending.response.get("error", "未知错误"))
+        return pending.response.get("result")
+
+    def request(self, op, args=None, timeout=None):
+        """发送请求并等待结果；只读请求在进程崩溃时会重启并重试一次"""
+        try:
+            return self.wait(self.submit(op, args), timeout)
+        except WorkerCrashed:
+            if op not in IDEMPOTENT_OPS:
+                raise
+            return self.wait(self.submit(op, args), timeout)
+
+    def ping(self, timeout=5.0):
+        """健康检查：工作进程在超时内响应则返回 True"""
+        try:
+            return self.request("ping", timeout=timeout) == "pong"
+        except WorkerError:
+            return False
+
+    def ensure_healthy(self, timeout=5.0):
+        """健康检查失败时结束当前进程并重新启动"""
+        if self.ping(timeout):
+            return True
+        self.kill()
+        return self.ping(timeout)
+
+    def kill(self):
+        """强制结束工作进程，未完成的请求会以 WorkerCrashed 失败"""
+        with self._lock:
+            process = self.process
+        self._kill_process(process)
+
+    def _kill_process(self, process):
+        if process is not None and process.poll() is None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+            process.wait()
+
+    def close(self):
+        """关闭标准输入让工作进程自行退出"""
+        with self._lock:
+            process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
@@ -0,0 +1,153 @@
+"""
+搜索索引
+
+加载时为每个变量预先拼好小写的 "名称 值 作用域" 字符串，每次按键只做子串匹配；
+新查询包含上一次查询时（例如继续输入），只在上一次的结果中缩小范围。
+search_steps 把扫描拆成小块，GUI 可以在块之间让出 Tk 事件循环，并随时放弃过期的查询。
+
+PathIndex 是按 ; 分隔路径段建立的倒排索引，用于"哪些变量包含这个目录"的查找。
+"""
+from env_store import env_key
+
+# 每次让出事件循环之前最多检查的行数
+SEARCH_CHUNK = 5000
+
+def make_haystack(env):
+    """名称、值和作用域的小写拼接，用 \\0 分隔，避免匹配跨越两个字段"""
+    name, value, kind, scope = env
+    return f"{name.lower()}\0{value.lower()}\0{scope.lower()}"
+
+class SearchIndex:
+    """按变量顺序保存预计算的小写搜索文本，并缓存上一次的查询结果"""
+
+    def __init__(self, env_list=None):
+        self.entries = {}  # {(name, scope): (haystack, env)}，顺序与当前数据一致
+        self.last_query = None
+        self.last_keys = None
+        self.generation = 0  # 每次数据变化加一，分块查询期间数据变化时结果不缓存
+        if env_list is not None:
+            self.rebuild(env_list)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def rebuild(self, env_list):
+        """按给定数据重建索引"""
+        self.entries = {env_key(env): (make_haystack(env), env) for env in env_list}
+        self.invalidate()
+
+    def invalidate(self):
+        """数据变化后丢弃缓存的查询结果"""
+        self.last_query = None
+        self.last_keys = None
+        self.generation += 1
+
+    def update(self, env):
+        """新增或替换一个变量，新变量追加到末尾"""
+        self.entries[env_key(env)] = (make_haystack(env), env)
+        self.invalidate()
+
+    def remove(self, key):
+        if self.entries.pop(key, None) is not None:
+            self.invalidate()
+
+    def search_steps(self, query, chunk_size=SEARCH_CHUNK):
+        """
+        分块执行查询的生成器。
+
+        每检查完 chunk_size 行产出一次 None，最后产出匹配的变量列表；中途停止迭代即可取消查询。
+        只有完整执行、并且期间数据没有变化（generation 不变）的查询才会被缓存，否则之后更窄的查询
+        会在过时的结果中查找，漏掉刚修改或新增的变量。chunk_size 为 None 时不分块。
+        """
+        query = query.lower()
+        generation = self.generation
+        if not query:
+            self.last_query, self.last_keys = query, list(self.entries)
+            yield [env for _, env in self.entries.values()]
+            return
+
+        # 新查询包含上一次的查询时，结果一定是上一次结果的子集
+        if self.last_query is not None and self.last_query in query:
+            candidates = self.last_keys
+        else:
+            candidates = list(self.entries)
+
+        entries = self.entries
+        matched = []
+        step = chunk_size or max(len(candidates), 1)
+        for start in range(0, len(candidates), step):
+            if start:
+                yield None
+            matched.extend(key for key in candidates[start:start + step] if key in entries and query in entries[key][0])
+
+        if self.generation == generation:
+            self.last_query, self.last_keys = query, matched
+        yield [entries[key][1] for key in matched if key in entries]
+
+    def search(self, query):
+        """一次性执行查询，返回匹配的变量列表"""
+        for result in self.search_steps(query, chunk_size=None):
+            if result is not None:
+                return result
+
+def normalize_segment(segment):
+    """规范化路径段：去掉首尾空白和结尾的斜杠，统一使用反斜杠，不区分大小写"""
+    return segment.strip().replace("/", "\\").rstrip("\\").lower()
+
+def split_segments(value):
+    """把 ; 分隔的值拆成规范化后的路径段集合，忽略空段"""
+    segments = set()
+    for segment in value.split(";"):
+        segment = normalize_segment(segment)
+        if segment:
+            segments.add(segment)
+    return segments
+
+class PathIndex:
+    """
+    路径段倒排索引：从每个 ; 分隔的路径段映射到包含它的 (name, scope)。
+
+    用于回答"哪些变量包含这个目录"，查找只是一次字典访问，与变量数量和值的长度无关。
+    """
+
+    def __init__(self, env_list=None):
+        self.segments = {}  # {规范化路径段: {(name, scope)}}
+        self.rows = {}  # {(name, scope): frozenset(规范化路径段)}
+        if env_list is not None:
+            self.rebuild(env_list)
+
+    def __len__(self):
+        return len(self.segments)
+
+    def rebuild(self, env_list):
+        """按给定数据重建索引"""
+        self.segments = {}
+        self.rows = {}
+        for env in env_list:
+            self.update(env)
+
+    def update(self, env):
+        """新增或替换一个变量，只改动新旧值之间不同的路径段"""
+        key = env_key(env)
+        new = frozenset(split_segments(env[1]))
+        old = self.rows.get(key, frozenset())
+        for segment in old - new:
+            self._discard(segment, key)
+        for segment in new - old:
+            self.segments.setdefault(segment, set()).add(key)
+        self.rows[key] = new
+
+    def remove(self, key):
+        for segment in self.rows.pop(key, ()):
+            self._discard(segment, key)
+
+    def _discard(self, segment, key):
+        keys = self.segments.get(segment)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.segments[segment]
+
+    def lookup(self, path):
+        """返回值中包含 path 这一路径段的变量键集合"""
+        return set(self.segments.get(normalize_segment(path), ()))
@@ -0,0 +1,263 @@
+"""
+内容寻址的快照存储
+
+每个变量值按内容的 SHA-256 保存一次（objects/ab/<hash>），快照由 (name, scope, kind, hash) 引用组成。
+引用按内容切分成块（由变量名决定分块边界，平均 CHUNK_AVERAGE 个一块），每块同样按哈希存为对象，
+快照清单（manifests/<id>.json）只列出块的哈希。修改少量变量后创建快照，只会写入变化的值、
+包含它们的块和一份很小的清单；恢复时逐个校验哈希，保证与创建时完全一致。
+
+目录结构:
+    <root>/objects/ab/abcdef...   变量值（UTF-8）或引用块（JSON）
+    <root>/manifests/<id>.json    快照清单
+    <root>/.lock                  create 与 gc 共用的跨进程锁
+
+GUI 和命令行工具可以同时使用同一个存储：创建快照和回收对象互斥，回收不会删除
+正在创建、清单尚未写入的快照所用的对象。
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime
+
+from env_record import EnvVar
+from file_lock import FileLock
+from yaml_utils import atomic_write
+
+# 默认存放在项目根目录下，与 env_backup_*.yaml 备份文件放在一起
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snapshots")
+
+# 平均每块包含的引用数量，必须是 2 的幂
+CHUNK_AVERAGE = 64
+
+# scope 为 None 表示快照包含两个作用域，否则只包含该作用域
+SnapshotInfo = namedtuple("SnapshotInfo", "id created label count scope", defaults=(None,))
+
+class SnapshotError(Exception):
+    """快照不存在或内容损坏"""
+
+def is_chunk_boundary(name, scope):
+    """分块边界只取决于变量本身，插入或删除变量只影响相邻的块"""
+    return zlib.crc32(f"{scope}\0{name}".encode("utf-8")) & (CHUNK_AVERAGE - 1) == 0
+
+class SnapshotStore:
+    """快照存储：创建、列出、恢复、删除快照，回收不再被引用的对象，按保留策略清理旧快照"""
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.manifests_dir = os.path.join(root, "manifests")
+        self._known = None  # 已存在的对象哈希，第一次用到时扫描目录；其他进程可能已经回收，写入前仍需确认文件存在
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def manifest_path(self, snapshot_id):
+        return os.path.join(self.manifests_dir, f"{snapshot_id}.json")
+
+    def locked(self):
+        """create 与 gc 共用的跨进程锁；每次使用新的 FileLock，同一进程内的线程之间同样互斥"""
+        return FileLock(os.path.join(self.root, ".lock"))
+
+    def known_objects(self):
+        if self._known is None:
+            self._known = set()
+            if os.path.isdir(self.objects_dir):
+                for prefix in os.scandir(self.objects_dir):
+                    if prefix.is_dir():
+                        self._known.update(entry.name for entry in os.scandir(prefix.path)
+                                           if not entry.name.endswith(".tmp"))
+        return self._known
+
+    def put(self, data):
+        """按内容保存一个对象，返回 (哈希, 是否新写入)"""
+        digest = hashlib.sha256(data).hexdigest()
+        known = self.known_objects()
+        if digest in known and os.path.exists(self.object_path(digest)):
+            return digest, False
+        self.write_object(digest, data)
+        known.add(digest)
+        return digest, True
+
+    def get(self, digest):
+        """读取一个对象并校验哈希"""
+        try:
+            with open(self.object_path(digest), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            raise SnapshotError(f"对象丢失: {digest}") from None
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise SnapshotError(f"对象已损坏: {digest}")
+        return data
+
+    def write_object(self, digest, data):
+        """写入一个对象：先写临时文件再重命名，读取时会校验哈希"""
+        directory = os.path.dirname(self.object_path(digest))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.object_path(digest))
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def create(self, env_list, label="", scope=None):
+        """
+        创建快照，返回 (SnapshotInfo, 新写入的对象数量)。
+
+        只写入存储中还没有的值和引用块；清单最后原子写入，中途失败不会留下不完整的快照。
+        scope 不为 None 时快照只记录该作用域，恢复时不会把另一个作用域的变量当作需要删除。
+        整个过程持有存储锁，其他进程的 gc 要等清单写入后才能开始。
+        """
+        with self.locked():
+            return self._create(env_list, label, scope)
+
+    def _create(self, env_list, label, scope):
+        chunks = []
+        chunk = []
+        count = 0
+        written = 0
+
+        def flush():
+            nonlocal written
+            data = json.dumps(chunk, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            digest, is_new = self.put(data)
+            chunks.append(digest)
+            written += is_new
+
+        for name, value, kind, env_scope in env_list:
+            if scope is not None and env_scope != scope:
+                raise ValueError(f"快照只包含 {scope} 作用域，不能保存 {env_scope} 变量 {name}")
+            digest, is_new = self.put(value.encode("utf-8"))
+            written += is_new
+            chunk.append([name, env_scope, kind, digest])
+            count += 1
+            if is_chunk_boundary(name, env_scope):
+                flush()
+                chunk = []
+        if chunk:
+            flush()
+
+        now = datetime.now()
+        snapshot_id = now.strftime("%Y%m%d_%H%M%S_%f")
+        manifest = {"id": snapshot_id, "created": now.isoformat(), "label": label,
+                    "count": count, "scope": scope, "chunks": chunks}
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        with atomic_write(self.manifest_path(snapshot_id)) as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        return SnapshotInfo(snapshot_id, manifest["created"], label, count, scope), written
+
+    def iter_entries(self, manifest):
+        """逐块读取快照中的 [name, scope, kind, 值哈希] 引用"""
+        for digest in manifest["chunks"]:
+            yield from json.loads(self.get(digest).decode("utf-8"))
+
+    def read_manifest(self, snapshot_id):
+        try:
+            with open(self.manifest_path(snapshot_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise SnapshotError(f"快照不存在: {snapshot_id}") from None
+        except ValueError as e:
+            raise SnapshotError(f"快照清单损坏: {snapshot_id}: {e}") from e
+
+    def info(self, snapshot_id):
+        """读取一个快照的 SnapshotInfo"""
+        manifest = self.read_manifest(snapshot_id)
+        return SnapshotInfo(manifest["id"], manifest["created"], manifest.get("label", ""),
+                            manifest["count"], manifest.get("scope"))
+
+    def list(self):
+        """按创建时间从旧到新列出所有快照"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        snapshots = [self.info(entry.name[:-len(".json")])
+                     for entry in os.scandir(self.manifests_dir) if entry.name.endswith(".json")]
+        return sorted(snapshots, key=lambda info: info.created)
+
+    def load(self, snapshot_id):
+        """恢复快照中的全部变量，对象丢失或哈希不匹配时抛出 SnapshotError"""
+        manifest = self.read_manifest(snapshot_id)
+        values = {}
+        env_list = []
+        try:
+            for name, scope, kind, digest in self.iter_entries(manifest):
+                value = values.get(digest)
+                if value is None:
+                    value = values[digest] = self.get(digest).decode("utf-8")
+                env_list.append(EnvVar(name, value, kind, scope))
+        except SnapshotError as e:
+            raise SnapshotError(f"快照 {snapshot_id}: {e}") from None
+        return env_list
+
+    def delete(self, snapshot_id):
+        """删除快照清单，不再被引用的对象由 gc 回收"""
+        try:
+            os.remove(self.manifest_path(snapshot_id))
+        except FileNotFoundError:
+            raise SnapshotError(f"快照不存在: {snapshot_id}") from None
+
+    def gc(self):
+        """
+        删除没有被任何快照引用的值和引用块，返回删除的对象数量。
+
+        持有存储锁并重新扫描对象目录，包括其他进程写入的对象。
+        """
+        with self.locked():
+            self._known = None
+            return self._gc()
+
+    def _gc(self):
+        referenced = set()
+        for info in self.list():
+            manifest = self.read_manifest(info.id)
+            referenced.update(manifest["chunks"])
+            referenced.update(entry[3] for entry in self.iter_entries(manifest))
+
+        removed = 0
+        for digest in list(self.known_objects()):
+            if digest not in referenced:
+                try:
+                    os.remove(self.object_path(digest))
+                except FileNotFoundError:
+                    pass
+                self._known.discard(digest)
+                removed += 1
+        return removed
+
+    def apply_retention(self, keep_last=None, keep_days=None):
+        """
+        按保留策略删除旧快照并回收值，返回被删除的快照 id 列表。
+
+        最新的 keep_last 个快照和 keep_days 天以内的快照会被保留；两者都为 None 时不删除任何快照。
+        keep_last 至少为 1，keep_days 不能为负数，避免误删全部快照。
+        """
+        if keep_last is None and keep_days is None:
+            return []
+        if keep_last is not None and keep_last < 1:
+            raise ValueError(f"keep_last 至少为 1: {keep_last}")
+        if keep_days is not None and keep_days < 0:
+            raise ValueError(f"keep_days 不能为负数: {keep_days}")
+        snapshots = self.list()
+        keep = set()
+        if keep_last is not None:
+            keep.update(info.id for info in snapshots[-keep_last:])
+        if keep_days is not None:
+            cutoff = time.time() - keep_days * 86400
+            keep.update(info.id for info in snapshots
+                        if datetime.fromisoformat(info.created).timestamp() >= cutoff)
+
+        deleted = [info.id for info in snapshots if info.id not in keep]
+        for snapshot_id in deleted:
+            self.delete(snapshot_id)
+        if deleted:
+            self.gc()
+        return deleted
@@ -0,0 +1,181 @@
+"""
+Treeview 差量同步
+
+TreeReconciler 记住每个 (name, scope) 对应的 Treeview 项 id 以及上一次渲染的内容，
+每次同步只对真正变化的行调用 Tk：新增 insert、顺序变化 move、内容变化 item(values)、
+状态变化 item(tags)，搜索过滤时用 detach/move 隐藏和恢复行，而不是删除后重建。
+"""
+
+# 分组顺序和显示名称
+GROUPS = (("User", "用户变量"), ("Machine", "系统变量"))
+
+# 需要移动的项超过这个数量时整体重设子项列表
+MOVE_LIMIT = 32
+
+def group_of(scope):
+    """变量所属的分组，与原 populate_tree 一致：非 user 的都归入系统变量"""
+    return "User" if scope.lower() == "user" else "Machine"
+
+class TreeReconciler:
+    """把行列表差量同步到 ttk.Treeview"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.items = {}  # {(name, scope): 项 id}，包括已 detach 的项
+        self.keys = {}  # {项 id: (name, scope)}
+        self.rendered = {}  # {项 id: (text, values, tag)} 上一次写入 Tk 的内容
+        self.groups = {}  # {分组: 分组节点 id}
+        self.children = {}  # {分组节点 id: [当前挂在该节点下的项 id]}
+        self.attached_groups = []  # 当前挂在根节点下的分组节点 id
+
+    def clear(self):
+        """删除所有项并清空映射"""
+        roots = self.tree.get_children()
+        if roots:
+            self.tree.delete(*roots)
+        leftovers = [iid for iid in list(self.items.values()) + list(self.groups.values()) if self.tree.exists(iid)]
+        if leftovers:
+            self.tree.delete(*leftovers)
+        self.items.clear()
+        self.keys.clear()
+        self.rendered.clear()
+        self.groups.clear()
+        self.children.clear()
+        self.attached_groups = []
+
+    def sync(self, rows, status, keep_keys=None):
+        """
+        让 Treeview 按给定顺序、按作用域分组显示 rows。
+
+        status 为 {(name, scope): 差异状态}。不在 rows 中但在 keep_keys 中的行只会被 detach，
+        搜索条件放宽时可以直接挂回；其余不再需要的行会被删除。
+        """
+        grouped = {group: [] for group, _ in GROUPS}
+        for env in rows:
+            grouped[group_of(env[3])].append(env)
+
+        # 分组节点：有内容的按固定顺序挂在根节点下，没有内容的 detach
+        wanted_groups = []
+        for group, text in GROUPS:
+            if grouped[group]:
+                if group not in self.groups:
+                    iid = self.tree.insert('', 'end', text=text, values=('', '', group), open=True)
+                    self.groups[group] = iid
+                    self.children[iid] = []
+                    self.attached_groups.append(iid)
+                wanted_groups.append(self.groups[group])
+            elif group in self.groups and self.groups[group] in self.attached_groups:
+                self.tree.detach(self.groups[group])
+                self.attached_groups.remove(self.groups[group])
+        self._reorder('', self.attached_groups, wanted_groups)
+        self.attached_groups = wanted_groups
+
+        visible = set()
+        for group, _ in GROUPS:
+            if group in self.groups:
+                visible.update(self._sync_group(self.groups[group], grouped[group], status, keep_keys))
+
+        # 清理既不显示、也不需要保留的已 detach 项
+        stale_ids = [iid for key, iid in self.items.items()
+                     if iid not in visible and (keep_keys is None or key not in keep_keys)]
+        self._delete(stale_ids)
+
+    def _sync_group(self, group_iid, rows, status, keep_keys):
+        """同步一个分组下的行，返回该分组中显示的项 id 集合"""
+        desired = []
+        inserted = []
+        for env in rows:
+            name, value, kind, scope = env
+            key = (name, scope)
+            state = (name, (value, kind, scope), status.get(key, 'same'))
+            iid = self.items.get(key)
+            if iid is None:
+                iid = self.tree.insert(group_iid, 'end', text=name, values=state[1], tags=(state[2],))
+                self.items[key] = iid
+                self.keys[iid] = key
+                self.rendered[iid] = state
+                inserted.append(iid)
+            else:
+                self._update(iid, state)
+            desired.append(iid)
+
+        desired_set = set(desired)
+        current = self.children[group_iid]
+
+        # 不再显示的行：仍需保留的 detach，其他的删除
+        hidden = [iid for iid in current if iid not in desired_set]
+        if hidden:
+            detach_ids = [iid for iid in hidden if keep_keys is not None and self.keys[iid] in keep_keys]
+            if detach_ids:
+                self.tree.detach(*detach_ids)
+            self._delete([iid for iid in hidden if keep_keys is None or self.keys[iid] not in keep_keys])
+            current = [iid for iid in current if iid in desired_set]
+
+        # 新插入的项位于分组末尾，之后再统一调整顺序
+        self._reorder(group_iid, current + inserted, desired)
+        self.children[group_iid] = desired
+        return desired_set
+
+    def _delete(self, iids):
+        """删除项并忘记它们的映射"""
+        if not iids:
+            return
+        existing = [iid for iid in iids if self.tree.exists(iid)]
+        if existing:
+            self.tree.delete(*existing)
+        for iid in iids:
+            key = self.keys.pop(iid, None)
+            if key is not None:
+                self.items.pop(key, None)
+            self.rendered.pop(iid, None)
+
+    def _update(self, iid, state):
+        """只把变化的字段写回 Tk"""
+        old = self.rendered.get(iid)
+        if old == state:
+            return
+        changes = {}
+        if old is None or old[0] != state[0]:
+            changes['text'] = state[0]
+        if old is None or old[1] != state[1]:
+            changes['values'] = state[1]
+        if old is None or old[2] != state[2]:
+            changes['tags'] = (state[2],)
+        self.tree.item(iid, **changes)
+        self.rendered[iid] = state
+
+    def _reorder(self, parent, current, desired):
+        """
+        把 parent 下的子项从 current 顺序调整为 desired 顺序。
+
+        顺序不变的项不会被移动，desired 中不在 current 里的项（已 detach）会被挂回 parent；
+        需要移动的项较多时（例如放宽搜索条件）用一次 set_children 代替逐个 move。
+        """
+        if current == desired:
+            return
+        moves = []
+        moved = set()
+        cursor = 0
+        for index, iid in enumerate(desired):
+            while cursor < len(current) and current[cursor] in moved:
+                cursor += 1
+            if cursor < len(current) and current[cursor] == iid:
+                cursor += 1
+                continue
+            moves.append((iid, index))
+            moved.add(iid)
+
+        if len(moves) > MOVE_LIMIT:
+            self.tree.set_children(parent, *desired)
+            return
+        for iid, index in moves:
+            self.tree.move(iid, parent, index)
+
+    def update_row(self, env, diff_status):
+        """只更新一行的内容和状态，该行不存在时返回 False"""
+        name, value, kind, scope = env
+        iid = self.items.get((name, scope))
+        if iid is None:
+            return False
+        self._update(iid, (name, (value, kind, scope), diff_status))
+        return True
@@ -0,0 +1,129 @@
+"""
+虚拟列表模式
+
+变量很多时（例如导入的快照、合并的多机备份），Treeview 只创建可见区域加少量缓冲的行。
+滚动条和鼠标滚轮由 VirtualTree 接管，滚动时通过 TreeReconciler 把新的窗口同步到控件上：
+移出窗口的行被删除、移入的行被插入，作用域分组和差异颜色与完整模式相同。
+"""
+from tree_sync import GROUPS, group_of
+from env_store import env_key
+
+# 超过这个行数时切换到虚拟列表模式
+VIRTUAL_THRESHOLD = 5000
+
+# 可见区域之外额外渲染的行数
+BUFFER_ROWS = 10
+
+# 每格鼠标滚轮滚动的行数
+WHEEL_ROWS = 3
+
+# 样式中没有设置行高时使用的默认值（像素）
+DEFAULT_ROW_HEIGHT = 20
+
+class VirtualTree:
+    """只渲染可见窗口的 Treeview 视图，与 TreeReconciler 共用同一个控件"""
+
+    def __init__(self, tree, reconciler, scrollbar, row_height=None):
+        self.tree = tree
+        self.reconciler = reconciler
+        self.scrollbar = scrollbar
+        self.row_height = row_height or self.lookup_row_height()
+        self.rows = []  # 按分组排列后的全部行
+        self.positions = None  # {(name, scope): 在 rows 中的位置}，第一次更新单行时才建立
+        self.status = {}
+        self.start = 0  # 窗口第一行在 rows 中的位置
+        self.active = False
+
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            tree.bind(sequence, self.on_mousewheel, add='+')
+        tree.bind('<Configure>', self.on_configure, add='+')
+
+    def lookup_row_height(self):
+        from tkinter import ttk
+        try:
+            return int(ttk.Style(self.tree).lookup('Treeview', 'rowheight')) or DEFAULT_ROW_HEIGHT
+        except (ValueError, TypeError):
+            return DEFAULT_ROW_HEIGHT
+
+    def page_size(self):
+        """可见区域能显示的行数"""
+        return max(1, self.tree.winfo_height() // self.row_height)
+
+    def activate(self):
+        """接管滚动条：滚动条驱动窗口位置，而不是 Treeview 自身的 yview"""
+        if self.active:
+            return
+        self.active = True
+        self.start = 0
+        self.scrollbar.configure(command=self.yview)
+        self.tree.configure(yscrollcommand='')
+
+    def deactivate(self):
+        """恢复完整模式的滚动条绑定，已渲染的行交给 TreeReconciler 继续同步"""
+        if not self.active:
+            return
+        self.active = False
+        self.rows = []
+        self.positions = None
+        self.scrollbar.configure(command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+
+    def set_rows(self, rows, status):
+        """设置要显示的行并渲染当前窗口，status 为 {(name, scope): 差异状态}"""
+        grouped = {group: [] for group, _ in GROUPS}
+        for env in rows:
+            grouped[group_of(env[3])].append(env)
+        # 与完整模式的显示顺序一致：先用户变量，后系统变量
+        self.rows = [env for group, _ in GROUPS for env in grouped[group]]
+        self.positions = None
+        self.status = status
+        self.activate()
+        self.render()
+
+    def render(self):
+        """把当前窗口同步到控件上并更新滚动条"""
+        page = self.page_size()
+        self.start = max(0, min(self.start, len(self.rows) - page))
+        window = self.rows[self.start:self.start + page + BUFFER_ROWS]
+        self.reconciler.sync(window, self.status)
+        self.tree.yview_moveto(0)
+
+        total = len(self.rows) or 1
+        self.scrollbar.set(self.start / total, min(1.0, (self.start + page) / total))
+
+    def update_row(self, env, diff_status):
+        """更新一行的数据；该行不在当前数据中时返回 False"""
+        if self.positions is None:
+            self.positions = {env_key(row): index for index, row in enumerate(self.rows)}
+        index = self.positions.get(env_key(env))
+        if index is None:
+            return False
+        self.rows[index] = env
+        self.reconciler.update_row(env, diff_status)  # 不在窗口内时等滚动到它再渲染
+        return True
+
+    def yview(self, *args):
+        """滚动条回调：('moveto', 比例) 或 ('scroll', 数量, 'units'|'pages')"""
+        if args[0] == 'moveto':
+            self.start = int(float(args[1]) * len(self.rows))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self.start += amount * self.page_size() if args[2] == 'pages' else amount
+        self.render()
+
+    def on_mousewheel(self, event):
+        if not self.active:
+            return None
+        if event.num == 4:
+            direction = -1
+        elif event.num == 5:
+            direction = 1
+        else:
+            direction = -1 if event.delta > 0 else 1
+        self.start += direction * WHEEL_ROWS
+        self.render()
+        return 'break'  # 阻止 Treeview 滚动自身的少量行
+
+    def on_configure(self, event):
+        if self.active:
+            self.render()
@@ -1,41 +1,395 @@
-import yaml
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from json.encoder import encode_basestring
+
+from env_record import EnvVar, SCOPE_MACHINE, SCOPE_USER
+
+# yaml 在第一次读写 YAML 时才导入，见 get_yaml()
+_yaml = None
+
+# 流式写入时每次交给序列化器的条目数
+WRITE_CHUNK = 1000
+
+# 流式读取 JSON 时每次读入的字符数
+READ_CHUNK = 1 << 16
+
+# 不超过这个大小（字节）的 JSON 备份直接用 json.load 解析，比流式读取快一倍；更大的文件才流式读取以限制内存
+JSON_STREAM_THRESHOLD = 16 << 20
+
+def get_yaml():
+    """
+    延迟导入 yaml 并选择序列化器，返回 yaml 模块。
+
+    导入 yaml 需要几十毫秒，启动界面、命令行工具和只读写 JSON/二进制快照时都用不到。
+    """
+    global _yaml, Dumper, Loader
+    if _yaml is None:
+        import yaml
+        # 优先使用 libyaml 提供的 C 实现
+        Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        _yaml = yaml
+    return _yaml
+
+def __getattr__(name):
+    # 兼容直接访问 yaml_utils.Dumper / yaml_utils.Loader
+    if name in ("Dumper", "Loader"):
+        get_yaml()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@contextmanager
+def atomic_write(filename, binary=False):
+    """
+    原子写文件：先写同目录下的临时文件，fsync 后用 os.replace 替换目标文件。
+
+    默认以 UTF-8 文本方式打开，binary=True 时以二进制方式打开。
+
+    写入过程中出错或进程崩溃时，原来的目标文件保持不变，临时文件会被删除。
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(filename)}.", suffix=".tmp")
+    try:
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8", newline="\n")) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp 创建的文件只有所有者可读写，沿用目标文件原来的权限
+        try:
+            mode = os.stat(filename).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, filename)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # 让重命名本身也落盘（Windows 不支持打开目录，忽略）
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+def iter_chunks(items, size=WRITE_CHUNK):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 def save_env_to_yaml(env_list, filename="env.yaml"):
-    """将环境变量列表保存到 YAML 文件中"""
-    machine_envs = []
-    user_envs = []
+    """
+    将环境变量列表保存到 YAML 文件中
 
-    for env in env_list:
-        name, value, kind, scope = env
-        env_data = {"name": name, "value": value, "kind": kind}
+    按作用域分两次遍历 env_list，逐块写入临时文件后原子替换目标文件，输出格式与原来的
+    {"machine": [...], "user": [...]} 相同。写入本身不输出信息，"环境变量已保存到 ..." 由调用方（GUI 备份、cli.py dump）输出。
+    """
+    yaml = get_yaml()
+    with atomic_write(filename) as f:
+        for key, is_machine in (("machine", True), ("user", False)):
+            entries = (
+                {"name": name, "value": value, "kind": kind}
+                for name, value, kind, scope in env_list
+                if (scope == "Machine") == is_machine
+            )
+            wrote_any = False
+            for chunk in iter_chunks(entries):
+                if not wrote_any:
+                    f.write(f"{key}:\n")
+                    wrote_any = True
+                yaml.dump(chunk, f, Dumper=Dumper, default_flow_style=False, allow_unicode=True, sort_keys=False)
+            if not wrote_any:
+                f.write(f"{key}: []\n")
 
-        if scope == "Machine":
-            machine_envs.append(env_data)
-        else:
-            user_envs.append(env_data)
+def save_env_to_json(env_list, filename="env.json"):
+    """
+    将环境变量列表保存到 JSON 备份文件中
 
-    yaml_data = {"machine": machine_envs, "user": user_envs}
+    格式为 {"timestamp", "count", "variables": [...]}，与 json.dump(indent=2, ensure_ascii=False) 的输出相同；
+    字符串用 json 模块的 C 转义函数编码，逐块写入临时文件后原子替换目标文件。
+    """
+    with atomic_write(filename) as f:
+        f.write("{\n")
+        f.write(f'  "timestamp": {encode_basestring(datetime.now().isoformat())},\n')
+        f.write(f'  "count": {len(env_list)},\n')
+        f.write('  "variables": [')
+        separator = "\n"
+        for chunk in iter_chunks(env_list):
+            parts = []
+            for name, value, kind, scope in chunk:
+                parts.append(
+                    f'{separator}    {{\n      "name": {encode_basestring(name)},\n      "value": {encode_basestring(value)},\n'
+                    f'      "kind": {encode_basestring(kind)},\n      "scope": {encode_basestring(scope)}\n    }}'
+                )
+                separator = ",\n"
+            f.write("".join(parts))
+        f.write("\n  ]\n}" if separator != "\n" else "]\n}")
 
-    with open(filename, "w", encoding="utf-8") as f:
-        yaml.dump(
-            yaml_data, f, default_flow_style=False, allow_unicode=True, sort_keys=False
-        )
+class BackupFormatError(ValueError):
+    """备份文件格式错误，带有出错的文件名和行号"""
 
-    print(f"环境变量已保存到 {filename}")
+    def __init__(self, filename, line, message):
+        self.filename = filename
+        self.line = line
+        self.message = message
+        location = f"{filename}:{line}" if line is not None else filename
+        super().__init__(f"{location}: {message}")
 
-def get_env_from_yaml(filename="env.yaml"):
-    """从 YAML 文件中读取环境变量"""
+def make_env(filename, line, entry, scope):
+    """校验一个条目的字段并创建 EnvVar，出错时抛出带行号的 BackupFormatError"""
+    for field in ("name", "value", "kind"):
+        if field not in entry:
+            raise BackupFormatError(filename, line, f"条目缺少字段 {field}")
+        if not isinstance(entry[field], str):
+            raise BackupFormatError(filename, line, f"字段 {field} 应为字符串")
+    if not entry["name"]:
+        raise BackupFormatError(filename, line, "变量名不能为空")
+    return EnvVar(entry["name"], entry["value"], entry["kind"], scope)
+
+def iter_env_from_yaml(filename="env.yaml"):
+    """
+    逐条读取 YAML 备份中的环境变量（生成器）
+
+    直接处理 CSafeLoader 的解析事件，不构建整个文档；标量一律按原始字符串读取，
+    值 123 或 true 不会被转换成数字或布尔值。格式错误时抛出带行号的 BackupFormatError。
+    """
+    yaml = get_yaml()
+    with open(filename, "r", encoding="utf-8") as f:
+        try:
+            yield from parse_yaml_events(yaml.parse(f, Loader=Loader), filename)
+        except yaml.MarkedYAMLError as e:
+            mark = e.problem_mark or e.context_mark
+            raise BackupFormatError(filename, mark.line + 1 if mark else None, e.problem or str(e)) from e
+        except yaml.YAMLError as e:
+            raise BackupFormatError(filename, None, str(e)) from e
+
+def parse_yaml_events(events, filename):
+    """把 {scope: [{name, value, kind}, ...]} 结构的解析事件转换为 EnvVar"""
+    yaml = get_yaml()
+
+    def fail(event, message):
+        raise BackupFormatError(filename, event.start_mark.line + 1, message)
+
+    def next_event():
+        event = next(events)
+        if isinstance(event, yaml.AliasEvent):
+            fail(event, "不支持别名")
+        return event
+
+    event = next_event()
+    while isinstance(event, (yaml.StreamStartEvent, yaml.DocumentStartEvent)):
+        event = next_event()
+    if isinstance(event, yaml.StreamEndEvent):
+        return  # 空文件
+    if not isinstance(event, yaml.MappingStartEvent):
+        fail(event, "顶层应为 machine/user 映射")
+
+    while True:
+        event = next_event()
+        if isinstance(event, yaml.MappingEndEvent):
+            break
+        if not isinstance(event, yaml.ScalarEvent):
+            fail(event, "作用域名称应为字符串")
+        scope = SCOPE_MACHINE if event.value.lower() == "machine" else SCOPE_USER
+
+        event = next_event()
+        if isinstance(event, yaml.ScalarEvent) and event.value == "":
+            continue  # "user:" 后面没有内容
+        if not isinstance(event, yaml.SequenceStartEvent):
+            fail(event, f"{scope} 下应为变量列表")
+
+        while True:
+            event = next_event()
+            if isinstance(event, yaml.SequenceEndEvent):
+                break
+            if not isinstance(event, yaml.MappingStartEvent):
+                fail(event, "变量条目应为 name/value/kind 映射")
+            line = event.start_mark.line + 1
+            entry = {}
+            while True:
+                event = next_event()
+                if isinstance(event, yaml.MappingEndEvent):
+                    break
+                if not isinstance(event, yaml.ScalarEvent):
+                    fail(event, "字段名应为字符串")
+                field = event.value
+                event = next_event()
+                if not isinstance(event, yaml.ScalarEvent):
+                    fail(event, f"字段 {field} 应为字符串")
+                entry[field] = event.value
+            yield make_env(filename, line, entry, scope)
+
+class JsonStream:
+    """按块读取 JSON 文件，用 raw_decode 逐个解码值，并记录当前位置的行号"""
+
+    # 解码错误出现在距缓冲区末尾这么多字符以内时，认为值可能被块边界截断
+    # （最长的字面量 false 和 \uXXXX 转义都不超过 6 个字符）
+    TRUNCATION_MARGIN = 6
+
+    def __init__(self, f, filename):
+        self.f = f
+        self.filename = filename
+        self.buffer = ""
+        self.pos = 0
+        self.line = 1  # buffer 中 counted 位置所在的行
+        self.counted = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        """读入下一块数据，已经处理过的部分从缓冲区中丢弃"""
+        if self.eof:
+            return False
+        if self.pos:
+            self.line = self.line_at(self.pos)
+            self.counted = 0
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        data = self.f.read(READ_CHUNK)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer += data
+        return True
+
+    def line_at(self, pos):
+        """pos 处的行号；向后只统计上次位置之后新出现的换行"""
+        if pos < self.counted:
+            return self.line - self.buffer.count("\n", pos, self.counted)
+        self.line += self.buffer.count("\n", self.counted, pos)
+        self.counted = pos
+        return self.line
+
+    def fail(self, message, pos=None):
+        raise BackupFormatError(self.filename, self.line_at(self.pos if pos is None else pos), message)
+
+    def peek(self):
+        """跳过空白，返回下一个字符（文件结束时返回空字符串）"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            self.fail(f"应为 {' 或 '.join(chars)}")
+        self.pos += 1
+        return char
+
+    def decode(self):
+        """解码下一个完整的 JSON 值，返回 (值, 所在行号)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # 只有值可能被块边界截断时才读入更多数据重试；其他格式错误立即报告，不会一直读到文件结束
+                truncated = e.pos >= len(self.buffer) - self.TRUNCATION_MARGIN or e.msg.startswith("Unterminated string")
+                if truncated and self.fill():
+                    continue
+                self.fail(e.msg, e.pos)
+            # 数字可能恰好在块边界处被截断，读入更多数据后重新解码
+            if end == len(self.buffer) and self.fill():
+                continue
+            line = self.line_at(self.pos)
+            self.pos = end
+            return value, line
+
+def make_json_env(filename, line, var):
+    """校验 JSON 备份中的一个变量条目并创建 EnvVar"""
+    if not isinstance(var, dict):
+        raise BackupFormatError(filename, line, "变量条目应为对象")
+    if not isinstance(var.get("scope"), str):
+        raise BackupFormatError(filename, line, "字段 scope 应为字符串")
+    scope = SCOPE_MACHINE if var["scope"].lower() == "machine" else SCOPE_USER
+    return make_env(filename, line, var, scope)
+
+def iter_env_from_json(filename="env.json"):
+    """
+    逐条读取 JSON 备份中的环境变量（生成器）
+
+    文件格式为 {"timestamp", "count", "variables": [...]}。不超过 JSON_STREAM_THRESHOLD 的文件
+    用 json.load 一次解析，更大的文件流式读取。格式错误时抛出 BackupFormatError。
+    """
+    if os.path.getsize(filename) <= JSON_STREAM_THRESHOLD:
+        yield from load_env_from_json(filename)
+    else:
+        yield from stream_env_from_json(filename)
+
+def load_env_from_json(filename="env.json"):
+    """用 json.load 读取整个 JSON 备份（生成器）；条目错误用 variables 中的序号定位"""
     with open(filename, "r", encoding="utf-8") as f:
-        yaml_data = yaml.safe_load(f)
-
-    env_list = []
-    for scope, envs in yaml_data.items():
-        for env in envs:
-            temp = [env["name"], env["value"], env["kind"], scope]
-            if scope.lower() == "machine":
-                temp[3] = "Machine"
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise BackupFormatError(filename, e.lineno, e.msg) from None
+    if not isinstance(data, dict):
+        raise BackupFormatError(filename, 1, "应为 {")
+    variables = data.get("variables", [])
+    if not isinstance(variables, list):
+        raise BackupFormatError(filename, None, "variables 应为数组")
+    for i, var in enumerate(variables):
+        try:
+            yield make_json_env(filename, None, var)
+        except BackupFormatError as e:
+            raise BackupFormatError(filename, None, f"variables[{i}]: {e.message}") from None
+
+def stream_env_from_json(filename="env.json"):
+    """
+    流式读取 JSON 备份（生成器）
+
+    variables 数组中的条目按块读取、逐个解码，不会把整个文件载入内存；格式错误带有行号。
+    """
+    with open(filename, "r", encoding="utf-8") as f:
+        stream = JsonStream(f, filename)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key, _ = stream.decode()
+            stream.expect(":")
+            if key != "variables":
+                stream.decode()  # timestamp、count 等其他字段
             else:
-                temp[3] = "User"
-            env_list.append(temp)
+                stream.expect("[")
+                if stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        var, line = stream.decode()
+                        yield make_json_env(filename, line, var)
+                        if stream.expect(",]") == "]":
+                            break
+            if stream.expect(",}") == "}":
+                return
+
+def iter_env_from_file(filename):
+    """按扩展名选择 JSON、二进制快照或 YAML 读取器"""
+    if filename.endswith(".json"):
+        return iter_env_from_json(filename)
+    if filename.endswith(".envs"):
+        from binary_snapshot import iter_env_from_binary
+        return iter_env_from_binary(filename)
+    return iter_env_from_yaml(filename)
 
-    return env_list
+def get_env_from_yaml(filename="env.yaml"):
+    """从 YAML 文件中读取环境变量"""
+    return list(iter_env_from_yaml(filename))